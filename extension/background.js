@@ -96,6 +96,12 @@ chrome.runtime.onMessage.addListener(function(request, sender, sendResponse) {
       .catch(error => sendResponse({error: error.message}));
     return true;
   }
+  if (request.action === "analyzeFrames") {
+    analyzeFrames(request.frames, request.fps, request.videoUrl)
+      .then(result => sendResponse(result))
+      .catch(error => sendResponse({error: error.message}));
+    return true;
+  }
   if (request.action === "getEnvVars") {
     sendResponse({
       SUPABASE_URL: ENV_VARS.SUPABASE_URL,
@@ -181,11 +187,51 @@ async function analyzeVideo(videoPath) {
   }
 }
 
+async function readAnalysisStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+  while (true) {
+    const {done, value} = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+    const lines = buffer.split("\n");
+    buffer = done ? "" : lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) {
+        continue;
+      }
+      const event = JSON.parse(line);
+      if (event.event === "error") {
+        throw new Error(event.error || "Failed to analyze the video and audio");
+      }
+      if (event.event === "result") {
+        result = event;
+      } else {
+        onEvent(event);
+      }
+    }
+    if (done) {
+      break;
+    }
+  }
+  if (!result) {
+    throw new Error("Analysis ended without a result");
+  }
+  return result;
+}
+
+function reportAnalysisProgress(event) {
+  chrome.runtime.sendMessage({action: "analysisProgress", event: event}, function() {
+    void chrome.runtime.lastError;
+  });
+}
+
 async function analyzeCombined(videoPath, audioPath = null) {
   try {
     const requestBody = audioPath 
-      ? { videoPath, audioPath }
-      : { videoPath };
+      ? { videoPath, audioPath, stream: true }
+      : { videoPath, stream: true };
     
     const response = await fetch(`${SERVER_URL}/analyze-combined`, {
       method: "POST",
@@ -199,7 +245,7 @@ async function analyzeCombined(videoPath, audioPath = null) {
       throw new Error("Failed to analyze the video and audio");
     }
     
-    const data = await response.json();
+    const data = await readAnalysisStream(response, reportAnalysisProgress);
     return {
       fakeScore: data.fakeScore,
       newsScore: data.newsScore || 0,
@@ -215,6 +261,61 @@ async function analyzeCombined(videoPath, audioPath = null) {
   }
 }
 
+async function analyzeAudioFromUrl(videoUrl) {
+  const downloadResponse = await fetch(`${SERVER_URL}/download-audio?video_url=${encodeURIComponent(videoUrl)}&format=mp3`);
+  if (!downloadResponse.ok) {
+    throw new Error(`Failed to download audio: Server responded with status ${downloadResponse.status}`);
+  }
+  const downloaded = await downloadResponse.json();
+  const response = await fetch(`${SERVER_URL}/analyze-audio`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({audioPath: downloaded.audioPath})
+  });
+  if (!response.ok) {
+    throw new Error("Failed to analyze the audio");
+  }
+  return await response.json();
+}
+
+async function analyzeFrames(frames, fps, videoUrl) {
+  try {
+    const audioAnalysis = analyzeAudioFromUrl(videoUrl).catch(error => {
+      console.warn("Audio analysis unavailable for captured frames:", error);
+      return null;
+    });
+    const response = await fetch(`${SERVER_URL}/analyze-frames`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({frames: frames, fps: fps, sourceUrl: videoUrl})
+    });
+    if (!response.ok) {
+      throw new Error("Failed to analyze the captured frames");
+    }
+    const data = await response.json();
+    const audio = await audioAnalysis;
+    return {
+      fakeScore: data.fakeScore,
+      newsScore: audio ? audio.newsScore || 0 : 0,
+      newsSummary: audio ? audio.newsSummary : "No audio analysis available",
+      verdict: audio && audio.verdict ? audio.verdict : "uncertain",
+      confidence: audio ? audio.confidence || 0 : 0,
+      evidence: audio ? audio.evidence || [] : [],
+      detailedViewUrl: `${SERVER_URL}/view/${data.resultId}`
+    };
+  } catch (error) {
+    console.error("Error analyzing captured frames:", error);
+    if (error.message.includes("Failed to fetch")) {
+      throw new Error(`Server connection failed. Make sure the Python server is running at ${SERVER_URL}`);
+    }
+    throw error;
+  }
+}
+
 async function downloadCombined(videoUrl) {
   try {
     console.log("Attempting to download video and audio from URL:", videoUrl);
@@ -36,9 +36,76 @@ function isVideoPage() {
   return false;
 }
 
+const CAPTURE_FPS = 7;
+const CAPTURE_MAX_SECONDS = 30;
+const CAPTURE_MAX_HEIGHT = 360;
+const CAPTURE_QUALITY = 0.8;
+const CAPTURE_SEEK_TIMEOUT_MS = 5000;
+
+function findMainVideo() {
+  const videos = Array.from(document.querySelectorAll('video'))
+    .filter(video => video.readyState >= 2 && video.videoWidth > 0);
+  videos.sort((a, b) => (b.clientWidth * b.clientHeight) - (a.clientWidth * a.clientHeight));
+  return videos[0] || null;
+}
+
+function seekTo(video, time) {
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      video.removeEventListener("seeked", onSeeked);
+      reject(new Error("Timed out seeking the video"));
+    }, CAPTURE_SEEK_TIMEOUT_MS);
+    function onSeeked() {
+      clearTimeout(timer);
+      video.removeEventListener("seeked", onSeeked);
+      resolve();
+    }
+    video.addEventListener("seeked", onSeeked);
+    video.currentTime = time;
+  });
+}
+
+async function captureFrames() {
+  const video = findMainVideo();
+  if (!video) {
+    throw new Error("No playable video found on this page");
+  }
+  const scale = Math.min(1, CAPTURE_MAX_HEIGHT / video.videoHeight);
+  const canvas = document.createElement("canvas");
+  canvas.width = Math.round(video.videoWidth * scale);
+  canvas.height = Math.round(video.videoHeight * scale);
+  const context = canvas.getContext("2d");
+  const wasPaused = video.paused;
+  const originalTime = video.currentTime;
+  const duration = isFinite(video.duration) ? video.duration : originalTime + CAPTURE_MAX_SECONDS;
+  const start = duration <= CAPTURE_MAX_SECONDS ? 0 : Math.min(originalTime, duration - CAPTURE_MAX_SECONDS);
+  const end = Math.min(duration, start + CAPTURE_MAX_SECONDS);
+  const frames = [];
+  video.pause();
+  try {
+    for (let time = start; time < end; time += 1 / CAPTURE_FPS) {
+      await seekTo(video, time);
+      context.drawImage(video, 0, 0, canvas.width, canvas.height);
+      frames.push(canvas.toDataURL("image/webp", CAPTURE_QUALITY));
+    }
+  } finally {
+    video.currentTime = originalTime;
+    if (!wasPaused) {
+      video.play().catch(() => {});
+    }
+  }
+  return {frames: frames, fps: CAPTURE_FPS};
+}
+
 chrome.runtime.onMessage.addListener(function(request, sender, sendResponse) {
   if (request.action === "checkVideoPage") {
     const platform = isVideoPage();
     sendResponse({ platform: platform });
   }
+  if (request.action === "captureFrames") {
+    captureFrames()
+      .then(result => sendResponse(result))
+      .catch(error => sendResponse({error: error.message}));
+    return true;
+  }
 });
\ No newline at end of file
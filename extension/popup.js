@@ -104,6 +104,33 @@ document.addEventListener("DOMContentLoaded", function() {
     });
 
     function startAnalysis(videoUrl) {
+      updateProgress(10, "Capturing frames...");
+      chrome.tabs.query({active: true, currentWindow: true}, function(tabs) {
+        chrome.tabs.sendMessage(tabs[0].id, {action: "captureFrames"}, function(capture) {
+          if (chrome.runtime.lastError || !capture || capture.error || !capture.frames.length) {
+            console.log("Frame capture unavailable, downloading instead:", chrome.runtime.lastError ? chrome.runtime.lastError.message : capture && capture.error);
+            startDownloadAnalysis(videoUrl);
+            return;
+          }
+          updateProgress(50, "Checking facial details...");
+          chrome.runtime.sendMessage(
+            {action: "analyzeFrames", frames: capture.frames, fps: capture.fps, videoUrl: videoUrl},
+            function(analysisResponse) {
+              if (analysisResponse.error) {
+                showError(analysisResponse.error);
+                return;
+              }
+              updateProgress(100, "Done!");
+              setTimeout(() => {
+                displayResults(analysisResponse);
+              }, 500);
+            }
+          );
+        });
+      });
+    }
+
+    function startDownloadAnalysis(videoUrl) {
       updateProgress(10, "Fetching video and audio...");
       chrome.runtime.sendMessage(
         {action: "downloadCombined", videoUrl: videoUrl},
@@ -345,6 +372,20 @@ document.addEventListener("DOMContentLoaded", function() {
       progressPercentage.textContent = `${percent}%`;
     }
 
+    chrome.runtime.onMessage.addListener(function(request) {
+      if (request.action !== "analysisProgress") {
+        return;
+      }
+      const event = request.event;
+      if (event.event === "visual") {
+        updateProgress(80, `Visual scan done: ${event.fakeScore}% likely AI-generated`);
+      } else if (event.event === "searched") {
+        updateProgress(80, "Weighing sources...");
+      } else if (event.event === "verdict") {
+        updateProgress(85, `Early verdict: ${event.verdict} (${event.confidence}% confidence)`);
+      }
+    });
+
     function showError(message) {
       loadingStateDiv.classList.add("hidden");
       initialStateDiv.classList.remove("hidden");
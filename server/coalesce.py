@@ -0,0 +1,131 @@
+import os
+import asyncio
+import logging
+import threading
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple
+)
+
+logger = logging.getLogger(__name__)
+
+class Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.listeners: List[Callable[[Any], None]] = []
+        self.events: List[Any] = []
+
+    def emit(self, event: Any) -> None:
+        self.events.append(event)
+        for listener in list(self.listeners):
+            listener(event)
+
+class InflightCoalescer:
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.followers = 0
+        self.abandoned = 0
+        self._inflight: Dict[Hashable, Flight] = {}
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        return await self.run_with_progress(key, lambda emit: work())
+
+    async def run_with_progress(
+        self,
+        key: Hashable,
+        work: Callable[[Callable[[Any], None]], Awaitable[Any]],
+        on_update: Optional[Callable[[Any], None]] = None
+    ) -> Tuple[Any, bool]:
+        flight = self._inflight.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            self.leaders += 1
+            flight = self._inflight[key] = Flight()
+            flight.task = asyncio.create_task(self._fly(key, flight, work))
+            flight.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            self.followers += 1
+            logger.info(f"Attaching to in-flight {self.name} for {key}")
+            if on_update is not None:
+                for event in flight.events:
+                    on_update(event)
+        if on_update is not None:
+            flight.listeners.append(on_update)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), coalesced
+        finally:
+            flight.waiters -= 1
+            if on_update in flight.listeners:
+                flight.listeners.remove(on_update)
+            if flight.waiters == 0 and not flight.task.done():
+                self.abandoned += 1
+                logger.info(f"Cancelling {self.name} for {key}: no requests are waiting for it")
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                flight.task.cancel()
+
+    async def _fly(self, key: Hashable, flight: Flight, work: Callable[[Callable[[Any], None]], Awaitable[Any]]) -> Any:
+        try:
+            return await work(flight.emit)
+        finally:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inFlight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "abandoned": self.abandoned,
+        }
+
+class FileRefs:
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._keys: Dict[str, Hashable] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, path: Optional[str], key: Optional[Hashable] = None) -> None:
+        if not path:
+            return
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+            if key is not None:
+                self._keys[path] = key
+
+    def key_for(self, path: str) -> Optional[Hashable]:
+        with self._lock:
+            return self._keys.get(path)
+
+    def release(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        with self._lock:
+            count = self._counts.get(path, 0) - 1
+            if count > 0:
+                self._counts[path] = count
+                return
+            self._counts.pop(path, None)
+            self._keys.pop(path, None)
+        try:
+            if os.path.exists(path):
+                os.unlink(path)
+                logger.info(f"Deleted input file: {path}")
+        except Exception as e:
+            logger.error(f"Failed to delete input file {path}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._counts),
+                "references": sum(self._counts.values()),
+            }
@@ -0,0 +1,109 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    List,
+    Optional
+)
+
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "0"))
+DEFAULT_BUDGET_SECONDS = REQUEST_BUDGET_SECONDS if REQUEST_BUDGET_SECONDS > 0 else math.inf
+MAX_REQUEST_BUDGET_SECONDS = float(os.getenv("MAX_REQUEST_BUDGET_SECONDS", "600"))
+BUDGET_HEADER = "x-request-budget-ms"
+
+class Deadline:
+    def __init__(self, budget_seconds: float = DEFAULT_BUDGET_SECONDS):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+        self._cuts: List[Dict[str, Any]] = []
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: Optional[float] = None, reserve: float = 0.0) -> float:
+        available = max(0.0, self.remaining() - reserve)
+        return available if default is None else min(default, available)
+
+    def cut(self, stage: str, reason: str) -> None:
+        with self._lock:
+            if any(entry["stage"] == stage for entry in self._cuts):
+                return
+            self._cuts.append({
+                "stage": stage,
+                "reason": reason,
+                "atMs": int(self.elapsed() * 1000)
+            })
+
+    def cut_stages(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._cuts)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._timings[stage] = self._timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, stage: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - started)
+
+    def timings(self) -> Dict[str, float]:
+        with self._lock:
+            timings = {stage: round(seconds * 1000, 1) for stage, seconds in self._timings.items()}
+        timings["total"] = round(self.elapsed() * 1000, 1)
+        return timings
+
+def deadline_from_request(headers: Any, budget_ms: Optional[int] = None) -> Deadline:
+    if budget_ms is None:
+        header_value = headers.get(BUDGET_HEADER) if headers is not None else None
+        if header_value:
+            try:
+                budget_ms = int(header_value)
+            except ValueError:
+                budget_ms = None
+    if budget_ms is None or budget_ms <= 0:
+        return Deadline(DEFAULT_BUDGET_SECONDS)
+    return Deadline(min(budget_ms / 1000.0, MAX_REQUEST_BUDGET_SECONDS))
+
+class StageCut(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' cut to stay within the time budget")
+        self.stage = stage
+
+async def within_deadline(
+    awaitable: Awaitable[Any],
+    deadline: Deadline,
+    stage: str,
+    reserve: float = 0.0,
+    minimum: float = 0.5
+) -> Any:
+    timeout = deadline.timeout(reserve=reserve)
+    if timeout < minimum:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        deadline.cut(stage, "Skipped because the time budget was exhausted")
+        raise StageCut(stage)
+    try:
+        with deadline.timed(stage):
+            return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        deadline.cut(stage, f"Stopped after {timeout:.1f}s to stay within the time budget")
+        raise StageCut(stage)
@@ -0,0 +1,114 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "")
+EMBEDDING_STORE_MAX_AGE_SECONDS = float(os.getenv("EMBEDDING_STORE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+EMBEDDING_STORE_MAX_SERIES = int(os.getenv("EMBEDDING_STORE_MAX_SERIES", "0"))
+SERIES_SUFFIXES = (".json", ".frames.npy", ".embeddings.npy")
+EMBEDDING_DIM = 512
+FRAME_FIELDS = ("frame_index", "weight", "reused", "similarity", "x1", "y1", "x2", "y2")
+SERIES_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def new_series_id() -> str:
+    return uuid.uuid4().hex
+
+def series_prefix(series_id: str, directory: Optional[str] = None) -> str:
+    if not SERIES_ID_PATTERN.match(series_id):
+        raise ValueError(f"Invalid series ID: {series_id}")
+    return os.path.join(directory or EMBEDDING_STORE_DIR, series_id)
+
+class SeriesRecorder:
+    def __init__(self):
+        self.frames: List[Tuple[float, ...]] = []
+        self.embeddings: List[Optional[np.ndarray]] = []
+
+    def record(
+        self,
+        frame_index: int,
+        weight: float,
+        reused: bool,
+        similarity: Optional[float] = None,
+        box=None,
+        embedding: Optional[np.ndarray] = None
+    ) -> None:
+        x1, y1, x2, y2 = (float(v) for v in box) if box is not None else (np.nan,) * 4
+        self.frames.append((frame_index, weight, 1.0 if reused else 0.0, np.nan if similarity is None else similarity, x1, y1, x2, y2))
+        self.embeddings.append(embedding)
+
+    def save(self, prefix: str, metadata: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        dim = next((len(e) for e in self.embeddings if e is not None), EMBEDDING_DIM)
+        frames = np.lib.format.open_memmap(f"{prefix}.frames.npy", mode="w+", dtype=np.float32, shape=(len(self.frames), len(FRAME_FIELDS)))
+        if self.frames:
+            frames[:] = np.array(self.frames, dtype=np.float32)
+        frames.flush()
+        embeddings = np.lib.format.open_memmap(f"{prefix}.embeddings.npy", mode="w+", dtype=np.float16, shape=(len(self.embeddings), dim))
+        for row, embedding in enumerate(self.embeddings):
+            if embedding is not None:
+                embeddings[row] = embedding
+        embeddings.flush()
+        del frames, embeddings
+        with open(f"{prefix}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({**metadata, "fields": list(FRAME_FIELDS), "rows": len(self.frames)}, f)
+        os.replace(f"{prefix}.json.tmp", f"{prefix}.json")
+
+def load_series(series_id: str, directory: Optional[str] = None):
+    prefix = series_prefix(series_id, directory)
+    with open(f"{prefix}.json", "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    frames = np.load(f"{prefix}.frames.npy", mmap_mode="r")
+    embeddings = np.load(f"{prefix}.embeddings.npy", mmap_mode="r")
+    return metadata, frames, embeddings
+
+def list_series(directory: Optional[str] = None) -> List[str]:
+    directory = directory or EMBEDDING_STORE_DIR
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+
+def delete_series(series_id: str, directory: Optional[str] = None) -> None:
+    prefix = series_prefix(series_id, directory)
+    for suffix in SERIES_SUFFIXES:
+        try:
+            os.unlink(f"{prefix}{suffix}")
+        except FileNotFoundError:
+            pass
+
+def prune_series(
+    directory: Optional[str] = None,
+    max_age_seconds: float = EMBEDDING_STORE_MAX_AGE_SECONDS,
+    max_series: int = EMBEDDING_STORE_MAX_SERIES
+) -> int:
+    directory = directory or EMBEDDING_STORE_DIR
+    saved = []
+    for series_id in list_series(directory):
+        try:
+            saved.append((os.path.getmtime(f"{series_prefix(series_id, directory)}.json"), series_id))
+        except (OSError, ValueError):
+            continue
+    saved.sort(reverse=True)
+    now = time.time()
+    expired = [
+        series_id for rank, (saved_at, series_id) in enumerate(saved)
+        if (max_age_seconds > 0 and now - saved_at > max_age_seconds) or (max_series > 0 and rank >= max_series)
+    ]
+    for series_id in expired:
+        try:
+            delete_series(series_id, directory)
+        except OSError as e:
+            logger.error(f"Failed to delete series {series_id}: {str(e)}")
+    return len(expired)
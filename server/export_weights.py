@@ -0,0 +1,29 @@
+import sys
+import argparse
+from typing import (
+    List,
+    Optional
+)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Save the vggface2 FaceNet weights to a local file for offline loading via FACENET_WEIGHTS_PATH.")
+    parser.add_argument("output", help="Weights file to write, .safetensors (requires safetensors) or .pt")
+    args = parser.parse_args(argv)
+
+    import torch
+    from facenet_pytorch import InceptionResnetV1
+    state = InceptionResnetV1(pretrained = "vggface2").eval().state_dict()
+    state = {key: value.contiguous() for key, value in state.items() if not key.startswith("logits.")}
+    if args.output.endswith(".safetensors"):
+        try:
+            from safetensors.torch import save_file
+        except ImportError:
+            raise SystemExit("Writing .safetensors requires safetensors: pip install safetensors")
+        save_file(state, args.output)
+    else:
+        torch.save(state, args.output)
+    print(f"Wrote {len(state)} tensors to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
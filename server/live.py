@@ -0,0 +1,284 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import tempfile
+import threading
+from collections import deque
+from urllib.parse import (
+    urljoin,
+    urlsplit
+)
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+import cv2
+from model import (
+    ADAPTIVE_SAMPLING,
+    AdaptiveSampler,
+    FrameAnalyzer
+)
+
+logger = logging.getLogger(__name__)
+
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "4"))
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "30"))
+LIVE_IDLE_TIMEOUT_SECONDS = float(os.getenv("LIVE_IDLE_TIMEOUT_SECONDS", "60"))
+LIVE_ALLOW_LOCAL_FILES = os.getenv("LIVE_ALLOW_LOCAL_FILES", "0") == "1"
+LAG_SPEEDUP_RATIO = 0.9
+LAG_SLOWDOWN_RATIO = 0.4
+
+def read_resource(url: str) -> bytes:
+    scheme = urlsplit(url).scheme
+    if scheme in ("http", "https"):
+        from web.utils.clients import get_http_client
+        response = get_http_client().get(url)
+        response.raise_for_status()
+        return response.content
+    if not LIVE_ALLOW_LOCAL_FILES:
+        raise ValueError(f"Unsupported playlist or segment URL: {url}")
+    path = url[len("file://"):] if scheme == "file" else url
+    with open(path, "rb") as f:
+        return f.read()
+
+def parse_playlist(text: str, base_url: str) -> Dict[str, Any]:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise ValueError("Not an HLS playlist")
+    variants: List[Tuple[int, str]] = []
+    segments: List[Tuple[int, str, float]] = []
+    media_sequence = 0
+    target_duration = 6.0
+    ended = False
+    duration = None
+    bandwidth = None
+    for line in lines[1:]:
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            attributes = dict(
+                part.split("=", 1) for part in line.split(":", 1)[1].split(",") if "=" in part
+            )
+            bandwidth = int(attributes.get("BANDWIDTH", "0") or 0)
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            media_sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            target_duration = float(line.split(":", 1)[1])
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",")[0])
+        elif line.startswith("#EXT-X-ENDLIST"):
+            ended = True
+        elif not line.startswith("#"):
+            uri = urljoin(base_url, line)
+            if bandwidth is not None:
+                variants.append((bandwidth, uri))
+                bandwidth = None
+            else:
+                segments.append((media_sequence + len(segments), uri, duration or target_duration))
+                duration = None
+    return {
+        "variants": sorted(variants),
+        "segments": segments,
+        "targetDuration": target_duration,
+        "ended": ended,
+    }
+
+class LiveSession(threading.Thread):
+    def __init__(self, playlist_url: str, window_seconds: float = LIVE_WINDOW_SECONDS):
+        super().__init__(daemon=True)
+        self.session_id = str(uuid.uuid4())
+        self.playlist_url = playlist_url
+        self.window_seconds = window_seconds
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.analyzer: Optional[FrameAnalyzer] = None
+        self.sampler: Optional[AdaptiveSampler] = None
+        self.window: Deque[Tuple[float, bool]] = deque()
+        self.stream_time = 0.0
+        self.segments_processed = 0
+        self.last_sequence = -1
+        self.stride: Optional[int] = None
+        self.base_stride: Optional[int] = None
+        self.realtime_factor = 0.0
+        self.last_event: Optional[Dict[str, Any]] = None
+        self.created = time.time()
+        self.on_finish: Optional[Callable[[], None]] = None
+        self._stop_event = threading.Event()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def active(self) -> bool:
+        return self.status in ("starting", "running")
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        self.last_event = event
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def window_score(self) -> int:
+        with self._lock:
+            window = list(self.window)
+        if not window:
+            return 0
+        flagged = sum(1 for _, is_flagged in window if is_flagged)
+        percentage = flagged / len(window) * 100
+        streak = self.analyzer.deepfake_count / self.analyzer.threshold_frames_for_deepfake if self.analyzer else 0
+        return max(0, min(100, int(percentage + min(percentage * streak, 100) * 0.3)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sessionId": self.session_id,
+            "playlistUrl": self.playlist_url,
+            "status": self.status,
+            "error": self.error,
+            "windowSeconds": self.window_seconds,
+            "windowScore": self.window_score(),
+            "overallScore": self.analyzer.score() if self.analyzer else 0,
+            "streamTime": round(self.stream_time, 2),
+            "segmentsProcessed": self.segments_processed,
+            "processedFrames": self.analyzer.total_processed_frames if self.analyzer else 0,
+            "stride": self.stride,
+            "reusedFrames": self.sampler.reused if self.sampler else 0,
+            "sceneCuts": self.sampler.scene_cuts if self.sampler else 0,
+            "realtimeFactor": round(self.realtime_factor, 3),
+        }
+
+    def _analyze_segment(self, uri: str, data: bytes, duration: float) -> None:
+        suffix = os.path.splitext(urlsplit(uri).path)[1] or ".ts"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(data)
+            segment_path = f.name
+        started = time.time()
+        try:
+            cap = cv2.VideoCapture(segment_path)
+            if not cap.isOpened():
+                raise RuntimeError("OpenCV couldn't open the segment")
+            fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25
+            if self.analyzer is None:
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                self.analyzer = FrameAnalyzer(width, height, fps)
+                self.base_stride = max(1, int(fps / 7))
+                self.stride = self.base_stride
+                if ADAPTIVE_SAMPLING:
+                    self.sampler = AdaptiveSampler(fps, self.base_stride)
+            segment_start = self.stream_time
+            frame_index = 0
+            while cap.grab():
+                flagged = None
+                if self.sampler is not None:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        action, weight, scene_cut = self.sampler.decide(frame, self.analyzer.frame_count)
+                        if scene_cut:
+                            self.analyzer.reset_reference()
+                        if action == "infer":
+                            flagged = self.analyzer.analyze(frame, self.analyzer.frame_count, weight)
+                        elif action == "reuse":
+                            flagged = self.analyzer.reuse(frame, self.analyzer.frame_count, weight)
+                elif frame_index % self.stride == 0:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        flagged = self.analyzer.analyze(frame, self.analyzer.frame_count)
+                if flagged is not None:
+                    with self._lock:
+                        self.window.append((segment_start + frame_index / fps, flagged))
+                frame_index += 1
+                self.analyzer.frame_count += 1
+            cap.release()
+        finally:
+            os.unlink(segment_path)
+        self.stream_time += duration
+        with self._lock:
+            while self.window and self.window[0][0] < self.stream_time - self.window_seconds:
+                self.window.popleft()
+        elapsed = time.time() - started
+        self.realtime_factor = elapsed / duration if duration > 0 else 0.0
+        if self.realtime_factor > LAG_SPEEDUP_RATIO:
+            self.stride = min(self.stride * 2, fps * 2)
+        elif self.realtime_factor < LAG_SLOWDOWN_RATIO and self.stride > self.base_stride:
+            self.stride = max(self.base_stride, self.stride // 2)
+        if self.sampler is not None:
+            self.sampler.base_stride = self.stride
+
+    def run(self) -> None:
+        self.status = "running"
+        playlist_url = self.playlist_url
+        idle_since = time.time()
+        try:
+            while not self._stop_event.is_set():
+                playlist = parse_playlist(read_resource(playlist_url).decode("utf-8", "replace"), playlist_url)
+                if playlist["variants"]:
+                    playlist_url = playlist["variants"][0][1]
+                    continue
+                new_segments = [segment for segment in playlist["segments"] if segment[0] > self.last_sequence]
+                for sequence, uri, duration in new_segments:
+                    if self._stop_event.is_set():
+                        break
+                    self._analyze_segment(uri, read_resource(uri), duration)
+                    self.last_sequence = sequence
+                    self.segments_processed += 1
+                    self._publish({"type": "score", "segment": sequence, **self.snapshot()})
+                if new_segments:
+                    idle_since = time.time()
+                if playlist["ended"] and self.last_sequence >= (playlist["segments"][-1][0] if playlist["segments"] else -1):
+                    self.status = "ended"
+                    break
+                if time.time() - idle_since > LIVE_IDLE_TIMEOUT_SECONDS:
+                    self.status = "stalled"
+                    break
+                self._stop_event.wait(max(0.5, playlist["targetDuration"] / 2))
+            else:
+                self.status = "stopped"
+        except Exception as e:
+            logger.error(f"Live session {self.session_id} failed: {str(e)}")
+            self.status = "failed"
+            self.error = str(e)
+        try:
+            self._publish({"type": "end", **self.snapshot()})
+        finally:
+            if self.on_finish is not None:
+                self.on_finish()
+
+live_sessions: Dict[str, LiveSession] = {}
+
+def start_live_session(
+    playlist_url: str,
+    window_seconds: float = LIVE_WINDOW_SECONDS,
+    launch: Optional[Callable[[LiveSession], None]] = None
+) -> Optional[LiveSession]:
+    active = [session for session in live_sessions.values() if session.active()]
+    if len(active) >= LIVE_MAX_SESSIONS:
+        return None
+    for session_id in [session_id for session_id, session in live_sessions.items() if not session.active() and time.time() - session.created > 3600]:
+        del live_sessions[session_id]
+    session = LiveSession(playlist_url, window_seconds)
+    (launch or LiveSession.start)(session)
+    live_sessions[session.session_id] = session
+    return session
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import struct
+import subprocess
+from typing import (
+    List,
+    Optional
+)
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm")
+
+def option_value(args: List[str], name: str) -> Optional[str]:
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+def pick_video() -> str:
+    directory = os.environ.get("FAKE_YTDLP_VIDEO_DIR", "")
+    videos = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory or ".")
+        if name.lower().endswith(VIDEO_EXTENSIONS)
+    ) if directory else []
+    if not videos:
+        raise SystemExit("ERROR: FAKE_YTDLP_VIDEO_DIR has no test videos")
+    return random.choice(videos)
+
+def write_tone(path: str, seconds: float = 8.0, sample_rate: int = 16000) -> None:
+    wav_path = path if path.endswith(".wav") or not shutil.which("ffmpeg") else f"{path}.tmp.wav"
+    with wave.open(wav_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate) * (0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / sample_rate))))
+            for i in range(int(seconds * sample_rate))
+        ))
+    if wav_path != path:
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", wav_path, path], check=True)
+        os.unlink(wav_path)
+
+def log_call(mode: str, started: float, ok: bool) -> None:
+    log_path = os.environ.get("FAKE_YTDLP_LOG")
+    if not log_path:
+        return
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"mode": mode, "seconds": round(time.time() - started, 4), "ok": ok}) + "\n")
+
+def main(args: List[str]) -> int:
+    started = time.time()
+    mode = "info" if "--dump-json" in args else "audio" if "-x" in args else "video"
+    latency_ms = float(os.environ.get("FAKE_YTDLP_LATENCY_MS", "500"))
+    time.sleep(max(0.0, random.gauss(latency_ms, latency_ms * 0.2)) / 1000)
+    if random.random() < float(os.environ.get("FAKE_YTDLP_ERROR_RATE", "0")):
+        log_call(mode, started, False)
+        print("ERROR: [stub] Injected download failure", file=sys.stderr)
+        return 1
+    if mode == "info":
+        print(json.dumps({"id": "stub", "formats": [
+            {"format_id": "18", "height": 360, "vcodec": "avc1", "ext": "mp4"},
+            {"format_id": "22", "height": 720, "vcodec": "avc1", "ext": "mp4"},
+        ]}))
+    else:
+        output_path = option_value(args, "-o")
+        if not output_path:
+            print("ERROR: [stub] Missing -o", file=sys.stderr)
+            return 2
+        if mode == "audio":
+            write_tone(output_path)
+        else:
+            shutil.copyfile(pick_video(), output_path)
+        print(f"[download] Destination: {output_path}")
+    log_call(mode, started, True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
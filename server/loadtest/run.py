@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import time
+import random
+import string
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional
+)
+import httpx
+from loadtest.stubs import (
+    DEFAULT_LATENCY_MS,
+    SERVICES,
+    ServiceBehavior,
+    StubServer,
+    free_port
+)
+
+SERVER_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_YTDLP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ytdlp.py")
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+def latency_summary(seconds: List[float]) -> Dict[str, Any]:
+    to_ms = lambda value: round(value * 1000, 1) if value is not None else None
+    return {
+        "p50Ms": to_ms(percentile(seconds, 0.50)),
+        "p95Ms": to_ms(percentile(seconds, 0.95)),
+        "p99Ms": to_ms(percentile(seconds, 0.99)),
+        "meanMs": to_ms(sum(seconds) / len(seconds)) if seconds else None,
+        "maxMs": to_ms(max(seconds)) if seconds else None,
+    }
+
+def fake_video_url() -> str:
+    return "https://www.youtube.com/watch?v=" + "".join(random.choices(string.ascii_letters + string.digits, k=11))
+
+class Recorder:
+    def __init__(self):
+        self.endpoints: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.scenarios: List[float] = []
+        self.scenarios_failed = 0
+        self.cut_stages: Dict[str, int] = {}
+        self.server_timings: Dict[str, List[float]] = {}
+
+    def record(self, endpoint: str, seconds: float, outcome: str) -> None:
+        self.endpoints.setdefault(endpoint, [])
+        if outcome == "200":
+            self.endpoints[endpoint].append(seconds)
+        statuses = self.statuses.setdefault(endpoint, {})
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    def endpoint_report(self, wall_seconds: float) -> Dict[str, Any]:
+        report = {}
+        for endpoint, statuses in self.statuses.items():
+            requests = sum(statuses.values())
+            errors = requests - statuses.get("200", 0)
+            report[endpoint] = {
+                "requests": requests,
+                "errors": errors,
+                "errorRate": round(errors / requests, 4) if requests else 0.0,
+                "throughputPerSecond": round(statuses.get("200", 0) / wall_seconds, 3) if wall_seconds > 0 else None,
+                "statuses": statuses,
+                **latency_summary(self.endpoints.get(endpoint, [])),
+            }
+        return report
+
+async def timed(recorder: Recorder, endpoint: str, request: Awaitable[httpx.Response]) -> Optional[Dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, time.perf_counter() - started, type(e).__name__)
+        return None
+    recorder.record(endpoint, time.perf_counter() - started, str(response.status_code))
+    if response.status_code != 200:
+        return None
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    for cut in data.get("cutStages") or []:
+        recorder.cut_stages[cut.get("stage", "unknown")] = recorder.cut_stages.get(cut.get("stage", "unknown"), 0) + 1
+    for stage, ms in (data.get("timings") or {}).items():
+        recorder.server_timings.setdefault(f"{endpoint}:{stage}", []).append(ms / 1000)
+    return data
+
+async def pipeline_scenario(client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    downloaded = await timed(recorder, "download-combined", client.get("/download-combined", params={"video_url": fake_video_url()}))
+    if not downloaded:
+        return False
+    analyzed = await timed(recorder, "analyze-combined", client.post("/analyze-combined", json={
+        "videoPath": downloaded["videoPath"],
+        "audioPath": downloaded.get("audioPath"),
+    }))
+    return analyzed is not None
+
+async def video_scenario(client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    downloaded = await timed(recorder, "download-video", client.get("/download-video", params={"video_url": fake_video_url()}))
+    if not downloaded:
+        return False
+    return await timed(recorder, "analyze-video", client.post("/analyze-video", json={"videoPath": downloaded["videoPath"]})) is not None
+
+async def audio_scenario(client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    downloaded = await timed(recorder, "download-audio", client.get("/download-audio", params={"video_url": fake_video_url()}))
+    if not downloaded:
+        return False
+    return await timed(recorder, "analyze-audio", client.post("/analyze-audio", json={"audioPath": downloaded["audioPath"]})) is not None
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, Recorder], Awaitable[bool]]] = {
+    "pipeline": pipeline_scenario,
+    "video": video_scenario,
+    "audio": audio_scenario,
+}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+async def drive(
+    base_url: str,
+    mix: Dict[str, float],
+    concurrency: int,
+    rate: Optional[float],
+    duration: float,
+    max_scenarios: Optional[int],
+    timeout: float
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    stop_at = time.time() + duration
+    started_count = 0
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+    def more() -> bool:
+        return time.time() < stop_at and (max_scenarios is None or started_count < max_scenarios)
+
+    async def one(client: httpx.AsyncClient, arrived: float) -> None:
+        ok = await SCENARIOS[random.choices(names, weights)[0]](client, recorder)
+        if ok:
+            recorder.scenarios.append(time.time() - arrived)
+        else:
+            recorder.scenarios_failed += 1
+
+    started = time.time()
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        if rate:
+            semaphore = asyncio.Semaphore(concurrency)
+            tasks = []
+
+            async def admitted(arrived: float) -> None:
+                async with semaphore:
+                    await one(client, arrived)
+
+            while more():
+                started_count += 1
+                tasks.append(asyncio.create_task(admitted(time.time())))
+                await asyncio.sleep(random.expovariate(rate))
+            await asyncio.gather(*tasks)
+        else:
+            async def worker() -> None:
+                nonlocal started_count
+                while more():
+                    started_count += 1
+                    await one(client, time.time())
+
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+        try:
+            queue_stats = (await client.get("/queue-stats")).json()
+        except (httpx.HTTPError, ValueError):
+            queue_stats = None
+    wall_seconds = time.time() - started
+    return {
+        "wallSeconds": round(wall_seconds, 2),
+        "scenarios": {
+            "started": started_count,
+            "completed": len(recorder.scenarios),
+            "failed": recorder.scenarios_failed,
+            "errorRate": round(recorder.scenarios_failed / started_count, 4) if started_count else 0.0,
+            "throughputPerSecond": round(len(recorder.scenarios) / wall_seconds, 3) if wall_seconds > 0 else None,
+            **latency_summary(recorder.scenarios),
+        },
+        "endpoints": recorder.endpoint_report(wall_seconds),
+        "cutStages": recorder.cut_stages,
+        "serverTimings": {name: {"count": len(seconds), **latency_summary(seconds)} for name, seconds in sorted(recorder.server_timings.items())},
+        "serverQueues": queue_stats,
+    }
+
+def stage_report(stubs: StubServer, ytdlp_log: Optional[str]) -> Dict[str, Any]:
+    stages = {}
+    for service in SERVICES:
+        statuses = stubs.stats.statuses[service]
+        calls = sum(statuses.values())
+        stages[service] = {
+            "calls": calls,
+            "injectedErrors": calls - statuses.get(200, 0),
+            "statuses": {str(code): count for code, count in statuses.items()},
+            **latency_summary(stubs.stats.latencies[service]),
+        }
+    calls: Dict[str, List[Dict[str, Any]]] = {}
+    if ytdlp_log and os.path.exists(ytdlp_log):
+        with open(ytdlp_log, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                calls.setdefault(f"yt-dlp:{entry['mode']}", []).append(entry)
+    for stage, entries in calls.items():
+        stages[stage] = {
+            "calls": len(entries),
+            "injectedErrors": sum(1 for entry in entries if not entry["ok"]),
+            **latency_summary([entry["seconds"] for entry in entries]),
+        }
+    return stages
+
+def generate_test_videos(directory: str, count: int = 3, seconds: int = 6) -> None:
+    import cv2
+    import numpy as np
+    for index in range(count):
+        writer = cv2.VideoWriter(os.path.join(directory, f"synthetic_{index}.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 30, (320, 240))
+        for frame_index in range(seconds * 30):
+            frame = np.full((240, 320, 3), 40 + index * 60, dtype=np.uint8)
+            cv2.circle(frame, (60 + (frame_index * 3) % 200, 120), 30, (0, 200, 255), -1)
+            writer.write(frame)
+        writer.release()
+
+def start_server(args: argparse.Namespace, port: int, stub_url: str, video_dir: str, ytdlp_log: str, log_file) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        SERVER_HOST="127.0.0.1",
+        SERVER_PORT=str(port),
+        TAVILY_API_KEY="loadtest",
+        GROQ_API_KEY="loadtest",
+        GEMINI_API_KEY="loadtest",
+        TAVILY_SEARCH_URL=f"{stub_url}/search",
+        GROQ_BASE_URL=stub_url,
+        GEMINI_API_ENDPOINT=stub_url,
+        YTDLP_PATH=FAKE_YTDLP_PATH,
+        FAKE_YTDLP_VIDEO_DIR=video_dir,
+        FAKE_YTDLP_LATENCY_MS=str(args.ytdlp_latency_ms),
+        FAKE_YTDLP_ERROR_RATE=str(args.ytdlp_error_rate),
+        FAKE_YTDLP_LOG=ytdlp_log,
+    )
+    if not args.with_caches:
+        env.update(VIDEO_INDEX_MAX_ENTRIES="0", TRANSCRIPT_CACHE_MAX_ENTRIES="0", SEARCH_CACHE_MAX_ENTRIES="0")
+    for setting in args.server_env:
+        key, _, value = setting.partition("=")
+        env[key] = value
+    return subprocess.Popen([sys.executable, "server.py"], cwd=SERVER_DIRECTORY, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+def wait_ready(base_url: str, server: Optional[subprocess.Popen], timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"Server exited during startup with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Server at {base_url} was not ready within {timeout} seconds")
+
+def print_report(report: Dict[str, Any]) -> None:
+    scenarios = report["scenarios"]
+    print(f"\nScenarios: {scenarios['completed']} completed, {scenarios['failed']} failed in {report['wallSeconds']}s "
+          f"({scenarios['throughputPerSecond']}/s), p50 {scenarios['p50Ms']} ms, p95 {scenarios['p95Ms']} ms, p99 {scenarios['p99Ms']} ms")
+    print(f"\n{'endpoint / stage':<24}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in list(report["endpoints"].items()) + list(report["stages"].items()):
+        count = stats.get("requests", stats.get("calls"))
+        errors = stats.get("errors", stats.get("injectedErrors"))
+        print(f"{name:<24}{count:>8}{errors:>8}{str(stats['p50Ms']):>10}{str(stats['p95Ms']):>10}{str(stats['p99Ms']):>10}")
+    if report["serverTimings"]:
+        print(f"\n{'server-reported stage':<40}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, stats in report["serverTimings"].items():
+            print(f"{name:<40}{stats['count']:>8}{str(stats['p50Ms']):>10}{str(stats['p95Ms']):>10}{str(stats['p99Ms']):>10}")
+    if report["cutStages"]:
+        print(f"\nCut stages: {json.dumps(report['cutStages'])}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the server offline against local stand-ins for Tavily, Groq, Gemini and yt-dlp.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("pipeline"), help="Weighted scenarios, e.g. pipeline=3,video=1,audio=1 (default: pipeline)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Scenarios in flight at once (default: 4)")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop Poisson arrival rate in scenarios per second; omit for closed-loop")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to keep starting scenarios (default: 60)")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after starting this many scenarios")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request client timeout in seconds (default: 300)")
+    parser.add_argument("--videos", default=None, help="Directory of test videos for the fake downloader (default: generate synthetic clips)")
+    parser.add_argument("--target", default=None, help="Drive an already running server at this URL instead of starting one")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the started server, e.g. VIDEO_WORKERS=2")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the transcript, search and near-duplicate caches enabled")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of stub latencies (default: 0.3)")
+    for service in SERVICES:
+        parser.add_argument(f"--{service}-latency-ms", type=float, default=DEFAULT_LATENCY_MS[service], help=f"Median {service} stub latency (default: {DEFAULT_LATENCY_MS[service]})")
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help=f"Fraction of {service} calls answered with a 5xx")
+        parser.add_argument(f"--{service}-rate-limit-rate", type=float, default=0.0, help=f"Fraction of {service} calls answered with a 429")
+    parser.add_argument("--ytdlp-latency-ms", type=float, default=500, help="Mean fake yt-dlp latency (default: 500)")
+    parser.add_argument("--ytdlp-error-rate", type=float, default=0.0, help="Fraction of fake yt-dlp runs that fail")
+    parser.add_argument("--report", default=None, help="Write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    behaviors = {
+        service: ServiceBehavior(
+            getattr(args, f"{service}_latency_ms"),
+            args.jitter,
+            getattr(args, f"{service}_error_rate"),
+            getattr(args, f"{service}_rate_limit_rate")
+        )
+        for service in SERVICES
+    }
+    stubs = StubServer(behaviors)
+    stubs.start()
+    stubs.wait_started()
+    work_dir = tempfile.mkdtemp(prefix="loadtest_")
+    video_dir = args.videos
+    if not video_dir:
+        video_dir = os.path.join(work_dir, "videos")
+        os.makedirs(video_dir)
+        generate_test_videos(video_dir)
+    ytdlp_log = os.path.join(work_dir, "fake_ytdlp.jsonl")
+    server = None
+    log_path = os.path.join(work_dir, "server.log")
+    if args.target:
+        base_url = args.target.rstrip("/")
+        print(f"Stubs listening at {stubs.base_url}; the target server should run with TAVILY_SEARCH_URL={stubs.base_url}/search "
+              f"GROQ_BASE_URL={stubs.base_url} GEMINI_API_ENDPOINT={stubs.base_url} YTDLP_PATH={FAKE_YTDLP_PATH} FAKE_YTDLP_VIDEO_DIR={video_dir}")
+    else:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        log_file = open(log_path, "w")
+        server = start_server(args, port, stubs.base_url, video_dir, ytdlp_log, log_file)
+        print(f"Started server at {base_url} (log: {log_path})")
+    try:
+        wait_ready(base_url, server, 180)
+        report = asyncio.run(drive(base_url, args.mix, args.concurrency, args.rate, args.duration, args.requests, args.timeout))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        stubs.stop()
+    report["stages"] = stage_report(stubs, ytdlp_log)
+    report["config"] = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration": args.duration,
+        "stubs": {service: vars(behavior) for service, behavior in behaviors.items()},
+        "ytdlp": {"latencyMs": args.ytdlp_latency_ms, "errorRate": args.ytdlp_error_rate},
+        "serverEnv": args.server_env,
+    }
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.report}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
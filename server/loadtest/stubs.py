@@ -0,0 +1,199 @@
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import threading
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional
+)
+import uvicorn
+from fastapi import (
+    FastAPI,
+    Request
+)
+from fastapi.responses import (
+    JSONResponse,
+    StreamingResponse
+)
+
+SERVICES = ("tavily", "groq", "gemini")
+DEFAULT_LATENCY_MS = {"tavily": 600, "groq": 900, "gemini": 1500}
+STREAM_FIRST_CHUNK_FRACTION = 0.3
+STREAM_CHUNK_CHARS = 24
+STUB_TRANSCRIPT = (
+    "Officials confirmed today that the new bridge across the river will open next month. "
+    "The project cost two hundred million dollars and took four years to build."
+)
+
+class ServiceBehavior:
+    def __init__(self, latency_ms: float, jitter: float = 0.3, error_rate: float = 0.0, rate_limit_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+    def sample_latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.jitter <= 0:
+            return self.latency_ms / 1000
+        return random.lognormvariate(math.log(self.latency_ms), self.jitter) / 1000
+
+    def sample_status(self) -> int:
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return random.choice((500, 502, 503))
+        return 200
+
+class StubStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {service: [] for service in SERVICES}
+        self.statuses: Dict[str, Dict[int, int]] = {service: {} for service in SERVICES}
+        self._lock = threading.Lock()
+
+    def record(self, service: str, seconds: float, status_code: int) -> None:
+        with self._lock:
+            self.latencies[service].append(seconds)
+            self.statuses[service][status_code] = self.statuses[service].get(status_code, 0) + 1
+
+def build_stub_app(behaviors: Dict[str, ServiceBehavior], stats: StubStats) -> FastAPI:
+    app = FastAPI()
+
+    async def respond(service: str, payload: Dict[str, Any]) -> JSONResponse:
+        behavior = behaviors[service]
+        started = time.time()
+        await asyncio.sleep(behavior.sample_latency())
+        status_code = behavior.sample_status()
+        stats.record(service, time.time() - started, status_code)
+        if status_code == 429:
+            return JSONResponse(status_code=429, content={"error": {"message": "Rate limit reached"}}, headers={"Retry-After": "1"})
+        if status_code != 200:
+            return JSONResponse(status_code=status_code, content={"error": {"message": "Injected upstream failure"}})
+        return JSONResponse(content=payload)
+
+    async def respond_stream(service: str, text: str, usage: Dict[str, int]):
+        behavior = behaviors[service]
+        started = time.time()
+        latency = behavior.sample_latency()
+        await asyncio.sleep(latency * STREAM_FIRST_CHUNK_FRACTION)
+        status_code = behavior.sample_status()
+        if status_code != 200:
+            stats.record(service, time.time() - started, status_code)
+            if status_code == 429:
+                return JSONResponse(status_code=429, content={"error": {"message": "Rate limit reached"}}, headers={"Retry-After": "1"})
+            return JSONResponse(status_code=status_code, content={"error": {"message": "Injected upstream failure"}})
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+
+        async def chunks():
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(latency * (1 - STREAM_FIRST_CHUNK_FRACTION) / max(1, len(pieces) - 1))
+                chunk = {"candidates": [{"content": {"parts": [{"text": piece}], "role": "model"}, "index": 0}]}
+                if i == len(pieces) - 1:
+                    chunk["candidates"][0]["finishReason"] = "STOP"
+                    chunk["usageMetadata"] = usage
+                yield ("[" if i == 0 else ",\r\n") + json.dumps(chunk)
+            yield "]"
+            stats.record(service, time.time() - started, 200)
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.post("/search")
+    async def tavily_search(request: Request):
+        body = await request.json()
+        query = body.get("query", "")
+        results = [
+            {
+                "title": f"Report {i + 1} on {query[:60]}",
+                "url": f"https://news.example.com/2025/stub-{i + 1}",
+                "content": f"Coverage confirming details of {query[:120]}.",
+                "score": round(0.9 - i * 0.1, 2),
+            }
+            for i in range(min(int(body.get("max_results", 5)), 5))
+        ]
+        return await respond("tavily", {"query": query, "results": results, "response_time": 0.1})
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def groq_transcription(request: Request):
+        await request.body()
+        return await respond("groq", {
+            "text": STUB_TRANSCRIPT,
+            "language": "en",
+            "duration": 8.0,
+            "segments": [
+                {"id": 0, "start": 0.0, "end": 4.0, "text": STUB_TRANSCRIPT.split(". ")[0] + "."},
+                {"id": 1, "start": 4.0, "end": 8.0, "text": STUB_TRANSCRIPT.split(". ")[1]},
+            ],
+        })
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini_generate(model_action: str, request: Request):
+        body = await request.json()
+        prompt = " ".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        if '"verdict"' in prompt:
+            text = json.dumps({
+                "verdict": "authentic",
+                "confidence": 82,
+                "reasoning": " ".join(f"Source: Report {i + 1} confirms the bridge opening date and its two hundred million dollar cost." for i in range(6)),
+                "sources": [
+                    {"title": f"Report {i + 1}", "url": f"https://news.example.com/2025/stub-{i + 1}", "snippet": "Coverage confirming the opening date and cost.", "score": round(0.9 - i * 0.1, 2)}
+                    for i in range(3)
+                ],
+            })
+        elif '"queries"' in prompt:
+            text = '{"queries": ["new bridge opening next month cost two hundred million"]}'
+        else:
+            text = '{"query": "new bridge opening next month cost two hundred million"}'
+        usage = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4, "totalTokenCount": (len(prompt) + len(text)) // 4}
+        if model_action.endswith(":streamGenerateContent"):
+            return await respond_stream("gemini", text, usage)
+        return await respond("gemini", {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": usage,
+        })
+
+    return app
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class StubServer(threading.Thread):
+    def __init__(self, behaviors: Dict[str, ServiceBehavior], port: Optional[int] = None):
+        super().__init__(daemon=True)
+        self.stats = StubStats()
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(build_stub_app(behaviors, self.stats), host="127.0.0.1", port=self.port, log_level="warning"))
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def run(self) -> None:
+        self.server.run()
+
+    def wait_started(self, timeout: float = 10) -> None:
+        deadline = time.time() + timeout
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Stub server failed to start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
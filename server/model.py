@@ -1,22 +1,451 @@
 import time
 import os
+import threading
 import cv2
 import numpy as np
-from facenet_pytorch import (
-    MTCNN,
-    InceptionResnetV1
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional
 )
-from torchvision.transforms import functional as F
+from video_writer import open_video_writer
+from deadline import Deadline
+from embedding_store import (
+    SeriesRecorder,
+    list_series,
+    load_series
+)
+
+FACENET_WEIGHTS_PATH = os.getenv("FACENET_WEIGHTS_PATH", "")
+
+_models = None
+_models_lock = threading.Lock()
+
+def load_facenet_weights(path: str):
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"FaceNet weights not found at {path}")
+    if path.endswith(".safetensors"):
+        from safetensors.torch import load_file
+        state = load_file(path, device="cpu")
+    else:
+        import torch
+        state = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    return {key: value for key, value in state.items() if not key.startswith("logits.")}
+
+def load_models():
+    global _models
+    with _models_lock:
+        if _models is None:
+            from facenet_pytorch import (
+                MTCNN,
+                InceptionResnetV1
+            )
+            if FACENET_WEIGHTS_PATH:
+                state = load_facenet_weights(FACENET_WEIGHTS_PATH)
+                facenet_model = InceptionResnetV1()
+                facenet_model.load_state_dict(state)
+            else:
+                facenet_model = InceptionResnetV1(pretrained = "vggface2")
+            _models = (MTCNN(), facenet_model.eval())
+        return _models
+
+def face_embedding(frame: np.ndarray) -> Optional[np.ndarray]:
+    mtcnn, facenet_model = load_models()
+    boxes, _ = mtcnn.detect(frame)
+    if boxes is None or len(boxes) == 0:
+        return None
+    height, width = frame.shape[:2]
+    x1, y1, x2, y2 = boxes[0].astype(int)
+    face = frame[max(0, y1):min(height, y2), max(0, x1):min(width, x2)]
+    if face.size == 0:
+        return None
+    from torchvision.transforms import functional as F
+    face = cv2.resize(face, FrameAnalyzer.resize_dimensions)
+    encoding = facenet_model(F.to_tensor(face).unsqueeze(0)).detach().numpy().flatten()
+    norm = np.linalg.norm(encoding)
+    return encoding / norm if norm > 0 else None
+
+def share_model_memory() -> None:
+    for module in load_models():
+        module.requires_grad_(False)
+        module.share_memory()
+
+def warm_up_models() -> float:
+    started = time.time()
+    mtcnn, facenet_model = load_models()
+    from torchvision.transforms import functional as F
+    mtcnn.detect(np.zeros((160, 160, 3), dtype=np.uint8))
+    face = np.zeros(FrameAnalyzer.resize_dimensions + (3,), dtype=np.uint8)
+    facenet_model(F.to_tensor(face).unsqueeze(0)).detach()
+    return time.time() - started
+
+ADAPTIVE_SAMPLING = os.getenv("ADAPTIVE_SAMPLING", "1") != "0"
+THUMBNAIL_SIZE = (32, 18)
+SCENE_CUT_THRESHOLD = 28.0
+STATIC_FRAME_THRESHOLD = 3.0
+
+def thumbnail(frame: np.ndarray) -> np.ndarray:
+    small = cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+def thumbnail_difference(first: np.ndarray, second: np.ndarray) -> float:
+    return float(np.mean(np.abs(first - second)))
+
+class AdaptiveSampler:
+    def __init__(self, fps: int, base_stride: int):
+        self.fps = fps
+        self.base_stride = base_stride
+        self.max_gap = max(base_stride, fps)
+        self.previous_thumbnail = None
+        self.reference_thumbnail = None
+        self.last_decision_index = None
+        self.last_inference_index = None
+        self.dense_until = -1
+        self.inferences = 0
+        self.reused = 0
+        self.scene_cuts = 0
+
+    def decide(self, frame: np.ndarray, frame_index: int):
+        current = thumbnail(frame)
+        scene_cut = self.previous_thumbnail is not None and thumbnail_difference(current, self.previous_thumbnail) > SCENE_CUT_THRESHOLD
+        self.previous_thumbnail = current
+        if scene_cut:
+            self.scene_cuts += 1
+            self.dense_until = frame_index + max(1, self.fps // 2)
+        stride = max(1, self.base_stride // 2) if frame_index <= self.dense_until else self.base_stride
+        if self.last_decision_index is not None and frame_index - self.last_decision_index < stride and not scene_cut:
+            return "skip", 0.0, False
+        weight = (frame_index - self.last_decision_index) / self.base_stride if self.last_decision_index is not None else 1.0
+        weight = min(weight, 1.0)
+        self.last_decision_index = frame_index
+        if (
+            not scene_cut
+            and self.reference_thumbnail is not None
+            and frame_index - self.last_inference_index < self.max_gap
+            and thumbnail_difference(current, self.reference_thumbnail) < STATIC_FRAME_THRESHOLD
+        ):
+            self.reused += 1
+            return "reuse", weight, False
+        self.reference_thumbnail = current
+        self.last_inference_index = frame_index
+        self.inferences += 1
+        return "infer", weight, scene_cut
+
+def weighted_score(
+    deep_fake_frame_count: float,
+    total_processed_frames: float,
+    deepfake_count: float,
+    frame_count: int,
+    fps: int,
+    threshold_frames_for_deepfake: float
+) -> int:
+    if frame_count == 0 or total_processed_frames == 0:
+        return 0
+    deepfake_percentage = (deep_fake_frame_count / total_processed_frames) * 100
+    confidence_factor = min(deepfake_percentage * (deepfake_count / threshold_frames_for_deepfake), 100)
+    if frame_count > fps * 30:
+        weighted_score = min(deepfake_percentage + confidence_factor * 0.5, 100)
+    else:
+        weighted_score = min(deepfake_percentage + confidence_factor * 0.3, 100)
+    return max(0, min(100, int(weighted_score)))
+
+class FrameAnalyzer:
+    threshold_face_similarity = 0.99
+    threshold_frames_for_deepfake = 15
+    resize_dimensions = (80, 80)
+
+    def __init__(self, width: int, height: int, fps: int):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.mtcnn, self.facenet_model = load_models()
+        from torchvision.transforms import functional as F
+        self.to_tensor = F.to_tensor
+        self.deepfake_count = 0
+        self.deep_fake_frame_count = 0
+        self.previous_face_encoding = None
+        self.total_processed_frames = 0
+        self.inferences = 0
+        self.frame_count = 0
+        self.inference_time = 0.0
+        self.detect_time = 0.0
+        self.embed_time = 0.0
+        self.last_box = None
+        self.last_flagged = None
+        self.series: Optional[SeriesRecorder] = None
+
+    def annotate(self, frame: np.ndarray, box, flagged: Optional[bool], frame_index: int) -> None:
+        if box is None or flagged is None:
+            return
+        if flagged:
+            cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), (0, 0, 255), 2)
+            cv2.putText(frame, f"AI Detected - Frame {frame_index}", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+        else:
+            cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), (0, 255, 0), 2)
+            cv2.putText(frame, "Real Frame", (box[0], box[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2,
+                        cv2.LINE_AA)
+
+    def reset_reference(self) -> None:
+        self.previous_face_encoding = None
+        self.last_box = None
+        self.last_flagged = None
+
+    def analyze(self, frame: np.ndarray, frame_index: int, weight: float = 1.0) -> Optional[bool]:
+        self.total_processed_frames += weight
+        self.inferences += 1
+        inference_start = time.time()
+        flagged = None
+        detected_box = None
+        similarity = None
+        face_box = None
+        current_face_encoding = None
+        boxes, _ = self.mtcnn.detect(frame)
+        self.detect_time += time.time() - inference_start
+        if boxes is not None and len(boxes) > 0:
+            box = boxes[0].astype(int)
+            box[0] = max(0, box[0])
+            box[1] = max(0, box[1])
+            box[2] = min(self.width, box[2])
+            box[3] = min(self.height, box[3])
+            if box[2] > box[0] and box[3] > box[1]:
+                face = frame[box[1]:box[3], box[0]:box[2]]
+                if not face.size == 0:
+                    face_box = box
+                    face = cv2.resize(face, self.resize_dimensions)
+                    embed_start = time.time()
+                    face_tensor = self.to_tensor(face).unsqueeze(0)
+                    current_face_encoding = self.facenet_model(face_tensor).detach().numpy().flatten()
+                    self.embed_time += time.time() - embed_start
+                    if self.previous_face_encoding is not None:
+                        face_similarity = np.dot(current_face_encoding, self.previous_face_encoding) / (np.linalg.norm(current_face_encoding) * np.linalg.norm(self.previous_face_encoding))
+                        similarity = float(face_similarity)
+                        if face_similarity < self.threshold_face_similarity:
+                            self.deepfake_count += weight
+                        else:
+                            self.deepfake_count = 0
+                        flagged = self.deepfake_count > self.threshold_frames_for_deepfake
+                        if flagged:
+                            self.deep_fake_frame_count += weight
+                        detected_box = box
+                        self.annotate(frame, box, flagged, frame_index)
+                    self.previous_face_encoding = current_face_encoding
+        self.last_box = detected_box
+        self.last_flagged = flagged
+        self.inference_time += time.time() - inference_start
+        if self.series is not None:
+            self.series.record(frame_index, weight, False, similarity, face_box, current_face_encoding)
+        return flagged
+
+    def reuse(self, frame: np.ndarray, frame_index: int, weight: float = 1.0) -> Optional[bool]:
+        self.total_processed_frames += weight
+        if self.last_flagged:
+            self.deep_fake_frame_count += weight
+        if self.series is not None:
+            self.series.record(frame_index, weight, True)
+        self.annotate(frame, self.last_box, self.last_flagged, frame_index)
+        return self.last_flagged
+
+    def score(self) -> int:
+        return weighted_score(
+            self.deep_fake_frame_count,
+            self.total_processed_frames,
+            self.deepfake_count,
+            self.frame_count,
+            self.fps,
+            self.threshold_frames_for_deepfake
+        )
+
+def rescore(
+    frames: np.ndarray,
+    frame_count: int,
+    fps: int,
+    threshold_face_similarity: float = FrameAnalyzer.threshold_face_similarity,
+    threshold_frames_for_deepfake: float = FrameAnalyzer.threshold_frames_for_deepfake
+) -> int:
+    deepfake_count = 0.0
+    deep_fake_frame_count = 0.0
+    total_processed_frames = 0.0
+    last_flagged = None
+    for _, weight, reused, similarity in np.asarray(frames[:, :4], dtype=np.float64):
+        total_processed_frames += weight
+        if reused:
+            if last_flagged:
+                deep_fake_frame_count += weight
+            continue
+        if np.isnan(similarity):
+            last_flagged = None
+            continue
+        if similarity < threshold_face_similarity:
+            deepfake_count += weight
+        else:
+            deepfake_count = 0
+        last_flagged = deepfake_count > threshold_frames_for_deepfake
+        if last_flagged:
+            deep_fake_frame_count += weight
+    return weighted_score(deep_fake_frame_count, total_processed_frames, deepfake_count, frame_count, fps, threshold_frames_for_deepfake)
+
+def rescore_corpus(
+    series_ids: Optional[List[str]] = None,
+    threshold_face_similarity: float = FrameAnalyzer.threshold_face_similarity,
+    threshold_frames_for_deepfake: float = FrameAnalyzer.threshold_frames_for_deepfake,
+    directory: Optional[str] = None
+) -> Dict[str, Any]:
+    results = []
+    missing = []
+    for series_id in series_ids if series_ids is not None else list_series(directory):
+        try:
+            metadata, frames, _ = load_series(series_id, directory)
+        except (OSError, ValueError):
+            missing.append(series_id)
+            continue
+        results.append({
+            "seriesId": series_id,
+            "source": metadata.get("source"),
+            "originalScore": metadata.get("fakeScore"),
+            "fakeScore": rescore(frames, metadata["frameCount"], metadata["fps"], threshold_face_similarity, threshold_frames_for_deepfake),
+        })
+    return {"results": results, "missing": missing}
+
+def analyze_frame_stream(
+    frames: Iterator[np.ndarray],
+    fps: int,
+    width: int,
+    height: int,
+    video_path_two: Optional[str],
+    deadline: Optional[Deadline] = None,
+    series_path: Optional[str] = None,
+    source: str = "frames",
+    total_frames: int = 0,
+    frames_between_processing: int = 1,
+    start_time: Optional[float] = None
+) -> int:
+    start_time = start_time or time.time()
+    frame_count = 0
+    analyzer = FrameAnalyzer(width, height, fps)
+    if series_path:
+        analyzer.series = SeriesRecorder()
+    out = open_video_writer(video_path_two, fps, (width, height)) if video_path_two else None
+    max_frames_between_processing = max(frames_between_processing, fps * 2)
+    sampler = AdaptiveSampler(fps, frames_between_processing) if ADAPTIVE_SAMPLING else None
+    loop_start_time = time.time()
+    stopped_early = False
+    read_time = 0.0
+    sampling_time = 0.0
+    write_time = 0.0
+    while True:
+        if deadline is not None and deadline.expired():
+            stopped_early = True
+            deadline.cut("visual", f"Partial visual score from the first {frame_count} of {total_frames or 'unknown'} frames")
+            break
+        read_start = time.time()
+        frame = next(frames, None)
+        read_time += time.time() - read_start
+        if frame is None:
+            break
+        if sampler is not None:
+            sampling_start = time.time()
+            action, weight, scene_cut = sampler.decide(frame, frame_count)
+            sampling_time += time.time() - sampling_start
+            if scene_cut:
+                analyzer.reset_reference()
+            if action == "reuse":
+                analyzer.reuse(frame, frame_count, weight)
+            elif action == "infer":
+                analyzer.analyze(frame, frame_count, weight)
+            sampled = action == "infer"
+        else:
+            sampled = frame_count % frames_between_processing == 0
+            if sampled:
+                analyzer.analyze(frame, frame_count)
+        if sampled:
+            if deadline is not None and total_frames > frame_count and frames_between_processing < max_frames_between_processing:
+                remaining_frames = total_frames - frame_count
+                decode_time_per_frame = max(0.0, time.time() - loop_start_time - analyzer.inference_time) / (frame_count + 1)
+                projected = remaining_frames * decode_time_per_frame + (remaining_frames / frames_between_processing) * analyzer.inference_time / analyzer.inferences
+                if projected > deadline.remaining() * 0.8:
+                    frames_between_processing = min(max_frames_between_processing, frames_between_processing * 2)
+                    if sampler is not None:
+                        sampler.base_stride = frames_between_processing
+                    deadline.cut("visual_sampling", f"Frame sampling reduced to every {frames_between_processing} frames to fit the time budget")
+        frame_count +=  1
+        analyzer.frame_count = frame_count
+        if out is not None:
+            write_start = time.time()
+            out.write(frame)
+            write_time += time.time() - write_start
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Total Execution Time: {execution_time} seconds")
+    if sampler is not None:
+        print(f"Adaptive sampling: {sampler.inferences} inferences, {sampler.reused} reused results, {sampler.scene_cuts} scene cuts")
+    if out is not None:
+        write_start = time.time()
+        out.release()
+        write_time += time.time() - write_start
+    if deadline is not None:
+        deadline.record("visual_decode", read_time)
+        deadline.record("visual_sampling", sampling_time)
+        deadline.record("visual_mtcnn", analyzer.detect_time)
+        deadline.record("visual_facenet", analyzer.embed_time)
+        if out is not None:
+            deadline.record("visual_write", write_time)
+    if frame_count == 0:
+        print("Error: No frames were processed")
+        return 0
+    fake_score = analyzer.score()
+    if analyzer.series is not None:
+        try:
+            analyzer.series.save(series_path, {
+                "source": source,
+                "fps": fps,
+                "frameCount": frame_count,
+                "width": width,
+                "height": height,
+                "fakeScore": fake_score,
+                "thresholdFaceSimilarity": analyzer.threshold_face_similarity,
+                "thresholdFramesForDeepfake": analyzer.threshold_frames_for_deepfake,
+                "complete": not stopped_early,
+                "created": time.time(),
+            })
+        except OSError as e:
+            print(f"Error: Failed to save embedding series to {series_path}: {e}")
+    return fake_score
+
+def read_video_frames(
+    video_path: str,
+    cap,
+    wait_for_data: Optional[Callable[[int], bool]] = None
+) -> Iterator[np.ndarray]:
+    opened_size = os.path.getsize(video_path)
+    frame_count = 0
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret and wait_for_data is not None and wait_for_data(opened_size):
+                cap.release()
+                opened_size = os.path.getsize(video_path)
+                cap = cv2.VideoCapture(video_path)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+                continue
+            if not ret:
+                return
+            frame_count += 1
+            yield frame
+    finally:
+        cap.release()
 
 def run(
     video_path_one: str,
-    video_path_two: str
+    video_path_two: Optional[str],
+    deadline: Optional[Deadline] = None,
+    series_path: Optional[str] = None,
+    wait_for_data: Optional[Callable[[int], bool]] = None
 ) -> int:
     start_time = time.time()
-    threshold_face_similarity = 0.99
-    threshold_frames_for_deepfake = 15
-    mtcnn = MTCNN()
-    facenet_model = InceptionResnetV1(pretrained = "vggface2").eval()
     if not os.path.exists(video_path_one) or os.path.getsize(video_path_one) == 0:
         print(f"Error: Input video file {video_path_one} doesn't exist or is empty")
         return 0
@@ -24,7 +453,6 @@ def run(
     if not cap.isOpened():
         print(f"Error: OpenCV couldn't open video file {video_path_one}")
         return 0
-    frame_count = 0
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -32,64 +460,59 @@ def run(
         print(f"Error: Invalid video properties: width={width}, height={height}, fps={fps}")
         cap.release()
         return 0
-    fourcc = cv2.VideoWriter_fourcc(*"H264")
-    out = cv2.VideoWriter(video_path_two, fourcc, fps, (width, height))
-    deepfake_count = 0
-    deep_fake_frame_count = 0
-    previous_face_encoding = None
-    frames_between_processing = max(1, int(fps / 7))
-    resize_dimensions = (80, 80)
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_count % frames_between_processing == 0:
-            boxes, _ = mtcnn.detect(frame)
-            if boxes is not None and len(boxes) > 0:
-                box = boxes[0].astype(int)
-                box[0] = max(0, box[0])
-                box[1] = max(0, box[1])
-                box[2] = min(width, box[2])
-                box[3] = min(height, box[3])
-                if box[2] > box[0] and box[3] > box[1]:
-                    face = frame[box[1]:box[3], box[0]:box[2]]
-                    if not face.size == 0:
-                        face = cv2.resize(face, resize_dimensions)
-                        face_tensor = F.to_tensor(face).unsqueeze(0)
-                        current_face_encoding = facenet_model(face_tensor).detach().numpy().flatten()
-                        if previous_face_encoding is not None:
-                            face_similarity = np.dot(current_face_encoding, previous_face_encoding) / (np.linalg.norm(current_face_encoding) * np.linalg.norm(previous_face_encoding))
-                            if face_similarity < threshold_face_similarity:
-                                deepfake_count += 1
-                            else:
-                                deepfake_count = 0
-                            if deepfake_count > threshold_frames_for_deepfake:
-                                cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), (0, 0, 255), 2)
-                                cv2.putText(frame, f"AI Detected - Frame {frame_count}", (10, 30),
-                                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
-                                deep_fake_frame_count +=  1
-                            else:
-                                cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), (0, 255, 0), 2)
-                                cv2.putText(frame, "Real Frame", (box[0], box[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2,
-                                            cv2.LINE_AA)
-                        previous_face_encoding = current_face_encoding
-        frame_count +=  1
-        out.write(frame)
-    end_time = time.time()
-    execution_time = end_time - start_time
-    print(f"Total Execution Time: {execution_time} seconds")
-    cap.release()
-    out.release()
-    if frame_count == 0:
-        print("Error: No frames were processed")
-        return 0
-    total_processed_frames = sum(1 for i in range(frame_count) if i % frames_between_processing == 0)
-    if total_processed_frames == 0:
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = read_video_frames(video_path_one, cap, wait_for_data)
+    try:
+        return analyze_frame_stream(
+            frames, fps, width, height, video_path_two, deadline, series_path,
+            source=video_path_one,
+            total_frames=total_frames,
+            frames_between_processing=max(1, int(fps / 7)),
+            start_time=start_time
+        )
+    finally:
+        frames.close()
+
+def decode_frame(data: bytes) -> Optional[np.ndarray]:
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def decode_captured_frames(frames: List[bytes], first_frame: np.ndarray) -> Iterator[np.ndarray]:
+    height, width = first_frame.shape[:2]
+    skipped = 0
+    try:
+        for index, data in enumerate(frames):
+            frame = first_frame if index == 0 else decode_frame(data)
+            if frame is None:
+                skipped += 1
+                continue
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            yield frame
+    finally:
+        if skipped:
+            print(f"Skipped {skipped} undecodable captured frames")
+
+def run_frames(
+    frames: List[bytes],
+    fps: float,
+    video_path_two: Optional[str],
+    deadline: Optional[Deadline] = None,
+    series_path: Optional[str] = None,
+    source: str = "frames"
+) -> int:
+    start_time = time.time()
+    first_frame = next((frame for frame in map(decode_frame, frames[:1]) if frame is not None), None)
+    if first_frame is None:
+        print("Error: The first captured frame could not be decoded")
         return 0
-    deepfake_percentage = (deep_fake_frame_count / total_processed_frames) * 100
-    confidence_factor = min(deepfake_percentage * (deepfake_count / threshold_frames_for_deepfake), 100)
-    if frame_count > fps * 30:
-        weighted_score = min(deepfake_percentage + confidence_factor * 0.5, 100)
-    else:
-        weighted_score = min(deepfake_percentage + confidence_factor * 0.3, 100)
-    return max(0, min(100, int(weighted_score)))
\ No newline at end of file
+    height, width = first_frame.shape[:2]
+    decoded = decode_captured_frames(frames, first_frame)
+    try:
+        return analyze_frame_stream(
+            decoded, max(1, int(round(fps))), width, height, video_path_two, deadline, series_path,
+            source=source,
+            total_frames=len(frames),
+            start_time=start_time
+        )
+    finally:
+        decoded.close()
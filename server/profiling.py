@@ -0,0 +1,63 @@
+import os
+import random
+import cProfile
+import logging
+import threading
+from typing import (
+    Any,
+    Callable,
+    Optional
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile")
+PROFILE_HEADER = "x-profile"
+
+_profile_lock = threading.Lock()
+
+def profile_requested(headers: Any, flag: Optional[bool] = None) -> bool:
+    if flag is not None:
+        return flag
+    header_value = headers.get(PROFILE_HEADER) if headers is not None else None
+    if header_value:
+        return header_value.strip().lower() in ("1", "true", "yes")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def profile_path_for(output_path: str) -> str:
+    suffix = ".trace.json" if PROFILE_MODE == "torch" else ".prof"
+    return f"{os.path.splitext(output_path)[0]}_profile{suffix}"
+
+def profiled(trace_path: str, function: Callable[..., Any], *args: Any) -> Any:
+    if not _profile_lock.acquire(blocking=False):
+        logger.info(f"Another profile is being captured; running without writing {trace_path}")
+        return function(*args)
+    try:
+        if PROFILE_MODE == "torch":
+            from torch.profiler import (
+                ProfilerActivity,
+                profile
+            )
+            profiler = profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+            start, stop = profiler.start, profiler.stop
+        else:
+            profiler = cProfile.Profile()
+            start, stop = profiler.enable, profiler.disable
+        try:
+            start()
+        except Exception as e:
+            logger.warning(f"Could not start the {PROFILE_MODE} profiler, running without it: {str(e)}")
+            return function(*args)
+        try:
+            result = function(*args)
+        finally:
+            stop()
+        if PROFILE_MODE == "torch":
+            profiler.export_chrome_trace(trace_path)
+        else:
+            profiler.dump_stats(trace_path)
+        logger.info(f"Saved {PROFILE_MODE} trace to {trace_path}")
+        return result
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,190 @@
+import os
+import gc
+import sys
+import csv
+import json
+import time
+import signal
+import hashlib
+import argparse
+import multiprocessing
+import logging
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional
+)
+import cv2
+from workers import torch_threads_per_worker
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("scan")
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v"}
+RESULT_FIELDS = ["path", "size", "mtime", "status", "fake_score", "duration_seconds", "frames", "elapsed_seconds", "output_path", "series_id", "error"]
+
+def find_videos(root: str) -> List[str]:
+    videos = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                videos.append(os.path.join(directory, name))
+    return sorted(videos)
+
+def file_signature(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict[str, Any]]:
+    completed: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(manifest_path):
+        return completed
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping a truncated manifest line")
+                continue
+            completed[entry["path"]] = entry
+    return completed
+
+def init_worker(torch_threads: int) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import torch
+    torch.set_num_threads(torch_threads)
+    from model import warm_up_models
+    from workers import process_memory
+    warm_up_models()
+    logger.info(f"Worker ready with {torch_threads} torch threads, memory {process_memory()}")
+
+def scan_file(path: str, output_dir: Optional[str], embeddings_dir: Optional[str] = None) -> Dict[str, Any]:
+    from model import run
+    entry: Dict[str, Any] = {"path": path, **file_signature(path)}
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    entry["frames"] = frames
+    entry["duration_seconds"] = round(frames / fps, 2) if fps > 0 else None
+    output_path = None
+    if output_dir:
+        output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + "_output.mp4")
+    series_path = None
+    if embeddings_dir:
+        entry["series_id"] = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+        series_path = os.path.join(embeddings_dir, entry["series_id"])
+    started = time.time()
+    try:
+        entry["fake_score"] = run(path, output_path, None, series_path)
+        entry["status"] = "ok"
+        entry["output_path"] = output_path
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    entry["elapsed_seconds"] = round(time.time() - started, 3)
+    return entry
+
+def write_results(results_path: str, entries: List[Dict[str, Any]]) -> None:
+    rows = [{field: entry.get(field) for field in RESULT_FIELDS} for entry in entries]
+    if results_path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing Parquet requires pyarrow: pip install pyarrow")
+        pq.write_table(pa.Table.from_pylist(rows), results_path)
+        return
+    with open(results_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def summarize(entries: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    succeeded = [entry for entry in entries if entry.get("status") == "ok"]
+    video_seconds = sum(entry.get("duration_seconds") or 0 for entry in succeeded)
+    return {
+        "files": len(entries),
+        "succeeded": len(succeeded),
+        "failed": len(entries) - len(succeeded),
+        "wallSeconds": round(wall_seconds, 1),
+        "filesPerMinute": round(len(entries) * 60 / wall_seconds, 2) if wall_seconds > 0 else None,
+        "videoSecondsPerSecond": round(video_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scan a directory of local videos for AI-generated faces.")
+    parser.add_argument("directory", help="Directory to scan recursively")
+    parser.add_argument("--results", default="scan_results.csv", help="Results file, .csv or .parquet (default: scan_results.csv)")
+    parser.add_argument("--manifest", default=None, help="Checkpoint manifest (default: <results>.manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes (default: half the CPU cores)")
+    parser.add_argument("--output-dir", default=None, help="Write annotated videos here; omit for score-only mode")
+    parser.add_argument("--embeddings-dir", default=None, help="Save per-frame embeddings and similarities here for later re-scoring")
+    parser.add_argument("--retry-failed", action="store_true", help="Rescan files that failed in a previous run")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.embeddings_dir:
+        os.makedirs(args.embeddings_dir, exist_ok=True)
+    manifest_path = args.manifest or f"{args.results}.manifest.jsonl"
+    completed = load_manifest(manifest_path)
+    videos = find_videos(args.directory)
+    pending = []
+    for path in videos:
+        previous = completed.get(path)
+        signature = file_signature(path)
+        if previous and previous.get("size") == signature["size"] and previous.get("mtime") == signature["mtime"]:
+            if previous.get("status") == "ok" or not args.retry_failed:
+                continue
+        pending.append(path)
+    logger.info(f"Found {len(videos)} videos, {len(videos) - len(pending)} already in the manifest, {len(pending)} to scan")
+
+    torch_threads = torch_threads_per_worker(args.workers)
+    mp_context = None
+    if pending and "fork" in multiprocessing.get_all_start_methods():
+        from model import share_model_memory
+        share_model_memory()
+        gc.collect()
+        gc.freeze()
+        mp_context = multiprocessing.get_context("fork")
+    started = time.time()
+    scanned: List[Dict[str, Any]] = []
+    interrupted = False
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=args.workers, mp_context=mp_context, initializer=init_worker, initargs=(torch_threads,)) as executor:
+        futures = {executor.submit(scan_file, path, args.output_dir, args.embeddings_dir): path for path in pending}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    entry = {"path": path, **file_signature(path), "status": "error", "error": str(e)}
+                manifest.write(json.dumps(entry) + "\n")
+                manifest.flush()
+                completed[path] = entry
+                scanned.append(entry)
+                logger.info(f"[{done}/{len(pending)}] {path}: {entry.get('status')} score={entry.get('fake_score')} in {entry.get('elapsed_seconds')}s")
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.warning("Interrupted; finished files are saved in the manifest and will be skipped on the next run")
+            for future in futures:
+                future.cancel()
+    write_results(args.results, [completed[path] for path in videos if path in completed])
+    logger.info(f"Wrote {args.results}")
+    logger.info(f"Throughput: {json.dumps(summarize(scanned, time.time() - started))}")
+    return 130 if interrupted else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
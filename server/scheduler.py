@@ -0,0 +1,158 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional
+)
+from deadline import Deadline
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITY_HEADER = "x-request-priority"
+PRIORITIES = {
+    "interactive": PRIORITY_INTERACTIVE,
+    "batch": PRIORITY_BATCH,
+}
+ANALYSIS_QUEUE_LIMIT = int(os.getenv("ANALYSIS_QUEUE_LIMIT", "16"))
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+DOWNLOAD_QUEUE_LIMIT = int(os.getenv("DOWNLOAD_QUEUE_LIMIT", "32"))
+SERVICE_TIME_ALPHA = 0.2
+
+def priority_from_request(headers: Any, default: int = PRIORITY_INTERACTIVE) -> int:
+    value = headers.get(PRIORITY_HEADER) if headers is not None else None
+    if not value:
+        return default
+    return PRIORITIES.get(value.strip().lower(), default)
+
+class QueueFull(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"The {name} queue is full, retry in {math.ceil(retry_after)}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class Slot:
+    def __init__(self, scheduler: "WorkScheduler", ticket: asyncio.Future, timed: bool = True):
+        self.scheduler = scheduler
+        self.ticket = ticket
+        self.timed = timed
+        self.held = False
+        self.started_at: Optional[float] = None
+
+    async def __aenter__(self) -> "Slot":
+        try:
+            await self.ticket
+        except asyncio.CancelledError:
+            if self.ticket.done() and not self.ticket.cancelled():
+                self.scheduler.release(None)
+            else:
+                self.ticket.cancel()
+                self.scheduler.forget()
+            raise
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if not self.held:
+            self._release()
+
+    def hold(self, future: asyncio.Future) -> None:
+        self.held = True
+        future.add_done_callback(self._release_after)
+
+    async def run(self, executor: Optional[Executor], function: Callable[..., Any], *args: Any) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        self.hold(future)
+        return await asyncio.shield(future)
+
+    def _release_after(self, future: asyncio.Future) -> None:
+        if not future.cancelled():
+            future.exception()
+        self._release()
+
+    def _release(self) -> None:
+        self.scheduler.release(time.monotonic() - self.started_at if self.timed else None)
+
+class WorkScheduler:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_limit: int,
+        initial_service_seconds: float
+    ):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = max(0, queue_limit)
+        self.service_seconds = initial_service_seconds
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self._waiting: List[List[Any]] = []
+        self._sequence = itertools.count()
+
+    def queued(self) -> int:
+        return sum(1 for entry in self._waiting if not entry[2].done())
+
+    def estimated_wait(self, priority: int = PRIORITY_BATCH) -> float:
+        if self.active < self.concurrency and not self.queued():
+            return 0.0
+        ahead = sum(1 for entry in self._waiting if entry[0] <= priority and not entry[2].done())
+        return self.service_seconds * (ahead + 1) / self.concurrency
+
+    def check_capacity(self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[Deadline] = None) -> None:
+        if self.active < self.concurrency and not self.queued():
+            return
+        wait = self.estimated_wait(priority)
+        if self.queued() >= self.queue_limit or (deadline is not None and wait > deadline.remaining()):
+            self.rejected += 1
+            raise QueueFull(self.name, self.estimated_wait())
+
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[Deadline] = None, timed: bool = True) -> Slot:
+        ticket = asyncio.get_running_loop().create_future()
+        if self.active < self.concurrency and not self.queued():
+            self.active += 1
+            self.admitted += 1
+            ticket.set_result(None)
+            return Slot(self, ticket, timed)
+        self.check_capacity(priority, deadline)
+        self.admitted += 1
+        heapq.heappush(self._waiting, [priority, next(self._sequence), ticket])
+        return Slot(self, ticket, timed)
+
+    def release(self, service_seconds: Optional[float]) -> None:
+        if service_seconds is not None:
+            self.completed += 1
+            self.service_seconds += SERVICE_TIME_ALPHA * (service_seconds - self.service_seconds)
+        self.active -= 1
+        while self._waiting:
+            _, _, ticket = heapq.heappop(self._waiting)
+            if not ticket.done():
+                self.active += 1
+                ticket.set_result(None)
+                break
+
+    def forget(self) -> None:
+        self._waiting = [entry for entry in self._waiting if not entry[2].done()]
+        heapq.heapify(self._waiting)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": self.queued(),
+            "queueLimit": self.queue_limit,
+            "serviceSecondsEwma": round(self.service_seconds, 2),
+            "estimatedWaitSeconds": round(self.estimated_wait(), 1),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import tempfile
 import uuid
 import subprocess
@@ -7,13 +8,25 @@ import time
 import cv2
 import re
 import json
+import functools
 import uvicorn
 import sys
+import math
+import base64
+import binascii
 import logging
-from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pydantic import (
+    BaseModel,
+    ValidationError
+)
 from typing import (
     Dict,
     Any,
+    Awaitable,
+    Callable,
+    List,
     Optional
 )
 from dotenv import load_dotenv
@@ -27,12 +40,68 @@ from fastapi import (
 from fastapi.responses import (
     JSONResponse,
     FileResponse,
-    HTMLResponse
+    HTMLResponse,
+    StreamingResponse
 )
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from model import run
+from starlette.requests import ClientDisconnect
+from model import (
+    FrameAnalyzer,
+    rescore_corpus,
+    run,
+    run_frames,
+    warm_up_models
+)
+from embedding_store import (
+    EMBEDDING_STORE_DIR,
+    new_series_id,
+    prune_series,
+    series_prefix
+)
+from live import (
+    LIVE_WINDOW_SECONDS,
+    LiveSession,
+    live_sessions,
+    start_live_session
+)
+from video_index import (
+    compute_video_fingerprint,
+    get_video_index
+)
+from deadline import (
+    Deadline,
+    StageCut,
+    deadline_from_request,
+    within_deadline
+)
+from coalesce import (
+    FileRefs,
+    InflightCoalescer
+)
+from upload import (
+    UPLOAD_MAX_BYTES,
+    SpooledUpload,
+    UploadTooLarge,
+    receive_upload
+)
+from profiling import (
+    profile_path_for,
+    profile_requested,
+    profiled
+)
+from workers import process_memory
+from scheduler import (
+    ANALYSIS_QUEUE_LIMIT,
+    DOWNLOAD_CONCURRENCY,
+    DOWNLOAD_QUEUE_LIMIT,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    QueueFull,
+    WorkScheduler,
+    priority_from_request
+)
 
 load_dotenv()
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
@@ -46,9 +115,23 @@ transcribe_audio = None
 perform_search = None
 judge_content = None
 try:
-    from web.utils.transcribe import transcribe_audio
-    from web.utils.search import perform_search
-    from web.utils.judge import judge_content
+    from web.utils.transcribe import (
+        transcribe_audio,
+        transcribe_audio_async
+    )
+    from web.utils.search import (
+        SEARCH_DEADLINE_SECONDS,
+        perform_search,
+        perform_multi_search_async
+    )
+    from web.utils.judge import (
+        judge_content,
+        judge_content_async
+    )
+    from web.utils.clients import close_clients
+    from web.utils.transcript_cache import get_transcript_cache
+    from web.utils.search_cache import search_cache
+    from web.utils.resilience import breaker_states
     has_news_features = True
 except ImportError as e:
     has_news_features = False
@@ -57,7 +140,27 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+model_readiness: Dict[str, Any] = {"ready": False, "error": None, "warmupSeconds": None}
+
+def warm_up():
+    try:
+        model_readiness["warmupSeconds"] = round(warm_up_models(), 2)
+        model_readiness["ready"] = True
+        logger.info(f"Models loaded and warmed up in {model_readiness['warmupSeconds']} seconds")
+    except Exception as e:
+        logger.error(f"Failed to load models: {str(e)}")
+        model_readiness["error"] = str(e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=cleanup_old_results, daemon=True).start()
+    warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
+    await close_clients()
+    if not warmup_task.done():
+        warmup_task.cancel()
+
+app = FastAPI(lifespan=lifespan)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_dir):
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
@@ -79,6 +182,93 @@ else:
     logger.critical(f"Templates directory not found: {templates_dir}")
     raise FileNotFoundError(f"Templates directory not found: {templates_dir}")
 analysis_results: Dict[str, Dict[str, Any]] = {}
+MIN_AUDIO_DOWNLOAD_SECONDS = 5.0
+MIN_JUDGE_SECONDS = float(os.getenv("MIN_JUDGE_SECONDS", "3"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+FRAME_UPLOAD_MAX_FRAMES = int(os.getenv("FRAME_UPLOAD_MAX_FRAMES", "210"))
+FRAME_UPLOAD_MAX_FRAME_BYTES = int(os.getenv("FRAME_UPLOAD_MAX_FRAME_BYTES", str(512 * 1024)))
+FRAME_UPLOAD_MAX_BYTES = int(os.getenv("FRAME_UPLOAD_MAX_BYTES", str(32 * 1024 * 1024)))
+BATCH_RETRY_MAX_WAIT = 10.0
+YTDLP_PATH = os.getenv("YTDLP_PATH", "yt-dlp")
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+video_executor = ThreadPoolExecutor(max_workers=VIDEO_WORKERS, thread_name_prefix="video-analysis")
+analysis_scheduler = WorkScheduler("analysis", VIDEO_WORKERS, ANALYSIS_QUEUE_LIMIT, initial_service_seconds=30)
+download_scheduler = WorkScheduler("download", DOWNLOAD_CONCURRENCY, DOWNLOAD_QUEUE_LIMIT, initial_service_seconds=15)
+background_analyses = set()
+download_coalescer = InflightCoalescer("download")
+analysis_coalescer = InflightCoalescer("analysis")
+file_refs = FileRefs()
+
+def queue_full_response(e: QueueFull) -> JSONResponse:
+    logger.warning(str(e))
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"error": str(e)},
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
+
+def annotated_output_path(video_path: str) -> str:
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(tempfile.gettempdir(), f"{name}_{uuid.uuid4().hex[:8]}_output.mp4")
+
+def find_near_duplicate(video_path: str):
+    index = get_video_index()
+    if index is None:
+        return None, None
+    try:
+        fingerprint = compute_video_fingerprint(video_path)
+    except Exception as e:
+        logger.error(f"Failed to fingerprint video {video_path}: {str(e)}")
+        return None, None
+    if fingerprint is None:
+        return None, None
+    return fingerprint, index.lookup(fingerprint)
+
+def remember_analysis(fingerprint, fake_score: int, video_path: str, deadline: Optional[Deadline] = None):
+    index = get_video_index()
+    if index is None or fingerprint is None:
+        return
+    if deadline is not None and any(cut["stage"] == "visual" for cut in deadline.cut_stages()):
+        return
+    key = file_refs.key_for(video_path)
+    index.store(fingerprint, fake_score, ":".join(key) if key else None)
+
+def analyze_unless_duplicate(
+    video_path: str,
+    output_path: str,
+    deadline: Deadline,
+    series_path: Optional[str] = None,
+    profile_path: Optional[str] = None
+):
+    with deadline.timed("fingerprint"):
+        fingerprint, near_duplicate = find_near_duplicate(video_path)
+    if near_duplicate is not None:
+        logger.info(f"Reusing prior score {near_duplicate['fakeScore']} for near-duplicate video {video_path}")
+        return near_duplicate["fakeScore"], near_duplicate
+    logger.info(f"Starting video analysis for {video_path}")
+    with deadline.timed("visual"):
+        if profile_path:
+            fake_score = profiled(profile_path, run, video_path, output_path, deadline, series_path)
+        else:
+            fake_score = run(video_path, output_path, deadline, series_path)
+    remember_analysis(fingerprint, fake_score, video_path, deadline)
+    return fake_score, None
+
+async def analyze_video_file(video_path: str, output_path: str, deadline: Deadline, priority: int, profile_path: Optional[str] = None):
+    series_id = new_series_id() if EMBEDDING_STORE_DIR else None
+    series_path = series_prefix(series_id) if series_id else None
+    queued_at = time.monotonic()
+    async with analysis_scheduler.slot(priority, deadline) as slot:
+        deadline.record("analysis_queue", time.monotonic() - queued_at)
+        fake_score, near_duplicate = await slot.run(video_executor, analyze_unless_duplicate, video_path, output_path, deadline, series_path, profile_path)
+    return fake_score, near_duplicate, None if near_duplicate else series_id
+
+async def run_ytdlp(cmd: list, default_timeout: float, priority: int, deadline: Deadline) -> subprocess.CompletedProcess:
+    queued_at = time.monotonic()
+    async with download_scheduler.slot(priority, deadline) as slot:
+        deadline.record("download_queue", time.monotonic() - queued_at)
+        with deadline.timed("audio_download" if "-x" in cmd else "video_download"):
+            return await slot.run(None, functools.partial(subprocess.run, cmd, check=True, capture_output=True, text=True, timeout=deadline.timeout(default_timeout)))
 
 def cleanup_old_results():
     while True:
@@ -93,6 +283,12 @@ def cleanup_old_results():
                     audio_path = result.get("audio_path")
                     if audio_path and os.path.exists(audio_path):
                         os.unlink(audio_path)
+                    upload_path = result.get("upload_path")
+                    if upload_path and os.path.exists(upload_path):
+                        os.unlink(upload_path)
+                    profile_path = result.get("profile_path")
+                    if profile_path and os.path.exists(profile_path):
+                        os.unlink(profile_path)
                     to_remove.append(result_id)
                 except Exception as e:
                     logger.error(f"Failed to delete files for result {result_id}: {str(e)}")
@@ -102,23 +298,33 @@ def cleanup_old_results():
                 logger.info(f"Cleaned up result {result_id} and associated files")
             except KeyError:
                 logger.warning(f"Failed to remove result {result_id} from analysis_results - key not found")
+        if EMBEDDING_STORE_DIR:
+            try:
+                removed = prune_series()
+                if removed:
+                    logger.info(f"Pruned {removed} stored embedding series")
+            except Exception as e:
+                logger.error(f"Failed to prune the embedding store: {str(e)}")
         time.sleep(300)
 
-cleanup_thread = threading.Thread(target=cleanup_old_results, daemon=True)
-cleanup_thread.start()
-
 @app.get("/view/{result_id}", response_class=HTMLResponse)
 async def view_result(result_id: str, request: Request):
     if not result_id or result_id not in analysis_results:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Result not found or has expired")
     try:
         result = analysis_results[result_id]
+        processing = result.get("status") == "processing"
         template_data = {
-            "fake_score": result.get("fake_score", "N/A"),
-            "video_url": f"/video/{result_id}",
+            "fake_score": 0 if processing else result.get("fake_score", "N/A"),
+            "processing": processing,
+            "status_url": f"/status/{result_id}",
+            "video_url": f"/video/{result_id}" if result.get("output_path") else None,
+            "near_duplicate": result.get("near_duplicate"),
             "verdict": result.get("verdict", "Uncertain"),
             "news_score": result.get("news_score", "N/A"),
-            "news_summary": result.get("news_summary", "No summary available")
+            "news_summary": result.get("news_summary", "No summary available"),
+            "timings": result.get("timings", {}),
+            "profile_url": f"/profile/{result_id}" if result.get("profile_path") else None
         }
         if "verdict" in template_data and isinstance(template_data["verdict"], str):
             template_data["verdict"] = template_data["verdict"].capitalize()
@@ -135,14 +341,92 @@ async def view_result(result_id: str, request: Request):
         logger.error(f"Missing key in analysis_results for result_id {result_id}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Server error while processing result {result_id}")
 
+VIDEO_STREAM_CHUNK_SIZE = 64 * 1024
+
+def parse_range_header(range_header: Optional[str], file_size: int):
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            suffix_length = int(end_text)
+            start = max(0, file_size - suffix_length)
+            end = file_size - 1
+    except ValueError:
+        return None
+    end = min(end, file_size - 1)
+    if start < 0 or start > end:
+        return None
+    return start, end
+
+def iter_file_range(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(VIDEO_STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+async def tail_growing_file(path: str, result_id: str, start: int = 0):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while True:
+            chunk = f.read(VIDEO_STREAM_CHUNK_SIZE)
+            if chunk:
+                yield chunk
+                continue
+            result = analysis_results.get(result_id)
+            if not result or result.get("status") != "processing":
+                chunk = f.read()
+                if chunk:
+                    yield chunk
+                break
+            await asyncio.sleep(0.1)
+
 @app.get("/video/{result_id}")
-async def get_video(result_id: str):
+async def get_video(result_id: str, request: Request):
     if not result_id or result_id not in analysis_results:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found or has expired")
     try:
-        output_path = analysis_results[result_id]["output_path"]
+        result = analysis_results[result_id]
+        output_path = result["output_path"]
+        in_progress = result.get("status") == "processing"
+        if in_progress and output_path:
+            waited = 0.0
+            while (not os.path.exists(output_path) or os.path.getsize(output_path) == 0) and waited < 5:
+                await asyncio.sleep(0.1)
+                waited += 0.1
         if not output_path or not os.path.exists(output_path):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video file not found")
+        file_size = os.path.getsize(output_path)
+        range_header = request.headers.get("range")
+        if in_progress:
+            byte_range = parse_range_header(range_header, file_size) if file_size > 0 else None
+            if byte_range is None or byte_range[0] == 0:
+                return StreamingResponse(
+                    tail_growing_file(output_path, result_id),
+                    media_type="video/mp4",
+                    headers={"Cache-Control": "no-store"}
+                )
+            start, end = byte_range
+            return StreamingResponse(
+                iter_file_range(output_path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="video/mp4",
+                headers={
+                    "Content-Range": f"bytes {start}-{end}/*",
+                    "Content-Length": str(end - start + 1),
+                    "Accept-Ranges": "bytes",
+                    "Cache-Control": "no-store"
+                }
+            )
         return FileResponse(output_path, media_type="video/mp4")
     except KeyError:
         logger.error(f"Missing 'output_path' key in analysis_results for result_id {result_id}")
@@ -166,6 +450,16 @@ async def get_audio(result_id: str):
         logger.error(f"Error retrieving audio for result_id {result_id}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Server error while retrieving audio file")
 
+@app.get("/profile/{result_id}")
+async def get_profile(result_id: str):
+    if not result_id or result_id not in analysis_results:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or has expired")
+    profile_path = analysis_results[result_id].get("profile_path")
+    if not profile_path or not os.path.exists(profile_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profile was captured for this result")
+    media_type = "application/json" if profile_path.endswith(".json") else "application/octet-stream"
+    return FileResponse(profile_path, media_type=media_type, filename=os.path.basename(profile_path))
+
 def get_platform_and_video_id(url: str):
     url_patterns = {
         "youtube": [r"(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/shorts\/)([^&\?\/]+)"],
@@ -180,18 +474,18 @@ def get_platform_and_video_id(url: str):
                 return platforms, match.group(1)
     return None, None
 
-def get_available_formats(url: str):
+def get_available_formats(url: str, timeout: float = 30):
     if not url:
         logger.error("Empty URL provided to get_available_formats")
         return []
     try:
         cmd = [
-            "yt-dlp",
+            YTDLP_PATH,
             "--dump-json",
             "--no-playlist",
             url
         ]
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=30)
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=timeout)
         if not result.stdout:
             logger.error(f"Empty response from yt-dlp for URL: {url}")
             return []
@@ -235,7 +529,9 @@ def select_best_format(formats: list, target_height: int = 360):
         return None
 
 @app.get("/download-video")
-async def download_video(video_url: Optional[str] = None, quality: str = "360p"):
+async def download_video(request: Request, video_url: Optional[str] = None, quality: str = "360p", budget_ms: Optional[int] = None):
+    deadline = deadline_from_request(request.headers, budget_ms)
+    priority = priority_from_request(request.headers)
     if not video_url:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -263,7 +559,8 @@ async def download_video(video_url: Optional[str] = None, quality: str = "360p")
         url = video_url
         format_option = []
         if platform in ["facebook", "reddit"]:
-            formats = get_available_formats(url)
+            with deadline.timed("format_probe"):
+                formats = await asyncio.to_thread(get_available_formats, url, deadline.timeout(30))
             format_id = select_best_format(formats, target_height)
             if format_id:
                 format_option = ["-f", format_id]
@@ -272,7 +569,7 @@ async def download_video(video_url: Optional[str] = None, quality: str = "360p")
         else:
             format_option = ["-f", f"best[height<={target_height}]"]
         cmd = [
-            "yt-dlp",
+            YTDLP_PATH,
             "--verbose",
             "--force-overwrites",
             "--no-cache-dir",
@@ -284,7 +581,7 @@ async def download_video(video_url: Optional[str] = None, quality: str = "360p")
         ]
         logger.info(f"Downloading video from {url} with options: {' '.join(format_option)}")
         try:
-            _ = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=180)
+            _ = await run_ytdlp(cmd, 180, priority, deadline)
         except subprocess.TimeoutExpired:
             logger.error(f"Video download timed out for URL: {url}")
             return JSONResponse(
@@ -320,7 +617,9 @@ async def download_video(video_url: Optional[str] = None, quality: str = "360p")
             )
         cap.release()
         logger.info(f"Successfully downloaded video to {video_path}")
-        return {"videoPath": video_path}
+        return {"videoPath": video_path, "timings": deadline.timings()}
+    except QueueFull as e:
+        return queue_full_response(e)
     except subprocess.CalledProcessError as e:
         error_message = e.stderr if hasattr(e, 'stderr') else str(e)
         logger.error(f"yt-dlp command failed: {error_message}")
@@ -336,7 +635,9 @@ async def download_video(video_url: Optional[str] = None, quality: str = "360p")
         )
 
 @app.get("/download-audio")
-async def download_audio(video_url: Optional[str] = None, format: str = "mp3"):
+async def download_audio(request: Request, video_url: Optional[str] = None, format: str = "mp3", budget_ms: Optional[int] = None):
+    deadline = deadline_from_request(request.headers, budget_ms)
+    priority = priority_from_request(request.headers)
     if not video_url:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -358,7 +659,7 @@ async def download_audio(video_url: Optional[str] = None, format: str = "mp3"):
         audio_path = os.path.join(tempfile.gettempdir(), f"ai_detector_audio_{audio_id}_{timestamp}.{format}")
         url = video_url
         cmd = [
-            "yt-dlp",
+            YTDLP_PATH,
             "--verbose",
             "--force-overwrites",
             "--no-cache-dir",
@@ -371,7 +672,7 @@ async def download_audio(video_url: Optional[str] = None, format: str = "mp3"):
         ]
         logger.info(f"Downloading audio from {url} in format: {format}")
         try:
-            _ = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=120)
+            _ = await run_ytdlp(cmd, 120, priority, deadline)
         except subprocess.TimeoutExpired:
             logger.error(f"Audio download timed out for URL: {url}")
             return JSONResponse(
@@ -397,13 +698,17 @@ async def download_audio(video_url: Optional[str] = None, format: str = "mp3"):
         result_id = str(uuid.uuid4())
         analysis_results[result_id] = {
             "audio_path": audio_path,
+            "timings": deadline.timings(),
             "timestamp": time.time()
         }
         logger.info(f"Successfully downloaded audio to {audio_path} with result_id {result_id}")
         return {
             "audioPath": audio_path,
-            "resultId": result_id
+            "resultId": result_id,
+            "timings": analysis_results[result_id]["timings"]
         }
+    except QueueFull as e:
+        return queue_full_response(e)
     except subprocess.CalledProcessError as e:
         error_message = e.stderr if hasattr(e, 'stderr') else str(e)
         logger.error(f"yt-dlp command failed: {error_message}")
@@ -419,7 +724,9 @@ async def download_audio(video_url: Optional[str] = None, format: str = "mp3"):
         )
     
 @app.get("/download-combined")
-async def download_combined(video_url: Optional[str] = None, audio_format: str = "mp3", quality: str = "360p"):
+async def download_combined(request: Request, video_url: Optional[str] = None, audio_format: str = "mp3", quality: str = "360p", budget_ms: Optional[int] = None):
+    deadline = deadline_from_request(request.headers, budget_ms)
+    priority = priority_from_request(request.headers)
     if not video_url:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -435,6 +742,26 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": "Unsupported URL format"}
         )
+    key = ("download-combined", platform, extracted_id, audio_format, quality)
+    result, coalesced = await download_coalescer.run(
+        key,
+        lambda: download_combined_files(video_url, platform, extracted_id, audio_format, quality, deadline, priority)
+    )
+    if isinstance(result, dict):
+        file_refs.acquire(result["videoPath"], (platform, extracted_id))
+        if coalesced:
+            result = dict(result, coalesced=True)
+    return result
+
+async def download_combined_files(
+    video_url: str,
+    platform: str,
+    extracted_id: str,
+    audio_format: str,
+    quality: str,
+    deadline: Deadline,
+    priority: int
+):
     timestamp = int(time.time())
     video_id = str(uuid.uuid4())[:8]
     audio_id = str(uuid.uuid4())[:8]
@@ -453,7 +780,8 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
                 logger.warning(f"Invalid quality parameter: {quality}, using default: 360p")
         format_option = []
         if platform in ["facebook", "reddit"]:
-            formats = get_available_formats(video_url)
+            with deadline.timed("format_probe"):
+                formats = await asyncio.to_thread(get_available_formats, video_url, deadline.timeout(30))
             format_id = select_best_format(formats, target_height)
             if format_id:
                 format_option = ["-f", format_id]
@@ -462,7 +790,7 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
         else:
             format_option = ["-f", f"best[height<={target_height}]"]
         video_cmd = [
-            "yt-dlp",
+            YTDLP_PATH,
             "--verbose",
             "--force-overwrites",
             "--no-cache-dir",
@@ -473,7 +801,7 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
             video_url
         ]
         try:
-            video_process = subprocess.run(video_cmd, check=True, capture_output=True, text=True, timeout=180)
+            video_process = await run_ytdlp(video_cmd, 180, priority, deadline)
             logger.info(f"Video download process completed with: {video_process.stdout[-200:] if video_process.stdout else 'No output'}")
         except subprocess.TimeoutExpired:
             logger.error(f"Video download timed out for URL: {video_url}")
@@ -506,7 +834,7 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
             )
         logger.info(f"Downloading audio from URL: {video_url} to {audio_path}")
         audio_cmd = [
-            "yt-dlp",
+            YTDLP_PATH,
             "--verbose",
             "--force-overwrites",
             "--no-cache-dir",
@@ -518,11 +846,18 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
             video_url
         ]
         try:
-            audio_process = subprocess.run(audio_cmd, check=True, capture_output=True, text=True, timeout=120)
+            if deadline.remaining() < MIN_AUDIO_DOWNLOAD_SECONDS:
+                raise subprocess.TimeoutExpired(audio_cmd, deadline.remaining())
+            audio_process = await run_ytdlp(audio_cmd, 120, priority, deadline)
             logger.info(f"Audio download process completed with: {audio_process.stdout[-200:] if audio_process.stdout else 'No output'}")
         except subprocess.TimeoutExpired:
             logger.error(f"Audio download timed out for URL: {video_url}")
             logger.warning("Proceeding with just video since audio download timed out")
+            deadline.cut("audio_download", "Audio download skipped or stopped to stay within the time budget")
+            audio_path = None
+        except QueueFull as e:
+            logger.warning(f"Proceeding with just video: {str(e)}")
+            deadline.cut("audio_download", "Audio download skipped because the download queue is full")
             audio_path = None
         except subprocess.CalledProcessError as e:
             logger.error(f"Audio download failed: {e.stderr if hasattr(e, 'stderr') and e.stderr else str(e)}")
@@ -554,6 +889,8 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
         result = {
             "videoPath": video_path,
             "videoId": video_result_id,
+            "cutStages": deadline.cut_stages(),
+            "timings": deadline.timings(),
         }
         if audio_path and os.path.exists(audio_path):
             result["audioPath"] = audio_path
@@ -564,6 +901,8 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
             result["audioPath"] = None
             result["audioId"] = None
         return result
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         logger.error(f"Unexpected error during combined download: {str(e)}")
         return JSONResponse(
@@ -573,6 +912,8 @@ async def download_combined(video_url: Optional[str] = None, audio_format: str =
 
 class VideoAnalysisRequest(BaseModel):
     videoPath: str
+    budgetMs: Optional[int] = None
+    profile: Optional[bool] = None
     
     class Config:
         json_schema_extra = {
@@ -582,7 +923,8 @@ class VideoAnalysisRequest(BaseModel):
         }
 
 @app.post("/analyze-video")
-async def analyze_video(data: VideoAnalysisRequest, background_tasks: BackgroundTasks):
+async def analyze_video(data: VideoAnalysisRequest, request: Request, background_tasks: BackgroundTasks):
+    deadline = deadline_from_request(request.headers, data.budgetMs)
     video_path = data.videoPath
     if not video_path:
         return JSONResponse(
@@ -605,17 +947,18 @@ async def analyze_video(data: VideoAnalysisRequest, background_tasks: Background
             content={"error": "Video file is empty"}
         )
     try:
-        output_path = video_path.replace(".mp4", "_output.mp4")
-        
-        logger.info(f"Starting video analysis for {video_path}")
-        fake_score = run(video_path, output_path)
-        if not os.path.exists(output_path):
+        output_path = annotated_output_path(video_path)
+        profile_path = profile_path_for(output_path) if profile_requested(request.headers, data.profile) else None
+        fake_score, near_duplicate, series_id = await analyze_video_file(video_path, output_path, deadline, priority_from_request(request.headers), profile_path)
+        if near_duplicate:
+            output_path = None
+        elif not os.path.exists(output_path):
             logger.error(f"Analysis completed but no output video was generated at {output_path}")
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": "Video analysis failed: No output video generated"}
             )
-        if os.path.getsize(output_path) == 0:
+        elif os.path.getsize(output_path) == 0:
             logger.error(f"Analysis completed but output video is empty: {output_path}")
             try:
                 os.unlink(output_path)
@@ -626,24 +969,34 @@ async def analyze_video(data: VideoAnalysisRequest, background_tasks: Background
                 content={"error": "Video analysis failed: Empty output video generated"}
             )
         result_id = str(uuid.uuid4())
+        timings = deadline.timings()
+        profile_path = profile_path if profile_path and os.path.exists(profile_path) else None
         analysis_results[result_id] = {
             "output_path": output_path,
             "fake_score": fake_score,
+            "timings": timings,
+            "profile_path": profile_path,
             "timestamp": time.time()
         }
-        def delete_input_video():
-            try:
-                if os.path.exists(video_path):
-                    os.unlink(video_path)
-                    logger.info(f"Deleted input video: {video_path}")
-            except Exception as e:
-                logger.error(f"Failed to delete input video {video_path}: {str(e)}")
-        background_tasks.add_task(delete_input_video)
+        if near_duplicate:
+            analysis_results[result_id]["near_duplicate"] = near_duplicate
+        background_tasks.add_task(file_refs.release, video_path)
         logger.info(f"Video analysis completed with fake_score: {fake_score}, result_id: {result_id}")
-        return {
+        response = {
             "fakeScore": fake_score,
-            "resultId": result_id
+            "resultId": result_id,
+            "cutStages": deadline.cut_stages(),
+            "timings": timings
         }
+        if profile_path:
+            response["profileUrl"] = f"/profile/{result_id}"
+        if near_duplicate:
+            response["nearDuplicate"] = near_duplicate
+        if series_id:
+            response["seriesId"] = series_id
+        return response
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         logger.error(f"Error during video analysis: {str(e)}")
         return JSONResponse(
@@ -651,8 +1004,434 @@ async def analyze_video(data: VideoAnalysisRequest, background_tasks: Background
             content={"error": f"Failed to analyze video: {str(e)}"}
         )
 
+class FrameAnalysisRequest(BaseModel):
+    frames: List[str]
+    fps: float = 7.0
+    sourceUrl: Optional[str] = None
+    budgetMs: Optional[int] = None
+    profile: Optional[bool] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "frames": ["data:image/webp;base64,UklGR..."],
+                "fps": 7,
+                "sourceUrl": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+            }
+        }
+
+def decode_frame_payload(frame: str) -> bytes:
+    if frame.startswith("data:"):
+        frame = frame.split(",", 1)[-1]
+    return base64.b64decode(frame, validate=True)
+
+async def read_limited_body(request: Request, limit: int) -> bytes:
+    try:
+        content_length = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        content_length = 0
+    if content_length > limit:
+        raise UploadTooLarge(f"Request body exceeds the {limit} byte limit")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise UploadTooLarge(f"Request body exceeds the {limit} byte limit")
+    return bytes(body)
+
+@app.post(
+    "/analyze-frames",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": FrameAnalysisRequest.model_json_schema()}}}}
+)
+async def analyze_frames(request: Request):
+    try:
+        body = await read_limited_body(request, FRAME_UPLOAD_MAX_BYTES)
+        data = await asyncio.to_thread(FrameAnalysisRequest.model_validate_json, body)
+    except UploadTooLarge as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": str(e)}
+        )
+    except ValidationError as e:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"error": "Invalid frame analysis request", "detail": e.errors(include_url=False, include_context=False, include_input=False)}
+        )
+    except ClientDisconnect:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Client disconnected"}
+        )
+    deadline = deadline_from_request(request.headers, data.budgetMs)
+    if not data.frames:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "No frames provided"}
+        )
+    if len(data.frames) > FRAME_UPLOAD_MAX_FRAMES:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": f"Too many frames, the limit is {FRAME_UPLOAD_MAX_FRAMES}"}
+        )
+    if not 0 < data.fps <= 60:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "fps must be between 0 and 60"}
+        )
+    try:
+        with deadline.timed("frame_decode"):
+            frames = await asyncio.to_thread(lambda: [decode_frame_payload(frame) for frame in data.frames])
+    except (binascii.Error, ValueError):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Frames must be base64-encoded JPEG or WebP images"}
+        )
+    if any(len(frame) > FRAME_UPLOAD_MAX_FRAME_BYTES for frame in frames):
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": f"Frames must be at most {FRAME_UPLOAD_MAX_FRAME_BYTES} bytes each"}
+        )
+    output_path = os.path.join(tempfile.gettempdir(), f"ai_detector_frames_{uuid.uuid4().hex[:8]}_{int(time.time())}_output.mp4")
+    profile_path = profile_path_for(output_path) if profile_requested(request.headers, data.profile) else None
+    series_id = new_series_id() if EMBEDDING_STORE_DIR else None
+    series_path = series_prefix(series_id) if series_id else None
+    source = data.sourceUrl or "frames"
+    try:
+        queued_at = time.monotonic()
+        async with analysis_scheduler.slot(priority_from_request(request.headers), deadline) as slot:
+            deadline.record("analysis_queue", time.monotonic() - queued_at)
+            logger.info(f"Starting analysis of {len(frames)} captured frames from {source}")
+            with deadline.timed("visual"):
+                if profile_path:
+                    fake_score = await slot.run(video_executor, profiled, profile_path, run_frames, frames, data.fps, output_path, deadline, series_path, source)
+                else:
+                    fake_score = await slot.run(video_executor, run_frames, frames, data.fps, output_path, deadline, series_path, source)
+    except QueueFull as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error during frame analysis: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": f"Failed to analyze frames: {str(e)}"}
+        )
+    result_id = str(uuid.uuid4())
+    timings = deadline.timings()
+    profile_path = profile_path if profile_path and os.path.exists(profile_path) else None
+    analysis_results[result_id] = {
+        "output_path": output_path if os.path.exists(output_path) else None,
+        "fake_score": fake_score,
+        "timings": timings,
+        "profile_path": profile_path,
+        "timestamp": time.time()
+    }
+    logger.info(f"Frame analysis completed with fake_score: {fake_score}, result_id: {result_id}")
+    response = {
+        "fakeScore": fake_score,
+        "resultId": result_id,
+        "frameCount": len(frames),
+        "cutStages": deadline.cut_stages(),
+        "timings": timings
+    }
+    if profile_path:
+        response["profileUrl"] = f"/profile/{result_id}"
+    if series_id:
+        response["seriesId"] = series_id
+    return response
+
+@app.post("/analyze-video-async")
+async def analyze_video_async(data: VideoAnalysisRequest, request: Request):
+    video_path = data.videoPath
+    if not video_path:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Missing video path"}
+        )
+    if not os.path.isfile(video_path) or os.path.getsize(video_path) == 0:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Video file not found, not a file or empty"}
+        )
+    try:
+        slot = analysis_scheduler.slot(priority_from_request(request.headers))
+    except QueueFull as e:
+        return queue_full_response(e)
+    output_path = annotated_output_path(video_path)
+    profile_path = profile_path_for(output_path) if profile_requested(request.headers, data.profile) else None
+    deadline = Deadline(math.inf)
+    result_id = str(uuid.uuid4())
+    analysis_results[result_id] = {
+        "output_path": output_path,
+        "status": "processing",
+        "timestamp": time.time()
+    }
+
+    def run_analysis():
+        try:
+            deadline.record("analysis_queue", deadline.elapsed())
+            series_id = new_series_id() if EMBEDDING_STORE_DIR else None
+            series_path = series_prefix(series_id) if series_id else None
+            fake_score, near_duplicate = analyze_unless_duplicate(video_path, output_path, deadline, series_path, profile_path)
+            if near_duplicate is not None:
+                analysis_results[result_id]["near_duplicate"] = near_duplicate
+                analysis_results[result_id]["output_path"] = None
+            elif series_id:
+                analysis_results[result_id]["series_id"] = series_id
+            if profile_path and os.path.exists(profile_path):
+                analysis_results[result_id]["profile_path"] = profile_path
+            analysis_results[result_id]["fake_score"] = fake_score
+            analysis_results[result_id]["timings"] = deadline.timings()
+            analysis_results[result_id]["status"] = "complete"
+            logger.info(f"Progressive video analysis completed with fake_score: {fake_score}, result_id: {result_id}")
+        except Exception as e:
+            logger.error(f"Error during progressive video analysis: {str(e)}")
+            analysis_results[result_id]["status"] = "failed"
+            analysis_results[result_id]["error"] = str(e)
+        finally:
+            file_refs.release(video_path)
+
+    async def schedule_analysis():
+        async with slot:
+            await slot.run(video_executor, run_analysis)
+
+    task = asyncio.create_task(schedule_analysis())
+    background_analyses.add(task)
+    task.add_done_callback(background_analyses.discard)
+    return {
+        "resultId": result_id,
+        "status": "processing",
+        "viewUrl": f"/view/{result_id}"
+    }
+
+@app.post("/analyze-upload")
+async def analyze_upload(request: Request, profile: Optional[bool] = None):
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(("multipart/form-data", "video/", "application/octet-stream")):
+        return JSONResponse(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            content={"error": "Send the video as multipart/form-data or as a raw video/* body"}
+        )
+    try:
+        content_length = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        content_length = 0
+    if content_length > UPLOAD_MAX_BYTES:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": f"Upload exceeds the {UPLOAD_MAX_BYTES} byte limit"}
+        )
+    priority = priority_from_request(request.headers)
+    try:
+        analysis_scheduler.check_capacity(priority)
+    except QueueFull as e:
+        return queue_full_response(e)
+    deadline = Deadline(math.inf)
+    result_id = str(uuid.uuid4())
+    profile = profile_requested(request.headers, profile)
+    state: Dict[str, Any] = {}
+
+    def run_analysis(upload: SpooledUpload, output_path: str, profile_path: Optional[str]):
+        try:
+            deadline.record("analysis_queue", deadline.elapsed() - state["ready_at"])
+            logger.info(f"Starting analysis of upload {upload.path} after {upload.header_ready_at} bytes")
+            series_id = new_series_id() if EMBEDDING_STORE_DIR else None
+            series_path = series_prefix(series_id) if series_id else None
+            with deadline.timed("visual"):
+                if profile_path:
+                    fake_score = profiled(profile_path, run, upload.path, output_path, deadline, series_path, upload.wait_for_data)
+                    if os.path.exists(profile_path):
+                        analysis_results[result_id]["profile_path"] = profile_path
+                else:
+                    fake_score = run(upload.path, output_path, deadline, series_path, upload.wait_for_data)
+            if upload.failed:
+                raise RuntimeError("The upload did not complete")
+            if series_id:
+                analysis_results[result_id]["series_id"] = series_id
+            analysis_results[result_id]["fake_score"] = fake_score
+            analysis_results[result_id]["timings"] = deadline.timings()
+            analysis_results[result_id]["status"] = "complete"
+            logger.info(f"Upload analysis completed with fake_score: {fake_score}, result_id: {result_id}")
+        except Exception as e:
+            logger.error(f"Error during upload analysis: {str(e)}")
+            analysis_results[result_id]["status"] = "failed"
+            analysis_results[result_id]["error"] = str(e)
+        finally:
+            upload.discard()
+
+    async def schedule_analysis(upload: SpooledUpload):
+        output_path = os.path.join(tempfile.gettempdir(), os.path.splitext(os.path.basename(upload.path))[0] + "_output.mp4")
+        profile_path = profile_path_for(output_path) if profile else None
+        analysis_results[result_id]["output_path"] = output_path
+        try:
+            slot = analysis_scheduler.slot(priority)
+        except QueueFull as e:
+            logger.warning(str(e))
+            analysis_results[result_id].update(status="failed", error=str(e))
+            upload.discard()
+            return
+        async with slot:
+            if upload.failed:
+                analysis_results[result_id].update(status="failed", error="The upload did not complete")
+                upload.discard()
+                return
+            await slot.run(video_executor, run_analysis, upload, output_path, profile_path)
+
+    def on_start(upload: SpooledUpload):
+        analysis_results[result_id] = {
+            "output_path": None,
+            "upload_path": upload.path,
+            "status": "processing",
+            "timestamp": time.time()
+        }
+
+    def on_header_ready(upload: SpooledUpload):
+        state["ready_at"] = deadline.elapsed()
+        deadline.record("upload_header", state["ready_at"])
+        task = asyncio.create_task(schedule_analysis(upload))
+        background_analyses.add(task)
+        task.add_done_callback(background_analyses.discard)
+        state["task"] = task
+
+    try:
+        await receive_upload(request.stream(), content_type, on_start, on_header_ready)
+    except UploadTooLarge as e:
+        if result_id in analysis_results:
+            analysis_results[result_id].update(status="failed", error=str(e))
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": str(e)}
+        )
+    except (ValueError, ClientDisconnect) as e:
+        if result_id in analysis_results:
+            analysis_results[result_id].update(status="failed", error=str(e) or "Client disconnected")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Upload failed: {str(e) or 'client disconnected'}"}
+        )
+    deadline.record("upload", deadline.elapsed())
+    result = analysis_results[result_id]
+    if "timings" in result:
+        result["timings"] = deadline.timings()
+    logger.info(f"Upload finished for result_id {result_id}; analysis started after {state['ready_at'] * 1000:.0f} ms")
+    return {
+        "resultId": result_id,
+        "status": result.get("status", "processing"),
+        "viewUrl": f"/view/{result_id}",
+        "statusUrl": f"/status/{result_id}"
+    }
+
+@app.get("/status/{result_id}")
+async def get_status(result_id: str):
+    if not result_id or result_id not in analysis_results:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Result not found or has expired")
+    result = analysis_results[result_id]
+    response = {
+        "resultId": result_id,
+        "status": result.get("status", "complete")
+    }
+    if "fake_score" in result:
+        response["fakeScore"] = result["fake_score"]
+    if "near_duplicate" in result:
+        response["nearDuplicate"] = result["near_duplicate"]
+    if "series_id" in result:
+        response["seriesId"] = result["series_id"]
+    if "timings" in result:
+        response["timings"] = result["timings"]
+    if result.get("profile_path"):
+        response["profileUrl"] = f"/profile/{result_id}"
+    if "error" in result:
+        response["error"] = result["error"]
+    return response
+
+@app.get("/cache-stats")
+async def cache_stats():
+    transcript_cache = get_transcript_cache()
+    video_index = get_video_index()
+    return {
+        "transcripts": transcript_cache.stats() if transcript_cache else None,
+        "search": search_cache.stats(),
+        "videos": video_index.stats() if video_index else None
+    }
+
+@app.get("/queue-stats")
+async def queue_stats():
+    return {
+        "analysis": analysis_scheduler.stats(),
+        "download": download_scheduler.stats(),
+        "coalescing": {
+            "download": download_coalescer.stats(),
+            "analysis": analysis_coalescer.stats(),
+            "sharedFiles": file_refs.stats()
+        }
+    }
+
+@app.get("/ready")
+async def ready():
+    if not model_readiness["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=model_readiness
+        )
+    return model_readiness
+
+@app.get("/worker-memory")
+async def worker_memory():
+    return {
+        "videoWorkers": VIDEO_WORKERS,
+        **process_memory()
+    }
+
+@app.get("/upstream-health")
+async def upstream_health():
+    breakers = breaker_states()
+    return {
+        "healthy": all(breaker["state"] != "open" for breaker in breakers.values()),
+        "services": breakers
+    }
+
+class RescoreRequest(BaseModel):
+    seriesIds: Optional[List[str]] = None
+    thresholdFaceSimilarity: float = FrameAnalyzer.threshold_face_similarity
+    thresholdFramesForDeepfake: float = FrameAnalyzer.threshold_frames_for_deepfake
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "thresholdFaceSimilarity": 0.985,
+                "thresholdFramesForDeepfake": 10
+            }
+        }
+
+@app.post("/rescore")
+async def rescore_series(data: RescoreRequest):
+    if not EMBEDDING_STORE_DIR:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Embedding storage is disabled; set EMBEDDING_STORE_DIR"}
+        )
+    if not 0 < data.thresholdFaceSimilarity <= 1 or data.thresholdFramesForDeepfake <= 0:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "thresholdFaceSimilarity must be in (0, 1] and thresholdFramesForDeepfake must be positive"}
+        )
+    started = time.time()
+    rescored = await asyncio.to_thread(
+        rescore_corpus,
+        data.seriesIds,
+        data.thresholdFaceSimilarity,
+        data.thresholdFramesForDeepfake
+    )
+    scores = [result["fakeScore"] for result in rescored["results"]]
+    return {
+        **rescored,
+        "count": len(scores),
+        "meanScore": round(sum(scores) / len(scores), 2) if scores else None,
+        "elapsedMs": round((time.time() - started) * 1000, 1)
+    }
+
 class AudioAnalysisRequest(BaseModel):
     audioPath: str
+    budgetMs: Optional[int] = None
+    stream: Optional[bool] = None
     
     class Config:
         json_schema_extra = {
@@ -662,7 +1441,8 @@ class AudioAnalysisRequest(BaseModel):
         }
 
 @app.post("/analyze-audio")
-async def analyze_audio(data: AudioAnalysisRequest, background_tasks: BackgroundTasks):
+async def analyze_audio(data: AudioAnalysisRequest, request: Request, background_tasks: BackgroundTasks):
+    deadline = deadline_from_request(request.headers, data.budgetMs)
     audio_path = data.audioPath
     if not audio_path:
         return JSONResponse(
@@ -684,43 +1464,205 @@ async def analyze_audio(data: AudioAnalysisRequest, background_tasks: Background
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": "Audio file is empty"}
         )
+    if has_news_features and transcribe_audio and perform_search and judge_content:
+        if not GEMINI_API_KEY:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"error": "Gemini API key not configured"}
+            )
+        if not TAVILY_API_KEY:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"error": "Tavily API key not configured"}
+            )
+    if data.stream:
+        return stream_progress(lambda on_update: analyze_audio_file(audio_path, deadline, on_update))
     try:
-        news_score = 0
-        news_summary = "Could not analyze audio content"
-        news_evidence = []
-        news_result = {}
-        if has_news_features and transcribe_audio and perform_search and judge_content:
-            try:
-                logger.info(f"Starting transcription of audio: {audio_path}")
-                transcription = transcribe_audio(audio_path)
-                if transcription:
-                    from web.utils.judge import generate_search_query
-                    if not GEMINI_API_KEY:
-                        return JSONResponse(
-                            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                            content={"error": "Gemini API key not configured"}
-                        )
-                    if not TAVILY_API_KEY:
-                        return JSONResponse(
-                            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                            content={"error": "Tavily API key not configured"}
-                        )
-                    logger.info("Generating search query from transcription")
+        return await analyze_audio_file(audio_path, deadline)
+    except Exception as e:
+        logger.error(f"Error during audio analysis: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": f"Failed to analyze audio: {str(e)}"}
+        )
+
+def audio_analysis_response(
+    audio_path: str,
+    news_score: int,
+    news_summary: str,
+    news_evidence: list,
+    news_result: Dict[str, Any],
+    deadline: Deadline
+) -> Dict[str, Any]:
+    result_id = str(uuid.uuid4())
+    analysis_results[result_id] = {
+        "audio_path": audio_path,
+        "news_score": news_score,
+        "news_summary": news_summary,
+        "news_evidence": news_evidence,
+        "verdict": news_result.get("verdict", "Uncertain"),
+        "timings": deadline.timings(),
+        "timestamp": time.time()
+    }
+    response = {
+        "newsScore": news_score,
+        "newsSummary": news_summary,
+        "resultId": result_id,
+        "cutStages": deadline.cut_stages(),
+        "timings": analysis_results[result_id]["timings"]
+    }
+    if news_result and "verdict" in news_result:
+        response["verdict"] = news_result.get("verdict", "Uncertain")
+        response["confidence"] = news_result.get("confidence", 0)
+    if news_evidence:
+        response["evidence"] = [
+            {
+                "title": source.get("title", ""),
+                "url": source.get("url", "")
+            } for source in news_evidence[:3]
+        ]
+    logger.info(f"Audio analysis completed with news_score: {news_score}, result_id: {result_id}")
+    return response
+
+async def analyze_audio_file(audio_path: str, deadline: Deadline, on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    news = await analyze_news_branch(audio_path, deadline, on_update)
+    return audio_analysis_response(audio_path, news["news_score"], news["news_summary"], news["news_evidence"], news["news_result"], deadline)
+
+def stream_progress(work: Callable[[Callable[[Dict[str, Any]], None]], Awaitable[Any]]) -> StreamingResponse:
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            result = await work(queue.put_nowait)
+        except Exception as e:
+            logger.error(f"Error during streamed analysis: {str(e)}")
+            result = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": f"Failed to analyze content: {str(e)}"}
+            )
+        if isinstance(result, JSONResponse):
+            queue.put_nowait({"event": "error", "status": result.status_code, "error": response_error(result)})
+        else:
+            queue.put_nowait({"event": "result", **result})
+        queue.put_nowait(None)
+
+    async def events():
+        task = asyncio.create_task(produce())
+        try:
+            while (event := await queue.get()) is not None:
+                yield json.dumps(event) + "\n"
+        finally:
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+class CombinedAnalysisRequest(BaseModel):
+    videoPath: str
+    audioPath: Optional[str] = None
+    budgetMs: Optional[int] = None
+    profile: Optional[bool] = None
+    stream: Optional[bool] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "videoPath": "/tmp/video_123456.mp4",
+                "audioPath": "/tmp/audio_123456.mp3"
+            }
+        }
+
+def judge_skipped_result(search_results: list) -> Dict[str, Any]:
+    return {
+        "verdict": "Uncertain",
+        "confidence": 25,
+        "reasoning": "Fact-check skipped to stay within the time budget; see the sources found so far",
+        "sources": search_results[:3]
+    }
+
+async def judge_progressively(
+    transcription: str,
+    search_results: list,
+    deadline: Deadline,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    partial: Dict[str, Any] = {}
+    started = time.monotonic()
+
+    def on_field(name: str, value: Any) -> None:
+        had_verdict = "verdict" in partial and "confidence" in partial
+        partial[name] = value
+        if not had_verdict and "verdict" in partial and "confidence" in partial:
+            deadline.record("judge_verdict", time.monotonic() - started)
+            if on_update is not None:
+                on_update({"event": "verdict", "verdict": partial["verdict"], "confidence": partial["confidence"], "atMs": int(deadline.elapsed() * 1000)})
+        elif on_update is not None and name in ("reasoning", "sources"):
+            on_update({"event": name, name: value})
+
+    try:
+        return await within_deadline(judge_content_async(transcription, search_results, GEMINI_API_KEY, on_field=on_field), deadline, "judge", minimum=MIN_JUDGE_SECONDS)
+    except StageCut:
+        result = {**judge_skipped_result(search_results), **partial}
+        if "verdict" in partial:
+            logger.info(f"Using the partial verdict {partial['verdict']} streamed before the time budget ran out")
+            if "reasoning" not in partial:
+                result["reasoning"] = "Verdict given before the time budget ran out; the full reasoning was cut"
+        return result
+    except Exception as e:
+        if "verdict" not in partial:
+            raise
+        logger.warning(f"Keeping the streamed verdict {partial['verdict']} after the judge failed: {str(e)}")
+        result = {**judge_skipped_result(search_results), **partial}
+        if "reasoning" not in partial:
+            result["reasoning"] = "Verdict given before the fact-check failed; the full reasoning is unavailable"
+        return result
+
+async def analyze_news_branch(
+    audio_path: Optional[str],
+    deadline: Deadline,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    news_score = 0
+    news_summary = "Could not analyze audio content"
+    news_evidence = []
+    news_result = {}
+    audio_used_path = None
+    if has_news_features and transcribe_audio and perform_search and judge_content and audio_path:
+        try:
+            audio_used_path = audio_path
+            logger.info(f"Transcribing audio from {audio_path}")
+            transcription = await within_deadline(transcribe_audio_async(audio_path), deadline, "transcription", reserve=MIN_JUDGE_SECONDS)
+            if transcription and on_update is not None:
+                on_update({"event": "transcribed", "characters": len(transcription)})
+            if transcription:
+                if not GEMINI_API_KEY:
+                    logger.warning("Gemini API key not configured")
+                    news_summary = "News analysis unavailable: Gemini API key not configured"
+                elif not TAVILY_API_KEY:
+                    logger.warning("Tavily API key not configured")
+                    news_summary = "News analysis unavailable: Tavily API key not configured"
+                else:
+                    from web.utils.judge import generate_search_queries_async
+                    logger.info("Generating search queries from transcription")
                     try:
-                        search_query = generate_search_query(transcription, GEMINI_API_KEY)
-                        if not search_query:
-                            words = transcription.split()[:30]
-                            search_query = " ".join(words)
-                            search_query = search_query[:350]
-                            logger.warning(f"Generated fallback search query: {search_query}")
+                        search_queries = await within_deadline(generate_search_queries_async(transcription, GEMINI_API_KEY), deadline, "query_generation", reserve=MIN_JUDGE_SECONDS + 1)
                     except Exception as e:
-                        logger.warning(f"Failed to generate search query: {str(e)}")
-                        words = transcription.split()[:30]
-                        search_query = " ".join(words)
-                        search_query = search_query[:350]
-                        logger.warning(f"Generated fallback search query: {search_query}")
-                    logger.info(f"Searching for related content with query: {search_query}")
-                    search_results = perform_search(search_query, TAVILY_API_KEY)
+                        logger.warning(f"Failed to generate search queries: {str(e)}")
+                        search_queries = []
+                    if not search_queries:
+                        search_queries = [" ".join(transcription.split()[:30])[:350]]
+                        logger.warning(f"Generated fallback search query: {search_queries[0]}")
+                    if on_update is not None:
+                        on_update({"event": "queries", "queries": search_queries})
+                    logger.info(f"Performing searches with queries: {search_queries}")
+                    with deadline.timed("search"):
+                        search_results = await perform_multi_search_async(
+                            search_queries,
+                            TAVILY_API_KEY,
+                            deadline_seconds=deadline.timeout(SEARCH_DEADLINE_SECONDS, reserve=MIN_JUDGE_SECONDS),
+                            on_deadline=lambda missed, total: deadline.cut("search", f"{missed} of {total} searches stopped at the time budget")
+                        )
+                    if on_update is not None:
+                        on_update({"event": "searched", "results": len(search_results or [])})
                     if not search_results:
                         logger.warning("No search results returned")
                         news_result = {
@@ -732,7 +1674,7 @@ async def analyze_audio(data: AudioAnalysisRequest, background_tasks: Background
                     else:
                         try:
                             logger.info("Analyzing content credibility")
-                            news_result = judge_content(transcription, search_results, GEMINI_API_KEY)
+                            news_result = await judge_progressively(transcription, search_results, deadline, on_update)
                         except Exception as e:
                             logger.error(f"Content credibility analysis failed: {str(e)}")
                             news_result = {
@@ -756,61 +1698,32 @@ async def analyze_audio(data: AudioAnalysisRequest, background_tasks: Background
                         news_score = news_result.get("score", 0)
                         news_summary = news_result.get("summary", "No summary provided")
                         news_evidence = news_result.get("evidence", [])
-                else:
-                    logger.warning(f"Failed to transcribe audio: {audio_path}")
-            except Exception as e:
-                logger.error(f"Audio processing failed: {str(e)}")
-                news_summary = f"Audio analysis error: {str(e)}"
-        else:
-            logger.warning("News features not available for audio analysis")
-            news_summary = "News analysis features not available"
-        result_id = str(uuid.uuid4())
-        analysis_results[result_id] = {
-            "audio_path": audio_path,
-            "news_score": news_score,
-            "news_summary": news_summary,
-            "news_evidence": news_evidence,
-            "verdict": news_result.get("verdict", "Uncertain"),
-            "timestamp": time.time()
-        }
-        response = {
-            "newsScore": news_score,
-            "newsSummary": news_summary,
-            "resultId": result_id
-        }
-        if news_result and "verdict" in news_result:
-            response["verdict"] = news_result.get("verdict", "Uncertain")
-            response["confidence"] = news_result.get("confidence", 0)
-        if news_evidence:
-            response["evidence"] = [
-                {
-                    "title": source.get("title", ""),
-                    "url": source.get("url", "")
-                } for source in news_evidence[:3]
-            ]
-        logger.info(f"Audio analysis completed with news_score: {news_score}, result_id: {result_id}")
-        return response
-    except Exception as e:
-        logger.error(f"Error during audio analysis: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"error": f"Failed to analyze audio: {str(e)}"}
-        )
-
-class CombinedAnalysisRequest(BaseModel):
-    videoPath: str
-    audioPath: Optional[str] = None
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "videoPath": "/tmp/video_123456.mp4",
-                "audioPath": "/tmp/audio_123456.mp3"
-            }
-        }
+            else:
+                logger.warning(f"Failed to transcribe audio from {audio_path}")
+                news_summary = "Could not transcribe audio content"
+        except StageCut as e:
+            logger.warning(str(e))
+            news_summary = f"Audio analysis incomplete: {str(e)}"
+        except Exception as e:
+            logger.error(f"Audio processing error: {str(e)}")
+            news_summary = f"Audio analysis error: {str(e)}"
+    elif not audio_path:
+        logger.warning("No audio path provided for news analysis")
+        news_summary = "No audio content provided for analysis"
+    else:
+        logger.warning("News features not available")
+        news_summary = "News analysis features not available"
+    return {
+        "news_score": news_score,
+        "news_summary": news_summary,
+        "news_evidence": news_evidence,
+        "news_result": news_result,
+        "audio_used_path": audio_used_path
+    }
 
 @app.post("/analyze-combined")
-async def analyze_combined(data: CombinedAnalysisRequest, background_tasks: BackgroundTasks):
+async def analyze_combined(data: CombinedAnalysisRequest, request: Request, background_tasks: BackgroundTasks):
+    deadline = deadline_from_request(request.headers, data.budgetMs)
     video_path = data.videoPath
     audio_path = data.audioPath
     if not video_path:
@@ -849,84 +1762,86 @@ async def analyze_combined(data: CombinedAnalysisRequest, background_tasks: Back
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"error": "Audio file is empty"}
             )
+    priority = priority_from_request(request.headers)
+    profile = profile_requested(request.headers, data.profile)
+
+    def coalesced_analysis(on_update: Optional[Callable[[Dict[str, Any]], None]]):
+        return analysis_coalescer.run_with_progress(
+            combined_analysis_key(video_path, audio_path, profile),
+            lambda emit: analyze_combined_files(video_path, audio_path, deadline, priority, profile, emit),
+            on_update
+        )
+
+    if data.stream:
+        async def analyze_streamed(on_update: Callable[[Dict[str, Any]], None]):
+            result, coalesced = await coalesced_analysis(on_update)
+            if isinstance(result, dict):
+                file_refs.release(video_path)
+                if coalesced:
+                    result = dict(result, coalesced=True)
+            return result
+
+        return stream_progress(analyze_streamed)
+    result, coalesced = await coalesced_analysis(None)
+    if isinstance(result, dict):
+        background_tasks.add_task(file_refs.release, video_path)
+        if coalesced:
+            result = dict(result, coalesced=True)
+    return result
+
+def combined_analysis_key(video_path: str, audio_path: Optional[str], profile: bool = False) -> tuple:
+    video_key = file_refs.key_for(video_path) or ("path", os.path.realpath(video_path))
+    audio_key = os.path.realpath(audio_path) if audio_path else None
+    return ("analyze-combined", video_key, audio_key, profile)
+
+async def analyze_combined_files(
+    video_path: str,
+    audio_path: Optional[str],
+    deadline: Deadline,
+    priority: int,
+    profile: bool = False,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+):
     try:
-        output_path = video_path.replace(".mp4", "_output.mp4")
-        logger.info(f"Starting video analysis for {video_path}")
+        output_path = annotated_output_path(video_path)
+        profile_path = profile_path_for(output_path) if profile else None
+        video_future = asyncio.create_task(analyze_video_file(video_path, output_path, deadline, priority, profile_path))
+        news_task = asyncio.create_task(analyze_news_branch(audio_path, deadline, on_update))
         try:
-            fake_score = run(video_path, output_path)
+            fake_score, near_duplicate, series_id = await video_future
+            if on_update is not None:
+                on_update({"event": "visual", "fakeScore": fake_score, "atMs": int(deadline.elapsed() * 1000)})
+        except asyncio.CancelledError:
+            news_task.cancel()
+            raise
+        except QueueFull as e:
+            news_task.cancel()
+            return queue_full_response(e)
         except Exception as e:
+            news_task.cancel()
             logger.error(f"Video analysis failed: {str(e)}")
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": f"Video analysis failed: {str(e)}"}
             )
-        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        if near_duplicate:
+            output_path = None
+        elif not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            news_task.cancel()
             logger.error(f"No output video generated at {output_path}")
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": "Video analysis failed: No output video generated"}
             )
-        news_score = 0
-        news_summary = "Could not analyze audio content"
-        news_evidence = []
-        news_result = {}
-        audio_used_path = None
-        if has_news_features and transcribe_audio and perform_search and judge_content and audio_path:
-            try:
-                audio_used_path = audio_path
-                logger.info(f"Transcribing audio from {audio_path}")
-                transcription = transcribe_audio(audio_path)
-                if transcription:
-                    if not GEMINI_API_KEY:
-                        logger.warning("Gemini API key not configured")
-                        news_summary = "News analysis unavailable: Gemini API key not configured"
-                    elif not TAVILY_API_KEY:
-                        logger.warning("Tavily API key not configured")
-                        news_summary = "News analysis unavailable: Tavily API key not configured"
-                    else:
-                        from web.utils.judge import generate_search_query
-                        logger.info("Generating search query from transcription")
-                        search_query = generate_search_query(transcription, GEMINI_API_KEY)
-                        if search_query:
-                            logger.info(f"Performing search with query: {search_query}")
-                            search_results = perform_search(search_query, TAVILY_API_KEY)
-                            if search_results:
-                                logger.info("Analyzing content credibility")
-                                news_result = judge_content(transcription, search_results, GEMINI_API_KEY)
-                                if "verdict" in news_result:
-                                    verdict_scores = {
-                                        "Authentic": 100,
-                                        "Misleading": 50, 
-                                        "Fake": 0,
-                                        "Uncertain": 25
-                                    }
-                                    verdict = news_result.get("verdict", "Uncertain")
-                                    news_score = news_result.get("confidence", verdict_scores.get(verdict, 0))
-                                    news_summary = news_result.get("reasoning", "No reasoning provided")
-                                    news_evidence = news_result.get("sources", [])
-                                else:
-                                    news_score = news_result.get("score", 0)
-                                    news_summary = news_result.get("summary", "No summary provided")
-                                    news_evidence = news_result.get("evidence", [])
-                            else:
-                                logger.warning("No search results returned")
-                                news_summary = "Could not find relevant information to verify content"
-                        else:
-                            logger.warning("Failed to generate search query")
-                            news_summary = "Could not analyze content: Failed to generate search query"
-                else:
-                    logger.warning(f"Failed to transcribe audio from {audio_path}")
-                    news_summary = "Could not transcribe audio content"
-            except Exception as e:
-                logger.error(f"Audio processing error: {str(e)}")
-                news_summary = f"Audio analysis error: {str(e)}"
-        elif not audio_path:
-            logger.warning("No audio path provided for news analysis")
-            news_summary = "No audio content provided for analysis"
-        else:
-            logger.warning("News features not available")
-            news_summary = "News analysis features not available"
+        news = await news_task
+        news_score = news["news_score"]
+        news_summary = news["news_summary"]
+        news_evidence = news["news_evidence"]
+        news_result = news["news_result"]
+        audio_used_path = news["audio_used_path"]
         result_id = str(uuid.uuid4())
+        timings = deadline.timings()
+        profile_path = profile_path if profile_path and os.path.exists(profile_path) else None
         analysis_results[result_id] = {
             "output_path": output_path,
             "audio_path": audio_used_path if audio_used_path and os.path.exists(audio_used_path) else None,
@@ -935,24 +1850,26 @@ async def analyze_combined(data: CombinedAnalysisRequest, background_tasks: Back
             "news_summary": news_summary,
             "news_evidence": news_evidence,
             "verdict": news_result.get("verdict", "Uncertain"),
+            "timings": timings,
+            "profile_path": profile_path,
             "timestamp": time.time()
         }
-
-        def delete_input_video():
-            try:
-                if os.path.exists(video_path):
-                    os.unlink(video_path)
-                    logger.info(f"Deleted input video: {video_path}")
-            except Exception as e:
-                logger.error(f"Failed to delete input video {video_path}: {str(e)}")
-        
-        background_tasks.add_task(delete_input_video)
+        if near_duplicate:
+            analysis_results[result_id]["near_duplicate"] = near_duplicate
         response = {
             "fakeScore": fake_score,
             "newsScore": news_score,
             "newsSummary": news_summary,
-            "resultId": result_id
+            "resultId": result_id,
+            "cutStages": deadline.cut_stages(),
+            "timings": timings
         }
+        if profile_path:
+            response["profileUrl"] = f"/profile/{result_id}"
+        if near_duplicate:
+            response["nearDuplicate"] = near_duplicate
+        if series_id:
+            response["seriesId"] = series_id
         if news_result and "verdict" in news_result:
             response["verdict"] = news_result.get("verdict", "Uncertain")
             response["confidence"] = news_result.get("confidence", 0)
@@ -965,6 +1882,8 @@ async def analyze_combined(data: CombinedAnalysisRequest, background_tasks: Back
             ]
         logger.info(f"Combined analysis completed with fake_score: {fake_score}, news_score: {news_score}, result_id: {result_id}")
         return response
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         logger.error(f"Error during combined analysis: {str(e)}")
         return JSONResponse(
@@ -972,5 +1891,252 @@ async def analyze_combined(data: CombinedAnalysisRequest, background_tasks: Back
             content={"error": f"Failed to analyze content: {str(e)}"}
         )
 
+class LiveAnalysisRequest(BaseModel):
+    playlistUrl: str
+    windowSeconds: float = LIVE_WINDOW_SECONDS
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "playlistUrl": "https://example.com/live/stream.m3u8",
+                "windowSeconds": 30
+            }
+        }
+
+def launch_live_session(session: LiveSession) -> None:
+    slot = analysis_scheduler.slot(PRIORITY_INTERACTIVE, timed=False)
+
+    async def run_session():
+        try:
+            async with slot:
+                loop = asyncio.get_running_loop()
+                finished = loop.create_future()
+
+                def finish():
+                    if not finished.done():
+                        finished.set_result(None)
+
+                def notify():
+                    try:
+                        loop.call_soon_threadsafe(finish)
+                    except RuntimeError:
+                        pass
+
+                session.on_finish = notify
+                slot.hold(finished)
+                try:
+                    session.start()
+                except Exception:
+                    finish()
+                    raise
+        except asyncio.CancelledError:
+            if not session.is_alive():
+                session.status = "stopped"
+            raise
+        except Exception as e:
+            logger.error(f"Live session {session.session_id} failed to start: {str(e)}")
+            session.status = "failed"
+            session.error = str(e)
+
+    task = asyncio.create_task(run_session())
+    background_analyses.add(task)
+    task.add_done_callback(background_analyses.discard)
+
+@app.post("/live")
+async def start_live(data: LiveAnalysisRequest):
+    if not data.playlistUrl:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Missing playlist URL"}
+        )
+    try:
+        session = start_live_session(data.playlistUrl, max(1.0, data.windowSeconds), launch_live_session)
+    except QueueFull as e:
+        return queue_full_response(e)
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": "Too many live sessions are running"},
+            headers={"Retry-After": "60"}
+        )
+    logger.info(f"Started live session {session.session_id} for {data.playlistUrl}")
+    return {
+        "sessionId": session.session_id,
+        "statusUrl": f"/live/{session.session_id}",
+        "eventsUrl": f"/live/{session.session_id}/events"
+    }
+
+@app.get("/live/{session_id}")
+async def get_live(session_id: str):
+    session = live_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+    return session.snapshot()
+
+@app.delete("/live/{session_id}")
+async def stop_live(session_id: str):
+    session = live_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+    session.stop()
+    return {"sessionId": session_id, "status": "stopping"}
+
+@app.get("/live/{session_id}/events")
+async def live_events(session_id: str):
+    session = live_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+
+    async def event_stream():
+        queue = session.subscribe()
+        try:
+            yield f"data: {json.dumps({'type': 'snapshot', **session.snapshot()})}\n\n"
+            if not session.active():
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+                if event["type"] == "end":
+                    break
+        finally:
+            session.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-store"})
+
+class BatchAnalysisRequest(BaseModel):
+    items: List[str]
+    concurrency: Optional[int] = None
+    quality: str = "360p"
+    audioFormat: str = "mp3"
+    budgetMs: Optional[int] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                    "/data/archive/clip_0001.mp4"
+                ],
+                "concurrency": 4
+            }
+        }
+
+def response_error(response: JSONResponse) -> str:
+    try:
+        return json.loads(response.body).get("error", "Unknown error")
+    except (ValueError, AttributeError):
+        return f"Request failed with status {response.status_code}"
+
+async def run_when_admitted(work, budget_ms: Optional[int]):
+    while True:
+        deadline = deadline_from_request(None, budget_ms)
+        result, coalesced = await work(deadline)
+        if isinstance(result, JSONResponse) and result.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            await asyncio.sleep(min(BATCH_RETRY_MAX_WAIT, float(result.headers.get("retry-after", "1"))))
+            continue
+        return result, coalesced
+
+async def analyze_batch_item(index: int, item: str, data: BatchAnalysisRequest) -> Dict[str, Any]:
+    started = time.time()
+    entry: Dict[str, Any] = {"index": index, "item": item}
+    downloaded = item.startswith(("http://", "https://"))
+    if downloaded:
+        platform, extracted_id = get_platform_and_video_id(item)
+        if not platform or not extracted_id:
+            return {**entry, "status": "error", "error": "Unsupported URL format"}
+        files, _ = await run_when_admitted(
+            lambda deadline: download_coalescer.run(
+                ("download-combined", platform, extracted_id, data.audioFormat, data.quality),
+                lambda: download_combined_files(item, platform, extracted_id, data.audioFormat, data.quality, deadline, PRIORITY_BATCH)
+            ),
+            data.budgetMs
+        )
+        if not isinstance(files, dict):
+            return {**entry, "status": "error", "error": response_error(files)}
+        video_path = files["videoPath"]
+        audio_path = files.get("audioPath")
+        file_refs.acquire(video_path, (platform, extracted_id))
+    else:
+        video_path = item
+        audio_path = None
+        if not os.path.isfile(video_path) or os.path.getsize(video_path) == 0:
+            return {**entry, "status": "error", "error": "Video file not found, not a file or empty"}
+    try:
+        result, coalesced = await run_when_admitted(
+            lambda deadline: analysis_coalescer.run(
+                combined_analysis_key(video_path, audio_path),
+                lambda: analyze_combined_files(video_path, audio_path, deadline, PRIORITY_BATCH)
+            ),
+            data.budgetMs
+        )
+    finally:
+        if downloaded:
+            file_refs.release(video_path)
+    if not isinstance(result, dict):
+        return {**entry, "status": "error", "error": response_error(result), "elapsedSeconds": round(time.time() - started, 2)}
+    return {
+        **entry,
+        "status": "ok",
+        **result,
+        "coalesced": coalesced,
+        "viewUrl": f"/view/{result['resultId']}",
+        "elapsedSeconds": round(time.time() - started, 2)
+    }
+
+@app.post("/analyze-batch")
+async def analyze_batch(data: BatchAnalysisRequest):
+    if not data.items:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "No items provided"}
+        )
+    if len(data.items) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Too many items, the limit is {BATCH_MAX_ITEMS}"}
+        )
+    concurrency = max(1, min(data.concurrency or VIDEO_WORKERS, VIDEO_WORKERS + ANALYSIS_QUEUE_LIMIT))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_item(index: int, item: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await analyze_batch_item(index, item, data)
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                return {"index": index, "item": item, "status": "error", "error": str(e)}
+
+    async def stream_results():
+        started = time.time()
+        succeeded = 0
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(data.items)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result["status"] == "ok":
+                    succeeded += 1
+                yield json.dumps(result) + "\n"
+            elapsed = time.time() - started
+            yield json.dumps({
+                "done": True,
+                "total": len(tasks),
+                "succeeded": succeeded,
+                "failed": len(tasks) - succeeded,
+                "elapsedSeconds": round(elapsed, 2),
+                "itemsPerMinute": round(len(tasks) * 60 / elapsed, 2) if elapsed > 0 else None
+            }) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"Starting batch analysis of {len(data.items)} items with concurrency {concurrency}")
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=5001)
\ No newline at end of file
+    host = os.getenv("SERVER_HOST", "0.0.0.0")
+    port = int(os.getenv("SERVER_PORT", "5001"))
+    uvicorn.run(app, host=host, port=port)
\ No newline at end of file
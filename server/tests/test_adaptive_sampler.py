@@ -0,0 +1,44 @@
+import numpy as np
+from model import AdaptiveSampler
+
+def solid(value):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+def decisions(sampler, frames):
+    return [sampler.decide(frame, index)[0] for index, frame in enumerate(frames)]
+
+def test_static_frames_reuse_the_last_inference_until_the_max_gap():
+    sampler = AdaptiveSampler(fps=10, base_stride=2)
+    assert decisions(sampler, [solid(100)] * 24) == [
+        "infer", "skip", "reuse", "skip", "reuse", "skip", "reuse", "skip", "reuse", "skip",
+        "infer", "skip", "reuse", "skip", "reuse", "skip", "reuse", "skip", "reuse", "skip",
+        "infer", "skip", "reuse", "skip",
+    ]
+    assert sampler.inferences == 3
+    assert sampler.reused == 9
+    assert sampler.scene_cuts == 0
+
+def test_small_changes_count_as_static():
+    sampler = AdaptiveSampler(fps=10, base_stride=1)
+    assert decisions(sampler, [solid(100), solid(101)]) == ["infer", "reuse"]
+
+def test_scene_cut_forces_inference_between_strides():
+    sampler = AdaptiveSampler(fps=10, base_stride=4)
+    assert decisions(sampler, [solid(20), solid(20), solid(220)]) == ["infer", "skip", "infer"]
+    action, weight, scene_cut = sampler.decide(solid(20), 3)
+    assert (action, scene_cut) == ("infer", True)
+    assert weight == 0.25
+    assert sampler.scene_cuts == 2
+
+def test_sampling_is_dense_after_a_scene_cut():
+    sampler = AdaptiveSampler(fps=10, base_stride=4)
+    decisions(sampler, [solid(20), solid(220)])
+    assert sampler.dense_until == 6
+    assert [sampler.decide(solid(220), index)[0] for index in range(2, 10)] == [
+        "skip", "reuse", "skip", "reuse", "skip", "skip", "skip", "reuse",
+    ]
+
+def test_weights_cover_the_skipped_frames():
+    sampler = AdaptiveSampler(fps=30, base_stride=3)
+    weights = [weight for action, weight, _ in (sampler.decide(solid(50), index) for index in range(9)) if action != "skip"]
+    assert weights == [1.0, 1.0, 1.0]
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from coalesce import (
+    FileRefs,
+    InflightCoalescer
+)
+
+def test_followers_share_one_run():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        runs = []
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+        results = await asyncio.gather(*(coalescer.run("key", work) for _ in range(3)))
+        return coalescer, runs, results
+    coalescer, runs, results = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert sorted(results) == [(42, False), (42, True), (42, True)]
+    assert coalescer.stats() == {"inFlight": 0, "leaders": 1, "followers": 2, "abandoned": 0}
+
+def test_distinct_keys_run_separately():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+        return await asyncio.gather(coalescer.run("a", lambda: work(1)), coalescer.run("b", lambda: work(2)))
+    assert asyncio.run(scenario()) == [(1, False), (2, False)]
+
+def test_follower_survives_a_cancelled_leader():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        release = asyncio.Event()
+        runs = []
+        async def work():
+            runs.append(1)
+            await release.wait()
+            return 42
+        leader = asyncio.create_task(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return coalescer, runs, result
+    coalescer, runs, result = asyncio.run(scenario())
+    assert result == (42, True)
+    assert len(runs) == 1
+    assert coalescer.abandoned == 0
+
+def test_work_is_cancelled_when_every_waiter_leaves():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        cancelled = asyncio.Event()
+        async def work():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        waiters = [asyncio.create_task(coalescer.run("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return coalescer
+    coalescer = asyncio.run(scenario())
+    assert coalescer.abandoned == 1
+    assert coalescer.stats()["inFlight"] == 0
+
+def test_new_request_after_abandonment_starts_fresh_work():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        runs = []
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return len(runs)
+        first = asyncio.create_task(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        return await coalescer.run("key", work)
+    assert asyncio.run(scenario()) == (2, False)
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+        return await asyncio.gather(*(coalescer.run("key", work) for _ in range(2)), return_exceptions=True)
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["boom", "boom"]
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_late_follower_replays_earlier_progress():
+    async def scenario():
+        coalescer = InflightCoalescer("test")
+        halfway = asyncio.Event()
+        release = asyncio.Event()
+        async def work(emit):
+            emit("started")
+            halfway.set()
+            await release.wait()
+            emit("finished")
+            return "done"
+        leader_events, follower_events = [], []
+        leader = asyncio.create_task(coalescer.run_with_progress("key", work, leader_events.append))
+        await halfway.wait()
+        follower = asyncio.create_task(coalescer.run_with_progress("key", work, follower_events.append))
+        await asyncio.sleep(0)
+        release.set()
+        return await leader, await follower, leader_events, follower_events
+    leader, follower, leader_events, follower_events = asyncio.run(scenario())
+    assert leader == ("done", False)
+    assert follower == ("done", True)
+    assert leader_events == follower_events == ["started", "finished"]
+
+def test_file_refs_delete_on_last_release(tmp_path):
+    path = tmp_path / "input.mp4"
+    path.write_bytes(b"data")
+    refs = FileRefs()
+    refs.acquire(str(path), "key")
+    refs.acquire(str(path))
+    assert refs.key_for(str(path)) == "key"
+    refs.release(str(path))
+    assert path.exists()
+    refs.release(str(path))
+    assert not path.exists()
+    assert refs.stats() == {"files": 0, "references": 0}
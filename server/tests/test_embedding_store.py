@@ -0,0 +1,86 @@
+import os
+import time
+import numpy as np
+import pytest
+from embedding_store import (
+    EMBEDDING_DIM,
+    SeriesRecorder,
+    list_series,
+    load_series,
+    prune_series,
+    series_prefix
+)
+from model import (
+    rescore,
+    rescore_corpus
+)
+
+def save_series(directory, series_id, similarities, reused=(), **metadata):
+    recorder = SeriesRecorder()
+    for index, similarity in enumerate(similarities):
+        embedding = np.full(EMBEDDING_DIM, 0.5, dtype=np.float32) if similarity is not None else None
+        box = (1, 2, 3, 4) if similarity is not None else None
+        recorder.record(index, 1.0, index in reused, similarity, box, embedding)
+    recorder.save(series_prefix(series_id, str(directory)), {"frameCount": len(similarities), "fps": 30, **metadata})
+
+def test_series_round_trip(tmp_path):
+    save_series(tmp_path, "abc", [0.5, None], source="clip.mp4")
+    metadata, frames, embeddings = load_series("abc", str(tmp_path))
+    assert metadata["source"] == "clip.mp4"
+    assert metadata["rows"] == 2
+    assert frames.shape == (2, len(metadata["fields"]))
+    assert frames[0, 3] == 0.5
+    assert np.isnan(frames[1, 3])
+    assert list(frames[0, 4:]) == [1, 2, 3, 4]
+    assert embeddings.dtype == np.float16
+    assert embeddings.shape == (2, EMBEDDING_DIM)
+    assert not embeddings[1].any()
+    assert list_series(str(tmp_path)) == ["abc"]
+
+def test_series_ids_cannot_escape_the_directory(tmp_path):
+    with pytest.raises(ValueError):
+        series_prefix("../secrets", str(tmp_path))
+
+def test_prune_by_count_keeps_the_newest(tmp_path):
+    now = time.time()
+    for age, series_id in enumerate(["new", "mid", "old"]):
+        save_series(tmp_path, series_id, [0.5])
+        os.utime(tmp_path / f"{series_id}.json", (now - age * 60, now - age * 60))
+    assert prune_series(str(tmp_path), max_age_seconds=0, max_series=2) == 1
+    assert list_series(str(tmp_path)) == ["mid", "new"]
+    assert not (tmp_path / "old.frames.npy").exists()
+
+def test_prune_by_age(tmp_path):
+    save_series(tmp_path, "stale", [0.5])
+    save_series(tmp_path, "fresh", [0.5])
+    stale = time.time() - 3600
+    os.utime(tmp_path / "stale.json", (stale, stale))
+    assert prune_series(str(tmp_path), max_age_seconds=60, max_series=0) == 1
+    assert list_series(str(tmp_path)) == ["fresh"]
+
+def frames_for(similarities, reused=()):
+    return np.array([
+        (index, 1.0, 1.0 if index in reused else 0.0, np.nan if similarity is None else similarity)
+        for index, similarity in enumerate(similarities)
+    ], dtype=np.float32)
+
+def test_rescore_flags_runs_longer_than_the_threshold():
+    frames = frames_for([0.5] * 10)
+    assert rescore(frames, 10, 30, threshold_face_similarity=0.9, threshold_frames_for_deepfake=3) == 100
+    assert rescore(frames, 10, 30, threshold_face_similarity=0.4, threshold_frames_for_deepfake=3) == 0
+
+def test_rescore_reused_frames_follow_the_last_inference():
+    flagged = frames_for([0.5, 0.5, 0.5, 0.5, None, None], reused={4, 5})
+    cleared = frames_for([0.5, 0.5, 0.5, 0.95, None, None], reused={4, 5})
+    assert rescore(flagged, 6, 30, 0.9, 2) == 96
+    assert rescore(cleared, 6, 30, 0.9, 2) == 16
+
+def test_rescore_frames_without_a_face_do_not_count_as_flagged():
+    frames = frames_for([0.5, 0.5, 0.5, None, None], reused={4})
+    assert rescore(frames, 5, 30, 0.9, 2) == 29
+
+def test_rescore_corpus_reports_missing_series(tmp_path):
+    save_series(tmp_path, "a", [0.5] * 10, source="a.mp4", fakeScore=0)
+    report = rescore_corpus(["a", "gone"], threshold_face_similarity=0.9, threshold_frames_for_deepfake=3, directory=str(tmp_path))
+    assert report["missing"] == ["gone"]
+    assert report["results"] == [{"seriesId": "a", "source": "a.mp4", "originalScore": 0, "fakeScore": 100}]
@@ -0,0 +1,55 @@
+import pytest
+from web.utils.json_stream import (
+    IncrementalJSONParser,
+    parse_json_object
+)
+
+def test_parses_a_complete_object():
+    assert parse_json_object('{"verdict": "Likely True", "confidence": 80}') == {"verdict": "Likely True", "confidence": 80}
+
+def test_emits_each_field_as_soon_as_it_closes():
+    seen = []
+    parser = IncrementalJSONParser(lambda key, value: seen.append((key, value)))
+    parser.feed('{"verdict": "Fal')
+    assert seen == []
+    parser.feed('se", "confid')
+    assert seen == [("verdict", "False")]
+    parser.feed('ence": 12, "reasoning": "n')
+    assert seen == [("verdict", "False"), ("confidence", 12)]
+    parser.feed('one"}')
+    assert seen[-1] == ("reasoning", "none")
+    assert parser.closed
+    assert parser.finish() == {"verdict": "False", "confidence": 12, "reasoning": "none"}
+
+def test_matches_a_single_feed_when_fed_one_character_at_a_time():
+    text = '{"a": {"b": [1, 2, {"c": "}"}]}, "d": "x, y: z", "e": null}'
+    parser = IncrementalJSONParser()
+    for c in text:
+        parser.feed(c)
+    assert parser.finish() == parse_json_object(text)
+
+def test_ignores_structural_characters_inside_strings():
+    result = parse_json_object('{"reasoning": "says \\"{not: json}\\", then [stops]", "sources": ["a,b"]}')
+    assert result == {"reasoning": 'says "{not: json}", then [stops]', "sources": ["a,b"]}
+
+def test_strips_a_markdown_fence():
+    text = 'Here you go:\n```json\n{"verdict": "Uncertain", "confidence": 50}\n```'
+    assert parse_json_object(text) == {"verdict": "Uncertain", "confidence": 50}
+
+def test_ignores_text_after_the_closing_brace():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} trailing {"b": 2}')
+    assert parser.finish() == {"a": 1}
+
+def test_keeps_the_last_member_of_a_truncated_object():
+    assert parse_json_object('{"verdict": "False", "confidence": 30\n```') == {"verdict": "False", "confidence": 30}
+
+def test_skips_a_member_with_an_invalid_value():
+    assert parse_json_object('{"a": nope, "b": 2}') == {"b": 2}
+
+def test_recovers_a_missing_opening_brace():
+    assert parse_json_object('"verdict": "True", "confidence": 90}') == {"verdict": "True", "confidence": 90}
+
+def test_raises_without_an_object():
+    with pytest.raises(ValueError):
+        parse_json_object("I cannot answer that.")
@@ -0,0 +1,56 @@
+import pytest
+from live import (
+    LiveSession,
+    parse_playlist
+)
+
+def test_parse_media_playlist():
+    playlist = parse_playlist("\n".join([
+        "#EXTM3U",
+        "#EXT-X-TARGETDURATION:4",
+        "#EXT-X-MEDIA-SEQUENCE:120",
+        "#EXTINF:3.5,",
+        "seg120.ts",
+        "",
+        "#EXTINF:4.0,live",
+        "https://cdn.example.com/seg121.ts",
+        "seg122.ts",
+    ]), "https://example.com/live/index.m3u8")
+    assert playlist == {
+        "variants": [],
+        "segments": [
+            (120, "https://example.com/live/seg120.ts", 3.5),
+            (121, "https://cdn.example.com/seg121.ts", 4.0),
+            (122, "https://example.com/live/seg122.ts", 4.0),
+        ],
+        "targetDuration": 4.0,
+        "ended": False,
+    }
+
+def test_parse_master_playlist_sorts_variants_by_bandwidth():
+    playlist = parse_playlist("\n".join([
+        "#EXTM3U",
+        "#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720",
+        "hd/index.m3u8",
+        "#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360",
+        "sd/index.m3u8",
+    ]), "https://example.com/master.m3u8")
+    assert playlist["variants"] == [
+        (800000, "https://example.com/sd/index.m3u8"),
+        (2500000, "https://example.com/hd/index.m3u8"),
+    ]
+    assert playlist["segments"] == []
+
+def test_parse_ended_playlist():
+    assert parse_playlist("#EXTM3U\n#EXTINF:2,\na.ts\n#EXT-X-ENDLIST\n", "file:///tmp/")["ended"]
+
+def test_parse_rejects_other_documents():
+    with pytest.raises(ValueError):
+        parse_playlist("<html></html>", "https://example.com/")
+
+def test_window_score_is_the_flagged_share_of_the_window():
+    session = LiveSession("https://example.com/live.m3u8")
+    assert session.window_score() == 0
+    session.window.extend([(0.0, True), (1.0, False), (2.0, False), (3.0, True)])
+    assert session.window_score() == 50
+    assert session.snapshot()["windowScore"] == 50
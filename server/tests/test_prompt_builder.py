@@ -0,0 +1,63 @@
+import json
+from web.utils.prompt_builder import (
+    build_budgeted_prompt,
+    compress_transcript,
+    estimate_tokens,
+    rank_sources,
+    truncate_to_tokens
+)
+
+TRANSCRIPT = (
+    "Um, so yeah, okay. The minister announced that the harbour bridge will close for repairs in March. "
+    "I think the weather is nice today. Police confirmed two arrests after the protest downtown. "
+    "Anyway, thanks for watching and remember to subscribe."
+)
+
+def source(title, snippet, score=0.5, url=None):
+    return {"title": title, "url": url or f"https://example.com/{title.lower().replace(' ', '-')}", "snippet": snippet, "score": score}
+
+SOURCES = [
+    source("Cooking", "A recipe for lemon cake with fresh berries and cream.", 0.2),
+    source("Bridge closure", "The minister announced the harbour bridge will close for repairs starting in March.", 0.91234),
+    source("Protest arrests", "Police confirmed two arrests after a protest downtown on Saturday.", 0.8),
+]
+
+def test_truncate_to_tokens():
+    truncated = truncate_to_tokens("word " * 100, 10)
+    assert truncated.endswith("word …")
+    assert len(truncated) <= 10 * 4 + 2
+    assert truncate_to_tokens("short", 10) == "short"
+
+def test_compress_transcript_keeps_claims_in_order():
+    compressed = compress_transcript(TRANSCRIPT, 30)
+    assert estimate_tokens(compressed) <= 30
+    assert "bridge" in compressed
+    assert "subscribe" not in compressed
+
+def test_rank_sources_prefers_overlapping_sources():
+    ranked = rank_sources(TRANSCRIPT, SOURCES)
+    assert ranked[-1][1]["title"] == "Cooking"
+    assert ranked[0][0] > ranked[-1][0]
+
+def test_budgeted_prompt_keeps_relevant_sources_with_their_score():
+    prompt, selected = build_budgeted_prompt("Judge the claims.", TRANSCRIPT, SOURCES)
+    assert prompt.startswith("Judge the claims.\n\nTRANSCRIPT:\n")
+    titles = [entry["title"] for entry in selected]
+    assert set(titles[:2]) == {"Bridge closure", "Protest arrests"}
+    assert selected[titles.index("Bridge closure")]["score"] == 0.912
+    assert json.loads(prompt.split("SOURCES JSON:\n", 1)[1]) == selected
+
+def test_budgeted_prompt_omits_a_missing_score():
+    _, selected = build_budgeted_prompt("Judge.", TRANSCRIPT, [{"title": "Bridge", "url": "u", "snippet": "bridge repairs"}])
+    assert "score" not in selected[0]
+
+def test_budgeted_prompt_stays_within_a_small_budget():
+    sources = [source(f"Bridge {i}", "The harbour bridge will close for repairs in March. " * 40) for i in range(20)]
+    prompt, selected = build_budgeted_prompt("Judge.", TRANSCRIPT * 20, sources, token_budget=600)
+    assert estimate_tokens(prompt) <= 700
+    assert 2 <= len(selected) < 20
+
+def test_budgeted_prompt_without_sources():
+    prompt, selected = build_budgeted_prompt("Judge.", TRANSCRIPT, [])
+    assert selected == []
+    assert prompt.endswith("SOURCES JSON:\n[]")
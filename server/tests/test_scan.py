@@ -0,0 +1,76 @@
+import os
+import csv
+import json
+from scan import (
+    file_signature,
+    find_videos,
+    load_manifest,
+    main,
+    summarize
+)
+
+def write_manifest(path, entries, extra_lines=()):
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        for line in extra_lines:
+            f.write(line)
+
+def test_find_videos_is_recursive_and_filters_extensions(tmp_path):
+    (tmp_path / "nested").mkdir()
+    for name in ("b.MP4", "nested/a.webm", "notes.txt", "nested/clip.mov"):
+        (tmp_path / name).write_bytes(b"")
+    assert find_videos(str(tmp_path)) == sorted([
+        str(tmp_path / "b.MP4"),
+        str(tmp_path / "nested" / "a.webm"),
+        str(tmp_path / "nested" / "clip.mov"),
+    ])
+
+def test_load_manifest_missing_file(tmp_path):
+    assert load_manifest(str(tmp_path / "missing.jsonl")) == {}
+
+def test_load_manifest_keeps_the_latest_entry_and_skips_a_truncated_line(tmp_path):
+    manifest = tmp_path / "scan.manifest.jsonl"
+    write_manifest(manifest, [
+        {"path": "/v/a.mp4", "status": "error"},
+        {"path": "/v/b.mp4", "status": "ok"},
+        {"path": "/v/a.mp4", "status": "ok", "fake_score": 12},
+    ], ["\n", '{"path": "/v/c.mp4", "sta'])
+    completed = load_manifest(str(manifest))
+    assert set(completed) == {"/v/a.mp4", "/v/b.mp4"}
+    assert completed["/v/a.mp4"]["fake_score"] == 12
+
+def test_summarize_counts_only_successful_video_time():
+    entries = [
+        {"status": "ok", "duration_seconds": 30},
+        {"status": "ok", "duration_seconds": None},
+        {"status": "error", "duration_seconds": 100},
+    ]
+    assert summarize(entries, 10) == {
+        "files": 3,
+        "succeeded": 2,
+        "failed": 1,
+        "wallSeconds": 10,
+        "filesPerMinute": 18.0,
+        "videoSecondsPerSecond": 3.0,
+    }
+    assert summarize([], 0)["filesPerMinute"] is None
+
+def test_resume_skips_files_already_in_the_manifest(tmp_path):
+    videos = tmp_path / "videos"
+    videos.mkdir()
+    done, failed = str(videos / "done.mp4"), str(videos / "failed.mp4")
+    for path in (done, failed):
+        with open(path, "wb") as f:
+            f.write(b"video")
+    results = str(tmp_path / "results.csv")
+    write_manifest(f"{results}.manifest.jsonl", [
+        {"path": done, **file_signature(done), "status": "ok", "fake_score": 7},
+        {"path": failed, **file_signature(failed), "status": "error", "error": "decode failed"},
+    ])
+    assert main([str(videos), "--results", results, "--workers", "1"]) == 0
+    with open(results, newline="", encoding="utf-8") as f:
+        rows = {row["path"]: row for row in csv.DictReader(f)}
+    assert rows[done]["fake_score"] == "7"
+    assert rows[failed]["status"] == "error"
+    assert os.path.getsize(f"{results}.manifest.jsonl") > 0
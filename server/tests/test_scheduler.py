@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from deadline import Deadline
+from scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    QueueFull,
+    WorkScheduler,
+    priority_from_request
+)
+
+def test_priority_from_request():
+    assert priority_from_request({"x-request-priority": " Batch "}) == PRIORITY_BATCH
+    assert priority_from_request({"x-request-priority": "unknown"}) == PRIORITY_INTERACTIVE
+    assert priority_from_request({}, PRIORITY_BATCH) == PRIORITY_BATCH
+    assert priority_from_request(None) == PRIORITY_INTERACTIVE
+
+def test_waiters_start_by_priority_then_arrival():
+    async def scenario():
+        scheduler = WorkScheduler("test", concurrency=1, queue_limit=8, initial_service_seconds=1)
+        order = []
+        release = asyncio.Event()
+        async def job(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await release.wait()
+        running = asyncio.create_task(job("first", PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(job("batch-1", PRIORITY_BATCH)),
+            asyncio.create_task(job("interactive", PRIORITY_INTERACTIVE)),
+            asyncio.create_task(job("batch-2", PRIORITY_BATCH)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"] == 3
+        release.set()
+        await asyncio.gather(running, *queued)
+        return scheduler, order
+    scheduler, order = asyncio.run(scenario())
+    assert order == ["first", "interactive", "batch-1", "batch-2"]
+    assert scheduler.active == 0
+    assert scheduler.completed == 4
+
+def test_full_queue_rejects_with_a_retry_hint():
+    async def scenario():
+        scheduler = WorkScheduler("analysis", concurrency=2, queue_limit=1, initial_service_seconds=10)
+        held = [scheduler.slot(), scheduler.slot(), scheduler.slot()]
+        with pytest.raises(QueueFull) as rejected:
+            scheduler.slot()
+        for slot in held:
+            slot.ticket.cancel()
+        return scheduler, rejected.value
+    scheduler, rejected = asyncio.run(scenario())
+    assert rejected.name == "analysis"
+    assert rejected.retry_after == 10
+    assert "retry in 10s" in str(rejected)
+    assert scheduler.rejected == 1
+
+def test_rejects_when_the_wait_exceeds_the_deadline():
+    async def scenario():
+        scheduler = WorkScheduler("test", concurrency=1, queue_limit=8, initial_service_seconds=30)
+        scheduler.slot()
+        with pytest.raises(QueueFull):
+            scheduler.slot(deadline=Deadline(5))
+        return scheduler.slot(deadline=Deadline(120))
+    assert not asyncio.run(scenario()).ticket.done()
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = WorkScheduler("test", concurrency=1, queue_limit=8, initial_service_seconds=1)
+        release = asyncio.Event()
+        async def job():
+            async with scheduler.slot():
+                await release.wait()
+        running = asyncio.create_task(job())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(job())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.sleep(0)
+        queued = scheduler.queued()
+        release.set()
+        await running
+        return scheduler, queued
+    scheduler, queued = asyncio.run(scenario())
+    assert queued == 0
+    assert scheduler.active == 0
+
+def test_slot_run_holds_the_slot_until_the_executor_finishes():
+    async def scenario():
+        scheduler = WorkScheduler("test", concurrency=1, queue_limit=8, initial_service_seconds=1)
+        async with scheduler.slot() as slot:
+            result = await slot.run(None, sum, [1, 2, 3])
+        return scheduler, result
+    scheduler, result = asyncio.run(scenario())
+    assert result == 6
+    assert scheduler.active == 0
+    assert scheduler.completed == 1
+
+def test_service_time_is_a_moving_average():
+    scheduler = WorkScheduler("test", concurrency=1, queue_limit=1, initial_service_seconds=10)
+    scheduler.active = 1
+    scheduler.release(20)
+    assert scheduler.service_seconds == 12
@@ -0,0 +1,80 @@
+import asyncio
+from web.utils.search_cache import (
+    SearchCache,
+    make_search_key,
+    normalize_query
+)
+
+def test_normalize_query():
+    assert normalize_query("  Did the Minister RESIGN?!  ") == "did the minister resign"
+    assert normalize_query("ｆｕｌｌ－width") == "full width"
+
+def test_search_key_ignores_domain_order_and_case():
+    assert make_search_key("Bridge closed", ["BBC.com", "cnn.com ", ""], 5) == make_search_key("bridge   closed!", ["cnn.com", "bbc.com"], 5)
+    assert make_search_key("bridge", None, 5) != make_search_key("bridge", None, 10)
+
+def test_entries_expire():
+    cache = SearchCache(ttl_seconds=-1, max_entries=10)
+    cache.put(("q",), [{"url": "u"}])
+    assert cache.get(("q",)) is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchCache(ttl_seconds=60, max_entries=2)
+    cache.put(("a",), [1])
+    cache.put(("b",), [2])
+    cache.get(("a",))
+    cache.put(("c",), [3])
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == [1]
+    assert cache.evictions == 1
+
+def test_zero_entries_disables_the_cache():
+    cache = SearchCache(ttl_seconds=60, max_entries=0)
+    cache.put(("a",), [1])
+    assert cache.get(("a",)) is None
+
+def test_concurrent_lookups_share_one_fetch_and_later_ones_hit():
+    async def scenario():
+        cache = SearchCache(ttl_seconds=60, max_entries=10)
+        fetches = []
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return [{"url": "u"}]
+        results = await asyncio.gather(*(cache.get_or_fetch(("q",), fetch) for _ in range(3)))
+        results.append(await cache.get_or_fetch(("q",), fetch))
+        return cache, fetches, results
+    cache, fetches, results = asyncio.run(scenario())
+    assert len(fetches) == 1
+    assert all(result == [{"url": "u"}] for result in results)
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["inFlight"]) == (1, 2, 1, 0)
+    assert stats["hitRate"] == 0.75
+
+def test_failed_fetch_is_not_cached():
+    async def scenario():
+        cache = SearchCache(ttl_seconds=60, max_entries=10)
+        async def failing():
+            raise RuntimeError("upstream down")
+        async def working():
+            return ["ok"]
+        try:
+            await cache.get_or_fetch(("q",), failing)
+        except RuntimeError:
+            pass
+        return await cache.get_or_fetch(("q",), working)
+    assert asyncio.run(scenario()) == ["ok"]
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def scenario():
+        cache = SearchCache(ttl_seconds=60, max_entries=10)
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return ["shared"]
+        first = asyncio.create_task(cache.get_or_fetch(("q",), fetch))
+        second = asyncio.create_task(cache.get_or_fetch(("q",), fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, cache.get(("q",))
+    assert asyncio.run(scenario()) == (["shared"], ["shared"])
@@ -0,0 +1,122 @@
+import os
+import struct
+import asyncio
+import pytest
+from upload import (
+    MAX_PART_HEADER_BYTES,
+    MultipartParser,
+    SpooledUpload,
+    multipart_boundary,
+    parse_part_headers,
+    receive_upload,
+    upload_suffix
+)
+
+BOUNDARY = b"----formboundary42"
+VIDEO = b"\x00\x01video\r\n--not-the-boundary\r\n------formboundary4" + bytes(range(256)) * 2 + b"\r\n"
+
+def multipart_body(parts, boundary=BOUNDARY):
+    body = b"preamble to ignore\r\n"
+    for headers, data in parts:
+        body += b"--" + boundary + b"\r\n" + headers + b"\r\n\r\n" + data + b"\r\n"
+    return body + b"--" + boundary + b"--\r\n"
+
+BODY = multipart_body([
+    (b'Content-Disposition: form-data; name="title"', b"Evening news"),
+    (b'Content-Disposition: form-data; name="file"; filename="clip.mov"\r\nContent-Type: video/quicktime', VIDEO),
+])
+
+def parse(body, chunk_size):
+    parts = []
+    parser = MultipartParser(
+        BOUNDARY,
+        lambda headers: parts.append([headers, b""]),
+        lambda data: parts[-1].__setitem__(1, parts[-1][1] + data),
+        lambda: parts[-1].append(True)
+    )
+    for offset in range(0, len(body), chunk_size):
+        parser.feed(body[offset:offset + chunk_size])
+    return parser, parts
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 19, 64, 4096])
+def test_parts_are_identical_for_any_chunking(chunk_size):
+    parser, parts = parse(BODY, chunk_size)
+    assert parser.done
+    assert [(headers.get("name"), headers.get("filename"), data, ended) for headers, data, ended in parts] == [
+        ("title", None, b"Evening news", True),
+        ("file", "clip.mov", VIDEO, True),
+    ]
+    assert parts[1][0]["content-type"] == "video/quicktime"
+
+def test_empty_part_body():
+    _, parts = parse(multipart_body([(b'Content-Disposition: form-data; name="empty"', b"")]), 3)
+    assert parts == [[{"content-disposition": 'form-data; name="empty"', "name": "empty"}, b"", True]]
+
+def test_malformed_boundary_line():
+    parser = MultipartParser(BOUNDARY, lambda headers: None, lambda data: None, lambda: None)
+    with pytest.raises(ValueError):
+        parser.feed(b"--" + BOUNDARY + b"XX")
+
+def test_oversized_part_headers():
+    parser = MultipartParser(BOUNDARY, lambda headers: None, lambda data: None, lambda: None)
+    with pytest.raises(ValueError):
+        parser.feed(b"--" + BOUNDARY + b"\r\n" + b"X" * (MAX_PART_HEADER_BYTES + 1))
+
+def test_header_helpers():
+    headers = parse_part_headers(b'Content-Disposition: form-data; name="file"; filename="a b.mp4"\r\nContent-Type: video/mp4')
+    assert (headers["name"], headers["filename"], headers["content-type"]) == ("file", "a b.mp4", "video/mp4")
+    assert multipart_boundary('multipart/form-data; boundary="abc123"') == b"abc123"
+    assert multipart_boundary("multipart/form-data; boundary=xyz; charset=utf-8") == b"xyz"
+    assert multipart_boundary("multipart/form-data") is None
+    assert upload_suffix("clip.MOV") == ".mov"
+    assert upload_suffix("notes.txt") == ".mp4"
+    assert upload_suffix(None) == ".mp4"
+
+def box(box_type, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+def test_header_is_ready_once_the_moov_box_arrives(tmp_path):
+    upload = SpooledUpload(directory=str(tmp_path))
+    upload.write(box(b"ftyp", b"isom" + b"\x00" * 12))
+    upload.write(box(b"free", b"\x00" * 8))
+    assert not upload.header_ready
+    moov = box(b"moov", b"\x00" * 64)
+    upload.write(moov[:20])
+    assert not upload.header_ready
+    upload.write(moov[20:])
+    assert upload.header_ready
+    upload.finish()
+    upload.discard()
+    assert not os.path.exists(upload.path)
+
+def test_size_limit(tmp_path):
+    upload = SpooledUpload(directory=str(tmp_path), max_bytes=10)
+    upload.write(b"x" * 10)
+    with pytest.raises(Exception, match="limit"):
+        upload.write(b"x")
+    upload.fail()
+    upload.discard()
+
+def test_receive_upload_spools_the_file_and_returns_fields():
+    async def chunks():
+        for offset in range(0, len(BODY), 50):
+            yield BODY[offset:offset + 50]
+    started, ready = [], []
+    fields = asyncio.run(receive_upload(chunks(), f"multipart/form-data; boundary={BOUNDARY.decode()}", started.append, ready.append))
+    assert fields == {"title": "Evening news"}
+    assert started == ready
+    upload = started[0]
+    assert upload.path.endswith(".mov")
+    assert upload.complete
+    with open(upload.path, "rb") as f:
+        assert f.read() == VIDEO
+    upload.discard()
+
+def test_receive_upload_discards_a_truncated_body():
+    async def chunks():
+        yield BODY[:len(BODY) // 2]
+    started = []
+    with pytest.raises(ValueError):
+        asyncio.run(receive_upload(chunks(), f"multipart/form-data; boundary={BOUNDARY.decode()}", started.append, lambda upload: None))
+    assert started[0].failed
+    assert not os.path.exists(started[0].path)
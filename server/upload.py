@@ -0,0 +1,269 @@
+import os
+import re
+import struct
+import tempfile
+import threading
+import logging
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Optional
+)
+
+logger = logging.getLogger(__name__)
+
+def default_spool_directory() -> str:
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or default_spool_directory()
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+UPLOAD_HEADER_BYTES = int(os.getenv("UPLOAD_HEADER_BYTES", str(1024 * 1024)))
+UPLOAD_RESUME_BYTES = int(os.getenv("UPLOAD_RESUME_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_STALL_SECONDS = float(os.getenv("UPLOAD_STALL_SECONDS", "30"))
+MAX_PART_HEADER_BYTES = 16 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+VIDEO_SUFFIXES = (".mp4", ".m4v", ".mov", ".webm", ".mkv", ".ts")
+
+class UploadTooLarge(Exception):
+    pass
+
+class SpooledUpload:
+    def __init__(self, suffix: str = ".mp4", directory: Optional[str] = None, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.fd, self.path = tempfile.mkstemp(prefix="ai_detector_upload_", suffix=suffix, dir=directory or UPLOAD_SPOOL_DIR)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.complete = False
+        self.failed = False
+        self.discarded = False
+        self.header_ready = False
+        self.header_ready_at: Optional[int] = None
+        self._box_offset = 0
+        self._iso_media: Optional[bool] = None
+        self._condition = threading.Condition()
+
+    def write(self, data: bytes) -> None:
+        if self.size + len(data) > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+        if not self.discarded:
+            os.write(self.fd, data)
+        with self._condition:
+            self.size += len(data)
+            self._check_header()
+            self._condition.notify_all()
+
+    def finish(self) -> None:
+        with self._condition:
+            self.complete = True
+            self._mark_header_ready()
+            self._condition.notify_all()
+        os.close(self.fd)
+
+    def fail(self) -> None:
+        with self._condition:
+            self.failed = True
+            self._condition.notify_all()
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+    def discard(self) -> None:
+        self.discarded = True
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def wait_for_data(self, opened_size: int) -> bool:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.complete or self.failed or self.size >= opened_size + UPLOAD_RESUME_BYTES,
+                timeout=UPLOAD_STALL_SECONDS
+            )
+            return not self.failed and self.size > opened_size
+
+    def _mark_header_ready(self) -> None:
+        if not self.header_ready:
+            self.header_ready = True
+            self.header_ready_at = self.size
+
+    def _check_header(self) -> None:
+        if self.header_ready or self.discarded:
+            return
+        while self._box_offset + 16 <= self.size:
+            header = os.pread(self.fd, 16, self._box_offset)
+            box_size, box_type = struct.unpack(">I4s", header[:8])
+            if self._iso_media is None:
+                self._iso_media = box_type == b"ftyp"
+            if not self._iso_media:
+                break
+            if box_size == 1:
+                box_size = struct.unpack(">Q", header[8:16])[0]
+            if box_size < 8:
+                return
+            if box_type == b"moov":
+                if self._box_offset + box_size <= self.size:
+                    self._mark_header_ready()
+                return
+            self._box_offset += box_size
+        if self._iso_media is False and self.size >= UPLOAD_HEADER_BYTES:
+            self._mark_header_ready()
+
+class MultipartParser:
+    def __init__(
+        self,
+        boundary: bytes,
+        on_part_begin: Callable[[Dict[str, str]], None],
+        on_part_data: Callable[[bytes], None],
+        on_part_end: Callable[[], None]
+    ):
+        self.delimiter = b"\r\n--" + boundary
+        self.buffer = bytearray(b"\r\n")
+        self.state = "preamble"
+        self.on_part_begin = on_part_begin
+        self.on_part_data = on_part_data
+        self.on_part_end = on_part_end
+
+    @property
+    def done(self) -> bool:
+        return self.state == "done"
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+        while True:
+            if self.state == "preamble":
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    del self.buffer[:max(0, len(self.buffer) - len(self.delimiter) + 1)]
+                    return
+                del self.buffer[:index + len(self.delimiter)]
+                self.state = "delimiter"
+            elif self.state == "delimiter":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer[:2] == b"--":
+                    self.state = "done"
+                    return
+                if self.buffer[:2] != b"\r\n":
+                    raise ValueError("Malformed multipart boundary")
+                del self.buffer[:2]
+                self.state = "headers"
+            elif self.state == "headers":
+                index = self.buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(self.buffer) > MAX_PART_HEADER_BYTES:
+                        raise ValueError("Multipart part headers are too large")
+                    return
+                self.on_part_begin(parse_part_headers(bytes(self.buffer[:index])))
+                del self.buffer[:index + 4]
+                self.state = "body"
+            elif self.state == "body":
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    keep = len(self.delimiter) - 1
+                    if len(self.buffer) > keep:
+                        self.on_part_data(bytes(self.buffer[:-keep]))
+                        del self.buffer[:-keep]
+                    return
+                if index:
+                    self.on_part_data(bytes(self.buffer[:index]))
+                del self.buffer[:index + len(self.delimiter)]
+                self.on_part_end()
+                self.state = "delimiter"
+            else:
+                return
+
+def parse_part_headers(raw: bytes) -> Dict[str, str]:
+    headers = {}
+    for line in raw.decode("utf-8", errors="replace").split("\r\n"):
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    disposition = headers.get("content-disposition", "")
+    for key in ("name", "filename"):
+        match = re.search(rf'(?:^|;)\s*{key}="([^"]*)"', disposition)
+        if match:
+            headers[key] = match.group(1)
+    return headers
+
+def multipart_boundary(content_type: str) -> Optional[bytes]:
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    return match.group(1).encode("latin-1") if match else None
+
+def upload_suffix(filename: Optional[str]) -> str:
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return suffix if suffix in VIDEO_SUFFIXES else ".mp4"
+
+async def receive_upload(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    on_start: Callable[[SpooledUpload], None],
+    on_header_ready: Callable[[SpooledUpload], None]
+) -> Dict[str, str]:
+    fields: Dict[str, str] = {}
+    state: Dict[str, object] = {"upload": None, "field": None, "value": bytearray(), "handed_off": False}
+
+    def header_ready(upload: SpooledUpload) -> None:
+        state["handed_off"] = True
+        on_header_ready(upload)
+
+    def write(data: bytes) -> None:
+        upload = state["upload"]
+        ready = upload.header_ready
+        upload.write(data)
+        if upload.header_ready and not ready:
+            header_ready(upload)
+
+    def part_begin(headers: Dict[str, str]) -> None:
+        if "filename" in headers and state["upload"] is None:
+            state["upload"] = SpooledUpload(upload_suffix(headers["filename"]))
+            state["field"] = None
+            on_start(state["upload"])
+        else:
+            state["field"] = headers.get("name", "")
+            state["value"] = bytearray()
+
+    def part_data(data: bytes) -> None:
+        if state["field"] is None:
+            write(data)
+        elif len(state["value"]) + len(data) <= MAX_FIELD_BYTES:
+            state["value"] += data
+
+    def part_end() -> None:
+        if state["field"] is not None:
+            fields[state["field"]] = state["value"].decode("utf-8", errors="replace")
+            state["field"] = ""
+
+    boundary = multipart_boundary(content_type) if content_type.startswith("multipart/form-data") else None
+    parser = MultipartParser(boundary, part_begin, part_data, part_end) if boundary else None
+    if parser is None:
+        state["upload"] = SpooledUpload(upload_suffix(f".{content_type.split('/')[-1].split(';')[0]}"))
+        on_start(state["upload"])
+    try:
+        async for chunk in chunks:
+            if parser is None:
+                write(chunk)
+            else:
+                parser.feed(chunk)
+                if parser.done:
+                    break
+        upload = state["upload"]
+        if upload is None:
+            raise ValueError("No file part found in the upload")
+        if parser is not None and not parser.done:
+            raise ValueError("Upload ended before the closing multipart boundary")
+        ready = upload.header_ready
+        upload.finish()
+        if not ready:
+            header_ready(upload)
+    except BaseException:
+        upload = state["upload"]
+        if upload is not None:
+            upload.fail()
+            if not state["handed_off"]:
+                upload.discard()
+        raise
+    return fields
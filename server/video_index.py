@@ -0,0 +1,248 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import logging
+from typing import (
+    Any,
+    Dict,
+    Optional
+)
+import cv2
+import numpy as np
+from embedding_store import EMBEDDING_DIM
+
+logger = logging.getLogger(__name__)
+
+VIDEO_INDEX_PATH = os.getenv("VIDEO_INDEX_PATH", os.path.join(tempfile.gettempdir(), "ai_detector_video_index.sqlite3"))
+VIDEO_INDEX_MAX_ENTRIES = int(os.getenv("VIDEO_INDEX_MAX_ENTRIES", "20000"))
+VIDEO_FINGERPRINT_SECONDS = float(os.getenv("VIDEO_FINGERPRINT_SECONDS", "10"))
+VIDEO_FINGERPRINT_RATE = 2.0
+VIDEO_MATCH_MAX_DISTANCE = int(os.getenv("VIDEO_MATCH_MAX_DISTANCE", "12"))
+VIDEO_MATCH_MIN_FRACTION = float(os.getenv("VIDEO_MATCH_MIN_FRACTION", "0.7"))
+VIDEO_FINGERPRINT_FACES = int(os.getenv("VIDEO_FINGERPRINT_FACES", "8"))
+VIDEO_MATCH_MIN_FACE_SIMILARITY = float(os.getenv("VIDEO_MATCH_MIN_FACE_SIMILARITY", "0.9"))
+MIN_FINGERPRINT_FRAMES = 4
+MIN_FINGERPRINT_FACES = 2
+MIN_FRAME_CONTRAST = 8.0
+CROP_MARGIN = 0.05
+BAND_BITS = 8
+BANDS = 64 // BAND_BITS
+CANDIDATES_TO_VERIFY = 5
+
+def frame_hash(frame: np.ndarray) -> Optional[int]:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height, width = gray.shape[:2]
+    margin_y, margin_x = int(height * CROP_MARGIN), int(width * CROP_MARGIN)
+    gray = gray[margin_y:height - margin_y, margin_x:width - margin_x]
+    if gray.size == 0 or float(gray.std()) < MIN_FRAME_CONTRAST:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+class VideoFingerprint:
+    def __init__(self, hashes: np.ndarray, faces: np.ndarray):
+        self.hashes = hashes
+        self.faces = faces
+
+def sample_face_embeddings(video_path: str, count: int = VIDEO_FINGERPRINT_FACES) -> np.ndarray:
+    from model import face_embedding
+    embeddings = []
+    cap = cv2.VideoCapture(video_path)
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+        if total_frames > 0 and count > 0:
+            for position in np.linspace(0, total_frames - 1, count).astype(int):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+                ret, frame = cap.read()
+                if ret:
+                    embedding = face_embedding(frame)
+                    if embedding is not None:
+                        embeddings.append(embedding)
+    finally:
+        cap.release()
+    return np.array(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+
+def faces_match(query: np.ndarray, stored: np.ndarray, min_similarity: float = VIDEO_MATCH_MIN_FACE_SIMILARITY) -> bool:
+    if len(query) < MIN_FINGERPRINT_FACES or len(stored) < MIN_FINGERPRINT_FACES:
+        return False
+    similarities = query @ stored.T
+    return bool(similarities.max(axis=1).min() >= min_similarity and similarities.max(axis=0).min() >= min_similarity)
+
+def compute_video_fingerprint(
+    video_path: str,
+    seconds: float = VIDEO_FINGERPRINT_SECONDS,
+    rate: float = VIDEO_FINGERPRINT_RATE
+) -> Optional[VideoFingerprint]:
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    step = max(1, int(round(fps / rate)))
+    max_frames = int(seconds * fps)
+    hashes = []
+    frame_index = 0
+    try:
+        while frame_index < max_frames and cap.grab():
+            if frame_index % step == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    value = frame_hash(frame)
+                    if value is not None:
+                        hashes.append(value)
+            frame_index += 1
+    finally:
+        cap.release()
+    if len(hashes) < MIN_FINGERPRINT_FRAMES:
+        return None
+    return VideoFingerprint(np.array(hashes, dtype=np.uint64), sample_face_embeddings(video_path))
+
+def hamming_matrix(query: np.ndarray, stored: np.ndarray) -> np.ndarray:
+    xor = np.bitwise_xor(query[:, None], stored[None, :])
+    return np.unpackbits(xor.view(np.uint8).reshape(xor.shape + (8,)), axis=-1).sum(axis=-1)
+
+def band_keys(value: int):
+    return [band * (1 << BAND_BITS) + ((value >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1)) for band in range(BANDS)]
+
+class VideoIndex:
+    def __init__(
+        self,
+        path: str = VIDEO_INDEX_PATH,
+        max_entries: int = VIDEO_INDEX_MAX_ENTRIES,
+        max_distance: int = VIDEO_MATCH_MAX_DISTANCE,
+        min_fraction: float = VIDEO_MATCH_MIN_FRACTION,
+        min_face_similarity: float = VIDEO_MATCH_MIN_FACE_SIMILARITY
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.min_fraction = min_fraction
+        self.min_face_similarity = min_face_similarity
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS videos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hashes BLOB NOT NULL,
+                faces BLOB,
+                fake_score INTEGER NOT NULL,
+                source TEXT,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                key INTEGER NOT NULL,
+                video_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_key ON bands (key);
+            CREATE INDEX IF NOT EXISTS bands_video ON bands (video_id);
+            CREATE INDEX IF NOT EXISTS videos_last_used ON videos (last_used);
+        """)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(videos)")]
+        if "faces" not in columns:
+            self._connection.execute("ALTER TABLE videos ADD COLUMN faces BLOB")
+        self._connection.commit()
+
+    def lookup(self, fingerprint: VideoFingerprint) -> Optional[Dict[str, Any]]:
+        if fingerprint is None or len(fingerprint.hashes) == 0:
+            return None
+        keys = sorted({key for value in fingerprint.hashes for key in band_keys(int(value))})
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT video_id, COUNT(*) AS votes FROM bands WHERE key IN ({','.join('?' * len(keys))}) "
+                f"GROUP BY video_id ORDER BY votes DESC LIMIT ?",
+                keys + [CANDIDATES_TO_VERIFY]
+            ).fetchall()
+            for video_id, _ in rows:
+                row = self._connection.execute(
+                    "SELECT hashes, faces, fake_score, source, created FROM videos WHERE id = ?",
+                    (video_id,)
+                ).fetchone()
+                if row is None or row[1] is None:
+                    continue
+                stored = np.frombuffer(row[0], dtype=np.uint64)
+                distances = hamming_matrix(fingerprint.hashes, stored).min(axis=1)
+                matched = float(np.mean(distances <= self.max_distance))
+                if matched < self.min_fraction:
+                    continue
+                stored_faces = np.frombuffer(row[1], dtype=np.float16).astype(np.float32).reshape(-1, EMBEDDING_DIM)
+                if not faces_match(fingerprint.faces, stored_faces, self.min_face_similarity):
+                    logger.info(f"Video index entry {video_id} matches {matched:.0%} of frames but not the faces")
+                    continue
+                self._connection.execute("UPDATE videos SET last_used = ? WHERE id = ?", (time.time(), video_id))
+                self._connection.commit()
+                self.hits += 1
+                logger.info(f"Near-duplicate video match: entry {video_id}, {matched:.0%} of frames within {self.max_distance} bits")
+                return {
+                    "fakeScore": int(row[2]),
+                    "matchedFraction": round(matched, 3),
+                    "medianDistance": float(np.median(distances)),
+                    "source": row[3],
+                    "analyzedAt": row[4],
+                }
+            self.misses += 1
+            return None
+
+    def store(self, fingerprint: VideoFingerprint, fake_score: int, source: Optional[str] = None) -> None:
+        if fingerprint is None or len(fingerprint.hashes) == 0:
+            return
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO videos (hashes, faces, fake_score, source, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint.hashes.astype(np.uint64).tobytes(), fingerprint.faces.astype(np.float16).tobytes(), int(fake_score), source, now, now)
+            )
+            video_id = cursor.lastrowid
+            keys = sorted({key for value in fingerprint.hashes for key in band_keys(int(value))})
+            self._connection.executemany(
+                "INSERT INTO bands (key, video_id) VALUES (?, ?)",
+                [(key, video_id) for key in keys]
+            )
+            self.stores += 1
+            count = self._connection.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            if count > self.max_entries:
+                expired = [row[0] for row in self._connection.execute(
+                    "SELECT id FROM videos ORDER BY last_used ASC LIMIT ?",
+                    (count - self.max_entries,)
+                ).fetchall()]
+                self._connection.executemany("DELETE FROM bands WHERE video_id = ?", [(i,) for i in expired])
+                self._connection.executemany("DELETE FROM videos WHERE id = ?", [(i,) for i in expired])
+                self.evictions += len(expired)
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+_video_index: Optional[VideoIndex] = None
+_video_index_lock = threading.Lock()
+
+def get_video_index() -> Optional[VideoIndex]:
+    global _video_index
+    if VIDEO_INDEX_MAX_ENTRIES <= 0:
+        return None
+    with _video_index_lock:
+        if _video_index is None:
+            try:
+                _video_index = VideoIndex()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open video index at {VIDEO_INDEX_PATH}: {str(e)}")
+                return None
+        return _video_index
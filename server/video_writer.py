@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+import logging
+from typing import (
+    Optional,
+    Tuple
+)
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FRAGMENT_DURATION_SECONDS = float(os.getenv("FRAGMENT_DURATION_SECONDS", "0.5"))
+
+class FragmentedMP4Writer:
+    def __init__(
+        self,
+        output_path: str,
+        fps: float,
+        frame_size: Tuple[int, int]
+    ):
+        self.output_path = output_path
+        self.frame_size = frame_size
+        width, height = frame_size
+        gop = max(1, int(round(fps * FRAGMENT_DURATION_SECONDS)))
+        cmd = [
+            FFMPEG_BINARY,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "pipe:0",
+            "-an",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-tune", "zerolatency",
+            "-pix_fmt", "yuv420p",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-g", str(gop),
+            "-keyint_min", str(gop),
+            "-sc_threshold", "0",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-flush_packets", "1",
+            "-f", "mp4",
+            output_path
+        ]
+        self.process: Optional[subprocess.Popen] = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def isOpened(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def write(self, frame: np.ndarray) -> None:
+        if not self.isOpened():
+            return
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except (BrokenPipeError, ValueError) as e:
+            logger.error(f"ffmpeg writer for {self.output_path} closed unexpectedly: {str(e)}")
+            self.release()
+
+    def release(self) -> None:
+        if self.process is None:
+            return
+        process = self.process
+        self.process = None
+        try:
+            if process.stdin and not process.stdin.closed:
+                process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            _, stderr = process.communicate(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            _, stderr = process.communicate()
+        if process.returncode != 0:
+            logger.error(f"ffmpeg exited with code {process.returncode} for {self.output_path}: {stderr.decode(errors='replace')[-500:] if stderr else ''}")
+
+def open_video_writer(
+    output_path: str,
+    fps: float,
+    frame_size: Tuple[int, int]
+):
+    if shutil.which(FFMPEG_BINARY):
+        try:
+            return FragmentedMP4Writer(output_path, fps, frame_size)
+        except OSError as e:
+            logger.warning(f"Failed to start ffmpeg, falling back to OpenCV writer: {str(e)}")
+    else:
+        logger.warning("ffmpeg not found, annotated video will not be playable until analysis completes")
+    fourcc = cv2.VideoWriter_fourcc(*"H264")
+    return cv2.VideoWriter(output_path, fourcc, fps, frame_size)
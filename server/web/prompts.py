@@ -195,6 +195,72 @@ search_query_prompt = """
 </prompt>
 """
 
+claims_query_prompt = """
+<prompt>
+    <role>
+        You are an expert search query generator. Your task is to extract the distinct verifiable and consequential claims from a given news transcript and formulate one concise, effective web search query per claim.
+    </role>
+
+    <instructions>
+        <task_overview>
+            Given a news transcript, you must craft up to {{MAX_CLAIMS}} web search queries (maximum 350 characters each), one for each distinct central verifiable claim. Your output must be a strict JSON object.
+        </task_overview>
+
+        <step_by_step_process>
+            <thinking_process>
+                Before generating the queries, follow these steps:
+                1.  **Identify Core Claims:** Read the provided `<news_transcript>` to understand the main subject and identify all explicit and implicit claims being made.
+                2.  **Evaluate Verifiability & Consequence:** For each identified claim, assess its verifiability (can it be fact-checked with external sources?) and its consequential nature (how significant is this claim within the context of the news?).
+                3.  **Select Distinct Claims:** Keep at most {{MAX_CLAIMS}} claims, most consequential first. Merge claims that would be verified by the same search. If the transcript only makes one claim, return one query.
+                4.  **Extract Keywords:** For each selected claim, identify strong keywords. These *must* include relevant names, dates, locations, organizations, and any unique facts.
+                5.  **Formulate Queries:** Construct one search query per claim using these keywords. Focus on current news and recent events. Avoid historical references unless specifically mentioned.
+            </thinking_process>
+        </step_by_step_process>
+
+        <constraints>
+            -   **Query Length:** Each generated query must be 350 characters or less.
+            -   **Content Exclusions:** Avoid filler words, direct quotes from the transcript, and common stopwords (e.g., "a", "an", "the", "is", "are").
+            -   **Phrasing:** Use neutral phrasing. Do not formulate the queries as leading questions or include subjective language.
+            -   **Number of Queries:** Between 1 and {{MAX_CLAIMS}} queries, with no two queries targeting the same claim.
+            -   **Output Format:** Strict JSON only. Do not include any explanatory text outside the JSON.
+        </constraints>
+    </instructions>
+
+    <input_data>
+        <news_transcript>
+            {{NEWS_TRANSCRIPT_GOES_HERE}}
+        </news_transcript>
+    </input_data>
+
+    <output_format>
+        Your response must be a strict JSON object, prefilled with `{`, following this structure:
+        ```json
+        {
+            "queries": ["concise web search query <= 350 characters", "..."]
+        }
+        ```
+    </output_format>
+
+    <example>
+        <input_example>
+            <news_transcript>
+                "During a press conference on October 26, 2023, Mayor Jane Doe announced a new city initiative. The 'Green Streets Project' aims to plant 5,000 trees across downtown Springfield by the end of next year, with a budget of $10 million allocated from the municipal fund. Separately, the mayor confirmed that Springfield's central library will close for renovations in January 2024."
+            </news_transcript>
+        </input_example>
+        <output_example>
+            ```json
+            {
+                "queries": [
+                    "Mayor Jane Doe Green Streets Project Springfield 5000 trees 2023 $10 million budget",
+                    "Springfield central library closing renovations January 2024"
+                ]
+            }
+            ```
+        </output_example>
+    </example>
+</prompt>
+"""
+
 similarity_prompt = """
 <prompt>
   <role>
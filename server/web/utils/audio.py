@@ -0,0 +1,161 @@
+import os
+import shutil
+import subprocess
+import logging
+from typing import (
+    List,
+    Optional,
+    Tuple
+)
+import numpy as np
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))
+VAD_MIN_SPEECH_SECONDS = 0.25
+VAD_MERGE_GAP_SECONDS = 0.4
+VAD_PADDING_SECONDS = 0.2
+CHUNK_MAX_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_MAX_SECONDS", "30"))
+CHUNK_FORMAT = os.getenv("TRANSCRIBE_CHUNK_FORMAT", "ogg")
+CHUNK_BITRATE = os.getenv("TRANSCRIBE_CHUNK_BITRATE", "24k")
+
+def has_ffmpeg() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+def decode_pcm(
+    audio_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    timeout: Optional[float] = 120
+) -> np.ndarray:
+    cmd = [
+        FFMPEG_BINARY,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-i", audio_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "s16le",
+        "pipe:1"
+    ]
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {e.stderr.decode(errors='replace')[-300:]}") from e
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+def _energy_speech_flags(pcm: np.ndarray, frame_length: int) -> np.ndarray:
+    frame_count = len(pcm) // frame_length
+    frames = pcm[:frame_count * frame_length].astype(np.float32).reshape(frame_count, frame_length) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    energy_db = 20 * np.log10(rms)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + 10.0, -45.0)
+    zero_crossings = np.mean(np.abs(np.diff(np.signbit(frames).astype(np.int8), axis=1)), axis=1)
+    return (energy_db > threshold) & (zero_crossings < 0.35)
+
+def _webrtc_speech_flags(pcm: np.ndarray, frame_length: int, sample_rate: int) -> np.ndarray:
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    frame_count = len(pcm) // frame_length
+    flags = np.zeros(frame_count, dtype=bool)
+    for i in range(frame_count):
+        frame = pcm[i * frame_length:(i + 1) * frame_length].tobytes()
+        flags[i] = vad.is_speech(frame, sample_rate)
+    return flags
+
+def detect_speech(pcm: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    frame_length = int(sample_rate * VAD_FRAME_MS / 1000)
+    if len(pcm) < frame_length:
+        return []
+    if webrtcvad is not None:
+        flags = _webrtc_speech_flags(pcm, frame_length, sample_rate)
+    else:
+        flags = _energy_speech_flags(pcm, frame_length)
+    frame_seconds = VAD_FRAME_MS / 1000
+    segments: List[Tuple[float, float]] = []
+    start = None
+    for i, is_speech in enumerate(flags):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            segments.append((start * frame_seconds, i * frame_seconds))
+            start = None
+    if start is not None:
+        segments.append((start * frame_seconds, len(flags) * frame_seconds))
+    merged: List[Tuple[float, float]] = []
+    for segment_start, segment_end in segments:
+        if merged and segment_start - merged[-1][1] <= VAD_MERGE_GAP_SECONDS:
+            merged[-1] = (merged[-1][0], segment_end)
+        else:
+            merged.append((segment_start, segment_end))
+    duration = len(pcm) / sample_rate
+    return [
+        (max(0.0, s - VAD_PADDING_SECONDS), min(duration, e + VAD_PADDING_SECONDS))
+        for s, e in merged if e - s >= VAD_MIN_SPEECH_SECONDS
+    ]
+
+def group_segments(
+    segments: List[Tuple[float, float]],
+    max_chunk_seconds: float = CHUNK_MAX_SECONDS
+) -> List[Tuple[float, float]]:
+    chunks: List[Tuple[float, float]] = []
+    for start, end in segments:
+        while end - start > max_chunk_seconds:
+            chunks.append((start, start + max_chunk_seconds))
+            start += max_chunk_seconds
+        if chunks and end - chunks[-1][0] <= max_chunk_seconds and start - chunks[-1][1] <= VAD_MERGE_GAP_SECONDS * 4:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+def encode_chunk(
+    pcm: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    audio_format: str = CHUNK_FORMAT,
+    timeout: Optional[float] = 60
+) -> bytes:
+    codec_options = {
+        "ogg": ["-c:a", "libopus", "-b:a", CHUNK_BITRATE, "-application", "voip"],
+        "flac": ["-c:a", "flac"],
+        "wav": ["-c:a", "pcm_s16le"],
+    }.get(audio_format, ["-c:a", "libopus", "-b:a", CHUNK_BITRATE])
+    cmd = [
+        FFMPEG_BINARY,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-f", "s16le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-i", "pipe:0",
+    ] + codec_options + [
+        "-f", audio_format,
+        "pipe:1"
+    ]
+    try:
+        result = subprocess.run(cmd, input=pcm.tobytes(), check=True, capture_output=True, timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg failed to encode audio chunk: {e.stderr.decode(errors='replace')[-300:]}") from e
+    return result.stdout
+
+def split_speech_chunks(
+    pcm: np.ndarray,
+    sample_rate: int = SAMPLE_RATE
+) -> List[Tuple[float, float, bytes]]:
+    chunks = group_segments(detect_speech(pcm, sample_rate))
+    encoded: List[Tuple[float, float, bytes]] = []
+    for start, end in chunks:
+        data = encode_chunk(pcm[int(start * sample_rate):int(end * sample_rate)], sample_rate)
+        encoded.append((start, end, data))
+    total_bytes = sum(len(data) for _, _, data in encoded)
+    speech_seconds = sum(end - start for start, end, _ in encoded)
+    logger.info(f"VAD kept {speech_seconds:.1f}s of {len(pcm) / sample_rate:.1f}s audio in {len(encoded)} chunks ({total_bytes} bytes)")
+    return encoded
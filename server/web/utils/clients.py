@@ -0,0 +1,119 @@
+import os
+import asyncio
+import threading
+from typing import (
+    Dict,
+    Optional
+)
+import httpx
+import google.generativeai as genai
+from groq import (
+    AsyncGroq,
+    Groq
+)
+from dotenv import load_dotenv
+
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+GEMINI_MODEL = "gemini-2.5-flash"
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_groq_client: Optional[Groq] = None
+_async_groq_client: Optional[AsyncGroq] = None
+_gemini_api_key: Optional[str] = None
+_gemini_models: Dict[str, genai.GenerativeModel] = {}
+
+class ThreadedResponseStream:
+    def __init__(self, response):
+        self._chunks = iter(response)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await asyncio.to_thread(next, self._chunks, None)
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+class RestGenerativeModel(genai.GenerativeModel):
+    async def generate_content_async(self, *args, **kwargs):
+        response = await asyncio.to_thread(self.generate_content, *args, **kwargs)
+        return ThreadedResponseStream(response) if kwargs.get("stream") else response
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+def get_http_client() -> httpx.Client:
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None or _async_http_client.is_closed:
+            _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        return _async_http_client
+
+def get_groq_client() -> Groq:
+    global _groq_client
+    http_client = get_http_client()
+    with _lock:
+        if _groq_client is None:
+            _groq_client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
+        return _groq_client
+
+def get_async_groq_client() -> AsyncGroq:
+    global _async_groq_client
+    http_client = get_async_http_client()
+    with _lock:
+        if _async_groq_client is None:
+            _async_groq_client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
+        return _async_groq_client
+
+def get_gemini_model(api_key: str, model_name: str = GEMINI_MODEL) -> genai.GenerativeModel:
+    global _gemini_api_key
+    with _lock:
+        if api_key != _gemini_api_key:
+            if GEMINI_API_ENDPOINT:
+                genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+            else:
+                genai.configure(api_key=api_key)
+            _gemini_api_key = api_key
+            _gemini_models.clear()
+        if model_name not in _gemini_models:
+            model_class = RestGenerativeModel if GEMINI_API_ENDPOINT else genai.GenerativeModel
+            _gemini_models[model_name] = model_class(model_name)
+        return _gemini_models[model_name]
+
+async def close_clients() -> None:
+    global _http_client, _async_http_client, _groq_client, _async_groq_client
+    with _lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _http_client = None
+        _async_http_client = None
+        _groq_client = None
+        _async_groq_client = None
+    if async_http_client is not None:
+        await async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
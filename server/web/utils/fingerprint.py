@@ -0,0 +1,57 @@
+from typing import (
+    Optional,
+    Tuple
+)
+import numpy as np
+
+FRAME_SIZE = 4096
+FRAME_HOP = FRAME_SIZE // 3
+BAND_COUNT = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+BLOCK_FRAMES = 256
+
+def frame_seconds(sample_rate: int) -> float:
+    return FRAME_HOP / sample_rate
+
+def compute_fingerprint(pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+    if len(pcm) < FRAME_SIZE + FRAME_HOP:
+        return np.zeros(0, dtype=np.uint32)
+    samples = pcm.astype(np.float32) / 32768.0
+    frame_count = 1 + (len(samples) - FRAME_SIZE) // FRAME_HOP
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    frequencies = np.fft.rfftfreq(FRAME_SIZE, 1.0 / sample_rate)
+    edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, BAND_COUNT + 1)
+    bins = np.digitize(frequencies, edges) - 1
+    energies = np.zeros((frame_count, BAND_COUNT), dtype=np.float64)
+    for block_start in range(0, frame_count, BLOCK_FRAMES):
+        block_frames = min(BLOCK_FRAMES, frame_count - block_start)
+        indices = np.arange(FRAME_SIZE)[None, :] + FRAME_HOP * (block_start + np.arange(block_frames))[:, None]
+        spectrum = np.abs(np.fft.rfft(samples[indices] * window, axis=1)) ** 2
+        for band in range(BAND_COUNT):
+            mask = bins == band
+            if mask.any():
+                energies[block_start:block_start + block_frames, band] = spectrum[:, mask].sum(axis=1)
+    band_differences = energies[:, :-1] - energies[:, 1:]
+    bits = (band_differences[1:] - band_differences[:-1]) > 0
+    weights = (1 << np.arange(BAND_COUNT - 1, dtype=np.uint64)).astype(np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1).astype(np.uint32)
+
+def bit_error_rate(first: np.ndarray, second: np.ndarray, offset: int) -> Tuple[float, int]:
+    if offset >= 0:
+        a, b = first, second[offset:]
+    else:
+        a, b = first[-offset:], second
+    overlap = min(len(a), len(b))
+    if overlap == 0:
+        return 1.0, 0
+    differing = np.unpackbits(np.bitwise_xor(a[:overlap], b[:overlap]).view(np.uint8)).sum()
+    return float(differing) / (overlap * 32), overlap
+
+def best_alignment(query: np.ndarray, candidate: np.ndarray, offsets) -> Optional[Tuple[int, float, int]]:
+    best = None
+    for offset in offsets:
+        error_rate, overlap = bit_error_rate(query, candidate, offset)
+        if overlap and (best is None or error_rate < best[1]):
+            best = (offset, error_rate, overlap)
+    return best
@@ -0,0 +1,93 @@
+import json
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional
+)
+
+class IncrementalJSONParser:
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        self.on_field = on_field
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._key: Optional[str] = None
+
+    def feed(self, text: str) -> None:
+        if self.closed or not text:
+            return
+        self._buffer += text
+        buffer = self._buffer
+        for i in range(self._position, len(buffer)):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+            if self._member_start is None:
+                if c == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+                continue
+            if c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_member(i)
+                    self.closed = True
+                    self._position = i + 1
+                    return
+            elif self._depth == 1 and c == ":" and self._key is None:
+                try:
+                    self._key = str(json.loads(buffer[self._member_start:i]))
+                except ValueError:
+                    self._key = buffer[self._member_start:i].strip().strip('"')
+                self._value_start = i + 1
+            elif self._depth == 1 and c == ",":
+                self._complete_member(i)
+                self._member_start = i + 1
+        self._position = len(buffer)
+
+    def _complete_member(self, end: int) -> None:
+        if self._key is None or self._value_start is None:
+            return
+        key, value_text = self._key, self._buffer[self._value_start:end]
+        self._key = None
+        self._value_start = None
+        try:
+            value = json.loads(value_text)
+        except ValueError:
+            return
+        self.fields[key] = value
+        if self.on_field is not None:
+            self.on_field(key, value)
+
+    def finish(self) -> Dict[str, Any]:
+        if not self.closed and self._key is not None and self._value_start is not None:
+            self._complete_member(len(self._buffer.rstrip().rstrip("`").rstrip()))
+        if not self.fields and self._member_start is None and ":" in self._buffer:
+            retry = IncrementalJSONParser(self.on_field)
+            retry.feed("{" + self._buffer.strip().strip("`"))
+            return retry.finish()
+        if not self.fields and not self.closed:
+            raise ValueError("No JSON object found in the model response")
+        return self.fields
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.finish()
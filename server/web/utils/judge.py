@@ -1,99 +1,179 @@
-import json
+import os
 from typing import (
     Any,
+    Callable,
     Dict,
-    List
+    List,
+    Optional
 )
-import google.generativeai as genai
 from web.prompts import (
+    claims_query_prompt,
     judge_prompt,
     search_query_prompt
 )
+from web.utils.clients import get_gemini_model
+from web.utils.json_stream import (
+    IncrementalJSONParser,
+    parse_json_object
+)
+from web.utils.prompt_builder import build_budgeted_prompt
+from web.utils.resilience import (
+    CircuitOpenError,
+    call_with_retry,
+    call_with_retry_async
+)
 
-def judge_content(transcript: str, sources: List[Dict[str, Any]], api_key: str) -> Dict[str, Any]:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    prompt_text = (
-        f"{judge_prompt}\n\nTRANSCRIPT:\n{transcript}\n\n"
-        f"SOURCES JSON:\n{json.dumps(sources, ensure_ascii=False)}"
-    )
+MAX_CLAIMS = int(os.getenv("MAX_CLAIMS", "3"))
+GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "response_mime_type": "application/json",
+}
+
+def _chunk_text(chunk) -> str:
     try:
-        response = model.generate_content(
-            [prompt_text],
-            generation_config={
-                "temperature": 0.2,
-                "response_mime_type": "application/json",
-            },
-        )
-        text = response.text
-        text = text.strip()
-        if text.startswith("```json"):
-            text = text.replace("```json", "", 1).strip()
-        elif text.startswith("```"):
-            text = text.replace("```", "", 1).strip()
-        if text.endswith("```"):
-            text = text.rsplit("```", 1)[0].strip()
-        text = text.strip()
-        if not text.startswith("{"):
-            text = "{" + text
-        if not text.endswith("}"):
-            text = text + "}"
+        return chunk.text
+    except ValueError:
+        return ""
+
+async def _stream_json_async(prompt: str, api_key: str, on_field: Optional[Callable[[str, Any], None]] = None) -> IncrementalJSONParser:
+    model = get_gemini_model(api_key)
+
+    async def attempt() -> IncrementalJSONParser:
+        parser = IncrementalJSONParser(on_field)
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            return {
-                "verdict": "uncertain",
-                "confidence": 0,
-                "reasoning": f"Error parsing model response: {str(e)}",
-                "sources": []
-            }
+            response = await model.generate_content_async(
+                [prompt],
+                generation_config=GENERATION_CONFIG,
+                stream=True,
+            )
+            async for chunk in response:
+                parser.feed(_chunk_text(chunk))
+        except Exception as e:
+            if on_field is None or not parser.fields:
+                raise
+            raise RuntimeError(f"stream failed after {', '.join(parser.fields)} were emitted: {e}") from None
+        return parser
+
+    return await call_with_retry_async("gemini", attempt)
+
+def _build_judge_prompt(transcript: str, sources: List[Dict[str, Any]]) -> str:
+    prompt_text, _ = build_budgeted_prompt(judge_prompt, transcript, sources)
+    return prompt_text
+
+def _judge_result(parse: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return parse()
+    except ValueError as e:
+        return {
+            "verdict": "uncertain",
+            "confidence": 0,
+            "reasoning": f"Error parsing model response: {str(e)}",
+            "sources": []
+        }
+
+def _fallback_query(transcript: str) -> str:
+    words = transcript.split()[:30]
+    return " ".join(words)
+
+def _query_result(parse: Callable[[], Dict[str, Any]], transcript: str) -> str:
+    try:
+        q = str(parse().get("query", "")).strip()
+        if not q:
+            q = _fallback_query(transcript)
+    except ValueError:
+        q = _fallback_query(transcript)
+    return q[:350]
+
+def _build_claims_prompt(transcript: str, max_claims: int) -> str:
+    return f"{claims_query_prompt.replace('{{MAX_CLAIMS}}', str(max_claims))}\n\nTRANSCRIPT:\n{transcript}"
+
+def _claims_result(parse: Callable[[], Dict[str, Any]], transcript: str, max_claims: int) -> List[str]:
+    try:
+        data = parse()
+        raw_queries = data.get("queries") or ([data["query"]] if data.get("query") else [])
+        if isinstance(raw_queries, str):
+            raw_queries = [raw_queries]
+    except (ValueError, AttributeError):
+        raw_queries = []
+    queries: List[str] = []
+    seen = set()
+    for raw_query in raw_queries:
+        q = str(raw_query).strip()[:350]
+        key = " ".join(q.lower().split())
+        if q and key not in seen:
+            seen.add(key)
+            queries.append(q)
+    return queries[:max_claims] or [_fallback_query(transcript)[:350]]
+
+def judge_content(transcript: str, sources: List[Dict[str, Any]], api_key: str) -> Dict[str, Any]:
+    model = get_gemini_model(api_key)
+    try:
+        response = call_with_retry("gemini", lambda: model.generate_content(
+            [_build_judge_prompt(transcript, sources)],
+            generation_config=GENERATION_CONFIG,
+        ))
+        return _judge_result(lambda: parse_json_object(response.text))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Gemini error: {e}") from e
+
+async def judge_content_async(
+    transcript: str,
+    sources: List[Dict[str, Any]],
+    api_key: str,
+    on_field: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Any]:
+    try:
+        parser = await _stream_json_async(_build_judge_prompt(transcript, sources), api_key, on_field)
+        return _judge_result(parser.finish)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Gemini error: {e}") from e
 
 def generate_search_query(transcript: str, api_key: str) -> str:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = get_gemini_model(api_key)
     prompt_text = f"{search_query_prompt}\n\nTRANSCRIPT:\n{transcript}"
     try:
-        response = model.generate_content(
+        response = call_with_retry("gemini", lambda: model.generate_content(
             [prompt_text],
-            generation_config={
-                "temperature": 0.2,
-                "response_mime_type": "application/json",
-            },
-        )
-        text = response.text
-        
-        # Clean up the response text to ensure it's valid JSON
-        text = text.strip()
-        # Handle markdown code blocks
-        if text.startswith('```json'):
-            text = text.replace('```json', '', 1).strip()
-        elif text.startswith('```'):
-            text = text.replace('```', '', 1).strip()
-        
-        if text.endswith('```'):
-            text = text.rsplit('```', 1)[0].strip()
-            
-        # Ensure we have proper JSON braces
-        text = text.strip()
-        if not text.startswith('{'):
-            text = '{' + text
-        if not text.endswith('}'):
-            text = text + '}'
-            
-        try:
-            data = json.loads(text)
-            q = str(data.get("query", "")).strip()
-            if not q:
-                # If query is empty, extract directly from transcript
-                words = transcript.split()[:30]  # First 30 words
-                q = " ".join(words)
-        except json.JSONDecodeError:
-            # Fallback: use the first part of transcript as the search query
-            words = transcript.split()[:30]  # First 30 words
-            q = " ".join(words)
-            
-        return q[:350]
+            generation_config=GENERATION_CONFIG,
+        ))
+        return _query_result(lambda: parse_json_object(response.text), transcript)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Gemini query generation error: {e}") from e
+
+async def generate_search_query_async(transcript: str, api_key: str) -> str:
+    prompt_text = f"{search_query_prompt}\n\nTRANSCRIPT:\n{transcript}"
+    try:
+        parser = await _stream_json_async(prompt_text, api_key)
+        return _query_result(parser.finish, transcript)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Gemini query generation error: {e}") from e
+
+def generate_search_queries(transcript: str, api_key: str, max_claims: int = MAX_CLAIMS) -> List[str]:
+    model = get_gemini_model(api_key)
+    try:
+        response = call_with_retry("gemini", lambda: model.generate_content(
+            [_build_claims_prompt(transcript, max_claims)],
+            generation_config=GENERATION_CONFIG,
+        ))
+        return _claims_result(lambda: parse_json_object(response.text), transcript, max_claims)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Gemini query generation error: {e}") from e
+
+async def generate_search_queries_async(transcript: str, api_key: str, max_claims: int = MAX_CLAIMS) -> List[str]:
+    try:
+        parser = await _stream_json_async(_build_claims_prompt(transcript, max_claims), api_key)
+        return _claims_result(parser.finish, transcript, max_claims)
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        raise RuntimeError(f"Gemini query generation error: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"Gemini query generation error: {e}") from e
@@ -0,0 +1,174 @@
+import os
+import re
+import math
+import json
+from collections import Counter
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple
+)
+
+JUDGE_PROMPT_TOKEN_BUDGET = int(os.getenv("JUDGE_PROMPT_TOKEN_BUDGET", "4500"))
+TRANSCRIPT_BUDGET_SHARE = 0.4
+MAX_SNIPPET_TOKENS = 180
+MIN_SOURCES = 2
+CHARS_PER_TOKEN = 4
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "but", "by", "for", "from", "has", "have", "he",
+    "her", "his", "i", "if", "in", "into", "is", "it", "its", "just", "like", "me", "my", "of", "on",
+    "or", "our", "she", "so", "that", "the", "their", "them", "there", "they", "this", "to", "um", "uh",
+    "was", "we", "were", "what", "when", "which", "who", "will", "with", "you", "your", "yeah", "okay",
+}
+CLAIM_MARKERS = {
+    "said", "says", "announced", "confirmed", "reported", "according", "killed", "died", "arrested",
+    "elected", "won", "lost", "banned", "launched", "released", "signed", "attacked", "declared",
+    "percent", "million", "billion", "president", "minister", "government", "police", "official",
+}
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+def split_sentences(text: str) -> List[str]:
+    sentences = re.split(r"(?<=[.!?])\s+|\n+", text.strip())
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+def claim_score(sentence: str) -> float:
+    words = sentence.split()
+    if len(words) < 4:
+        return 0.0
+    tokens = tokenize(sentence)
+    score = 0.0
+    score += 2.0 * len(re.findall(r"\d", sentence)) ** 0.5
+    score += 1.0 * sum(1 for word in words[1:] if word[:1].isupper())
+    score += 1.5 * sum(1 for token in tokens if token in CLAIM_MARKERS)
+    score += 0.1 * len(tokens)
+    return score / (1 + 0.02 * max(0, len(words) - 40))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + " …"
+
+def compress_transcript(transcript: str, max_tokens: int) -> str:
+    if estimate_tokens(transcript) <= max_tokens:
+        return transcript
+    sentences = split_sentences(transcript)
+    ranked = sorted(range(len(sentences)), key=lambda i: claim_score(sentences[i]), reverse=True)
+    selected = []
+    seen = set()
+    used = 0
+    for i in ranked:
+        normalized = " ".join(tokenize(sentences[i]))
+        cost = estimate_tokens(sentences[i]) + 1
+        if normalized in seen or used + cost > max_tokens:
+            continue
+        seen.add(normalized)
+        selected.append(i)
+        used += cost
+    if not selected:
+        return truncate_to_tokens(transcript, max_tokens)
+    return " … ".join(sentences[i] for i in sorted(selected))
+
+class BM25:
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = documents
+        self.lengths = [len(document) for document in documents]
+        self.average_length = (sum(self.lengths) / len(documents)) if documents else 0.0
+        self.frequencies = [Counter(document) for document in documents]
+        document_frequency: Counter = Counter()
+        for document in documents:
+            document_frequency.update(set(document))
+        count = len(documents)
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, query: List[str], index: int) -> float:
+        frequencies = self.frequencies[index]
+        length = self.lengths[index]
+        total = 0.0
+        for term in set(query):
+            frequency = frequencies.get(term, 0)
+            if not frequency:
+                continue
+            normalization = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            total += self.idf.get(term, 0.0) * frequency * (self.k1 + 1) / (frequency + normalization)
+        return total
+
+def _source_text(source: Dict[str, Any]) -> str:
+    return f"{source.get('title', '')} {source.get('snippet', '')}"
+
+def trim_snippet(snippet: str, query: List[str], max_tokens: int) -> str:
+    if estimate_tokens(snippet) <= max_tokens:
+        return snippet
+    sentences = split_sentences(snippet)
+    if len(sentences) <= 1:
+        return truncate_to_tokens(snippet, max_tokens)
+    ranking = BM25([tokenize(sentence) for sentence in sentences])
+    ranked = sorted(range(len(sentences)), key=lambda i: ranking.score(query, i), reverse=True)
+    selected = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        selected.append(i)
+        used += cost
+    if not selected:
+        return truncate_to_tokens(sentences[ranked[0]], max_tokens)
+    return " ".join(sentences[i] for i in sorted(selected))
+
+def rank_sources(transcript: str, sources: List[Dict[str, Any]]) -> List[Tuple[float, Dict[str, Any]]]:
+    if not sources:
+        return []
+    query = tokenize(transcript)
+    ranking = BM25([tokenize(_source_text(source)) for source in sources])
+    scored = [(ranking.score(query, i), source) for i, source in enumerate(sources)]
+    return sorted(scored, key=lambda item: item[0], reverse=True)
+
+def build_budgeted_prompt(
+    instructions: str,
+    transcript: str,
+    sources: List[Dict[str, Any]],
+    token_budget: int = JUDGE_PROMPT_TOKEN_BUDGET
+) -> Tuple[str, List[Dict[str, Any]]]:
+    available = max(0, token_budget - estimate_tokens(instructions) - 20)
+    compressed = compress_transcript(transcript, max(64, int(available * TRANSCRIPT_BUDGET_SHARE)))
+    remaining = max(0, available - estimate_tokens(compressed))
+    query = tokenize(compressed)
+    selected: List[Dict[str, Any]] = []
+    for position, (relevance, source) in enumerate(rank_sources(compressed, sources)):
+        if relevance <= 0 and position >= MIN_SOURCES:
+            break
+        entry = {
+            "title": source.get("title", ""),
+            "url": source.get("url", ""),
+            "snippet": trim_snippet(source.get("snippet", ""), query, MAX_SNIPPET_TOKENS),
+        }
+        if isinstance(source.get("score"), (int, float)):
+            entry["score"] = round(float(source["score"]), 3)
+        cost = estimate_tokens(json.dumps(entry, ensure_ascii=False))
+        if cost > remaining:
+            if position >= MIN_SOURCES:
+                break
+            entry["snippet"] = truncate_to_tokens(entry["snippet"], max(16, remaining - 40))
+            cost = estimate_tokens(json.dumps(entry, ensure_ascii=False))
+        selected.append(entry)
+        remaining = max(0, remaining - cost)
+    prompt_text = (
+        f"{instructions}\n\nTRANSCRIPT:\n{compressed}\n\n"
+        f"SOURCES JSON:\n{json.dumps(selected, ensure_ascii=False)}"
+    )
+    return prompt_text, selected
@@ -0,0 +1,199 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional
+)
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+UPSTREAM_SERVICES = ("tavily", "groq", "gemini")
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+TRANSIENT_NAME_MARKERS = ("Timeout", "Connection", "RateLimit", "ServiceUnavailable", "ResourceExhausted", "DeadlineExceeded", "InternalServerError")
+
+class UpstreamError(RuntimeError):
+    def __init__(self, service: str, status_code: int, detail: str):
+        super().__init__(f"{service} error {status_code}: {detail}")
+        self.service = service
+        self.status_code = status_code
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"{service} is unavailable, retry in {retry_after:.0f}s")
+        self.service = service
+        self.retry_after = retry_after
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for name in ("status_code", "code"):
+        value = getattr(exc, name, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    status_code = _status_code(exc)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES
+    if any(marker in type(exc).__name__ for marker in TRANSIENT_NAME_MARKERS):
+        return True
+    return exc.__cause__ is not None and is_transient(exc.__cause__)
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_seconds - waited)
+                self.state = "half_open"
+                self.trial_in_flight = False
+            if self.state == "half_open":
+                if self.trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_seconds)
+                self.trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+            if self.state != "closed":
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = "closed"
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self.trial_in_flight = False
+            if not is_transient(exc):
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} failures: {str(exc)}")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "failureThreshold": self.failure_threshold,
+                "retryAfterSeconds": round(retry_after, 1),
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+            }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(service: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(service)
+        return _breakers[service]
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    for service in UPSTREAM_SERVICES:
+        get_breaker(service)
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+def call_with_retry(
+    service: str,
+    call: Callable[[], Any],
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+) -> Any:
+    breaker = get_breaker(service)
+    for attempt in range(max_attempts):
+        breaker.before_call()
+        try:
+            result = call()
+        except Exception as e:
+            breaker.record_failure(e)
+            if attempt + 1 >= max_attempts or not is_transient(e):
+                raise
+            delay = backoff_delay(attempt)
+            breaker.record_retry()
+            logger.warning(f"{service} call failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+async def call_with_retry_async(
+    service: str,
+    call: Callable[[], Awaitable[Any]],
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+) -> Any:
+    breaker = get_breaker(service)
+    for attempt in range(max_attempts):
+        breaker.before_call()
+        try:
+            result = await call()
+        except asyncio.CancelledError as e:
+            breaker.record_failure(e)
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            if attempt + 1 >= max_attempts or not is_transient(e):
+                raise
+            delay = backoff_delay(attempt)
+            breaker.record_retry()
+            logger.warning(f"{service} call failed ({str(e)}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -1,12 +1,37 @@
+import os
+import asyncio
+import logging
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit
+)
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
     Optional
 )
 import httpx
+from web.utils.clients import (
+    get_async_http_client,
+    get_http_client
+)
+from web.utils.resilience import (
+    UpstreamError,
+    call_with_retry,
+    call_with_retry_async
+)
+from web.utils.search_cache import (
+    make_search_key,
+    search_cache
+)
+
+logger = logging.getLogger(__name__)
 
-TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+TAVILY_SEARCH_URL = os.getenv("TAVILY_SEARCH_URL", "https://api.tavily.com/search")
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "20"))
 TRUSTED_DOMAINS = [
     "cnn.com",
     "bbc.com", 
@@ -16,13 +41,11 @@ TRUSTED_DOMAINS = [
     "bloomberg.com",
 ]
 
-def perform_search(
+def _build_search_body(
     query: str,
-    api_key: str,
-    max_results: int = 5,
-    include_domains: Optional[List[str]] = None,
-) -> List[Dict[str, Any]]:
-    headers = {"Authorization": f"Bearer {api_key}"}
+    max_results: int,
+    include_domains: Optional[List[str]]
+) -> Dict[str, Any]:
     body = {
         "query": query,
         "max_results": max_results,
@@ -33,10 +56,11 @@ def perform_search(
     domains = include_domains or TRUSTED_DOMAINS
     if domains:
         body["include_domains"] = domains
-    with httpx.Client(timeout=60) as client:
-        resp = client.post(TAVILY_SEARCH_URL, headers=headers, json=body)
+    return body
+
+def _normalize_results(resp: httpx.Response) -> List[Dict[str, Any]]:
     if resp.status_code != 200:
-        raise RuntimeError(f"Tavily search error: {resp.text}")
+        raise UpstreamError("Tavily search", resp.status_code, resp.text)
     data = resp.json()
     results = data.get("results", [])
     normalized: List[Dict[str, Any]] = []
@@ -53,4 +77,118 @@ def perform_search(
             "snippet": r.get("content") or r.get("snippet") or "",
             "score": r.get("score"),
         })
-    return normalized
\ No newline at end of file
+    return normalized
+
+def perform_search(
+    query: str,
+    api_key: str,
+    max_results: int = 5,
+    include_domains: Optional[List[str]] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    headers = {"Authorization": f"Bearer {api_key}"}
+    body = _build_search_body(query, max_results, include_domains)
+    key = make_search_key(query, body.get("include_domains"), max_results)
+    if use_cache:
+        cached = search_cache.get(key)
+        search_cache.record(cached is not None)
+        if cached is not None:
+            return cached
+    results = call_with_retry(
+        "tavily",
+        lambda: _normalize_results(get_http_client().post(TAVILY_SEARCH_URL, headers=headers, json=body))
+    )
+    if use_cache:
+        search_cache.put(key, results)
+    return results
+
+async def perform_search_async(
+    query: str,
+    api_key: str,
+    max_results: int = 5,
+    include_domains: Optional[List[str]] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    headers = {"Authorization": f"Bearer {api_key}"}
+    body = _build_search_body(query, max_results, include_domains)
+
+    async def request() -> List[Dict[str, Any]]:
+        resp = await get_async_http_client().post(TAVILY_SEARCH_URL, headers=headers, json=body)
+        return _normalize_results(resp)
+
+    async def fetch() -> List[Dict[str, Any]]:
+        return await call_with_retry_async("tavily", request)
+
+    if not use_cache:
+        return await fetch()
+    key = make_search_key(query, body.get("include_domains"), max_results)
+    return await search_cache.get_or_fetch(key, fetch)
+
+
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in ("ref", "fbclid", "gclid")
+    ))
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+def merge_search_results(result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    merged: List[Dict[str, Any]] = []
+    positions: Dict[str, int] = {}
+    longest = max((len(results) for results in result_lists), default=0)
+    for rank in range(longest):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            key = canonical_url(result.get("url", "")) if result.get("url") else f"untitled:{len(merged)}"
+            if key in positions:
+                existing = merged[positions[key]]
+                if (result.get("score") or 0) > (existing.get("score") or 0):
+                    existing["score"] = result.get("score")
+                if len(result.get("snippet", "")) > len(existing.get("snippet", "")):
+                    existing["snippet"] = result.get("snippet", "")
+                continue
+            positions[key] = len(merged)
+            merged.append(dict(result))
+    return merged
+
+async def perform_multi_search_async(
+    queries: List[str],
+    api_key: str,
+    max_results: int = 5,
+    include_domains: Optional[List[str]] = None,
+    deadline_seconds: float = SEARCH_DEADLINE_SECONDS,
+    on_deadline: Optional[Callable[[int, int], None]] = None,
+) -> List[Dict[str, Any]]:
+    if not queries:
+        return []
+    tasks = [
+        asyncio.create_task(perform_search_async(query, api_key, max_results, include_domains))
+        for query in queries
+    ]
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline_seconds))
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"{len(pending)} of {len(tasks)} searches missed the {deadline_seconds:.1f}s deadline")
+        if on_deadline is not None:
+            on_deadline(len(pending), len(tasks))
+    result_lists: List[List[Dict[str, Any]]] = []
+    errors: List[BaseException] = []
+    for task in tasks:
+        if task not in done or task.cancelled():
+            continue
+        if task.exception() is not None:
+            errors.append(task.exception())
+            logger.warning(f"Search failed: {str(task.exception())}")
+            continue
+        result_lists.append(task.result())
+    if not result_lists and errors:
+        raise errors[0]
+    return merge_search_results(result_lists)
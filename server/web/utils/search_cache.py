@@ -0,0 +1,126 @@
+import os
+import re
+import time
+import asyncio
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+
+def normalize_query(query: str) -> str:
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def make_search_key(
+    query: str,
+    include_domains: Optional[List[str]],
+    max_results: int
+) -> Tuple[str, Tuple[str, ...], int]:
+    domains = tuple(sorted({domain.strip().lower() for domain in include_domains or [] if domain.strip()}))
+    return normalize_query(query), domains, max_results
+
+class SearchCache:
+    def __init__(
+        self,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, results = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    async def get_or_fetch(
+        self,
+        key: Tuple,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        cached = self.get(key)
+        if cached is not None:
+            self.record(True)
+            return cached
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            with self._lock:
+                self.coalesced += 1
+        else:
+            self.record(False)
+            inflight = asyncio.create_task(self._fetch(key, fetch))
+            inflight.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+
+    async def _fetch(
+        self,
+        key: Tuple,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        try:
+            results = await fetch()
+            self.put(key, results)
+            return results
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hitRate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "inFlight": len(self._inflight),
+                "evictions": self.evictions,
+            }
+
+search_cache = SearchCache()
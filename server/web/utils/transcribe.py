@@ -1,26 +1,190 @@
 import os
-from typing import Optional
-from groq import Groq
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+import numpy as np
 from dotenv import load_dotenv
+from web.utils.audio import (
+    CHUNK_FORMAT,
+    SAMPLE_RATE,
+    decode_pcm,
+    has_ffmpeg,
+    split_speech_chunks
+)
+from web.utils.clients import (
+    get_async_groq_client,
+    get_groq_client
+)
+from web.utils.fingerprint import compute_fingerprint
+from web.utils.resilience import (
+    CircuitOpenError,
+    call_with_retry,
+    call_with_retry_async
+)
+from web.utils.transcript_cache import get_transcript_cache
 
 load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+TRANSCRIBE_MODEL = "whisper-large-v3-turbo"
+TRANSCRIBE_USE_VAD = os.getenv("TRANSCRIBE_USE_VAD", "1") != "0"
+TRANSCRIBE_MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "4"))
 
-def transcribe_audio(audio_path: str, language: Optional[str] = None) -> str:
-    client = Groq(api_key=GROQ_API_KEY)
-    with open(audio_path, "rb") as f:
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+def _whole_file_segments(result: Any) -> List[Dict[str, Any]]:
+    text = _field(result, "text")
+    return [{"start": 0.0, "end": None, "text": text}] if text else []
+
+def _chunk_segments(result: Any, start: float, end: float) -> List[Dict[str, Any]]:
+    segments = _field(result, "segments") or []
+    if not segments:
+        text = (_field(result, "text") or "").strip()
+        return [{"start": start, "end": end, "text": text}] if text else []
+    return [
+        {
+            "start": round(start + float(_field(segment, "start", 0.0)), 2),
+            "end": round(min(end, start + float(_field(segment, "end", 0.0))), 2),
+            "text": (_field(segment, "text") or "").strip(),
+        }
+        for segment in segments if (_field(segment, "text") or "").strip()
+    ]
+
+def _join_segments(segments: List[Dict[str, Any]]) -> str:
+    text = " ".join(segment["text"].strip() for segment in segments if segment.get("text")).strip()
+    if not text:
+        raise RuntimeError("Empty transcription returned")
+    return text
+
+def _prepare_chunks(
+    audio_path: str,
+    language: Optional[str]
+) -> Tuple[Optional[List[Dict[str, Any]]], List[Tuple[float, float, bytes]], Optional[np.ndarray], float]:
+    pcm = decode_pcm(audio_path, SAMPLE_RATE)
+    duration = len(pcm) / SAMPLE_RATE
+    cache = get_transcript_cache()
+    fingerprint = None
+    if cache is not None:
+        fingerprint = compute_fingerprint(pcm, SAMPLE_RATE)
+        cached = cache.lookup(fingerprint, SAMPLE_RATE, duration, language)
+        if cached:
+            return cached, [], fingerprint, duration
+    chunks = split_speech_chunks(pcm, SAMPLE_RATE)
+    if not chunks:
+        raise RuntimeError("No speech detected in audio")
+    return None, chunks, fingerprint, duration
+
+def _store_segments(
+    fingerprint: Optional[np.ndarray],
+    duration: float,
+    segments: List[Dict[str, Any]],
+    language: Optional[str]
+) -> None:
+    cache = get_transcript_cache()
+    if cache is not None and fingerprint is not None:
+        cache.store(fingerprint, SAMPLE_RATE, duration, segments, language)
+
+def _transcribe_chunk(index: int, start: float, end: float, data: bytes, language: Optional[str]) -> List[Dict[str, Any]]:
+    try:
+        result = call_with_retry("groq", lambda: get_groq_client().audio.transcriptions.create(
+            model=TRANSCRIBE_MODEL,
+            file=(f"chunk_{index}.{CHUNK_FORMAT}", data),
+            response_format="verbose_json",
+            language=language if language else None,
+        ))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Groq transcription error on chunk {index}: {e}") from e
+    return _chunk_segments(result, start, end)
+
+async def _transcribe_chunk_async(
+    semaphore: asyncio.Semaphore,
+    index: int,
+    start: float,
+    end: float,
+    data: bytes,
+    language: Optional[str]
+) -> List[Dict[str, Any]]:
+    async with semaphore:
         try:
-            result = client.audio.transcriptions.create(
-                model="whisper-large-v3-turbo",
-                file=(audio_path, f),
+            result = await call_with_retry_async("groq", lambda: get_async_groq_client().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL,
+                file=(f"chunk_{index}.{CHUNK_FORMAT}", data),
+                response_format="verbose_json",
+                language=language if language else None,
+            ))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Groq transcription error on chunk {index}: {e}") from e
+    return _chunk_segments(result, start, end)
+
+def transcribe_audio_segments(audio_path: str, language: Optional[str] = None) -> List[Dict[str, Any]]:
+    if not TRANSCRIBE_USE_VAD or not has_ffmpeg():
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        try:
+            result = call_with_retry("groq", lambda: get_groq_client().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL,
+                file=(os.path.basename(audio_path), data),
                 response_format="json",
                 language=language if language else None,
-            )
+            ))
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Groq transcription error: {e}") from e
-    text = getattr(result, "text", None) if hasattr(result, "text") else None
-    if not text and isinstance(result, dict):
-        text = result.get("text")
-    if not text:
-        raise RuntimeError("Empty transcription returned")
-    return text
\ No newline at end of file
+        return _whole_file_segments(result)
+    cached, chunks, fingerprint, duration = _prepare_chunks(audio_path, language)
+    if cached:
+        return cached
+    with ThreadPoolExecutor(max_workers=min(TRANSCRIBE_MAX_CONCURRENCY, len(chunks))) as executor:
+        futures = [
+            executor.submit(_transcribe_chunk, i, start, end, data, language)
+            for i, (start, end, data) in enumerate(chunks)
+        ]
+        segments = [segment for future in futures for segment in future.result()]
+    _store_segments(fingerprint, duration, segments, language)
+    return segments
+
+async def transcribe_audio_segments_async(audio_path: str, language: Optional[str] = None) -> List[Dict[str, Any]]:
+    if not TRANSCRIBE_USE_VAD or not has_ffmpeg():
+        with open(audio_path, "rb") as f:
+            data = await asyncio.to_thread(f.read)
+        try:
+            result = await call_with_retry_async("groq", lambda: get_async_groq_client().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL,
+                file=(os.path.basename(audio_path), data),
+                response_format="json",
+                language=language if language else None,
+            ))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Groq transcription error: {e}") from e
+        return _whole_file_segments(result)
+    cached, chunks, fingerprint, duration = await asyncio.to_thread(_prepare_chunks, audio_path, language)
+    if cached:
+        return cached
+    semaphore = asyncio.Semaphore(TRANSCRIBE_MAX_CONCURRENCY)
+    results = await asyncio.gather(*[
+        _transcribe_chunk_async(semaphore, i, start, end, data, language)
+        for i, (start, end, data) in enumerate(chunks)
+    ])
+    segments = [segment for chunk_segments in results for segment in chunk_segments]
+    await asyncio.to_thread(_store_segments, fingerprint, duration, segments, language)
+    return segments
+
+def transcribe_audio(audio_path: str, language: Optional[str] = None) -> str:
+    return _join_segments(transcribe_audio_segments(audio_path, language))
+
+async def transcribe_audio_async(audio_path: str, language: Optional[str] = None) -> str:
+    return _join_segments(await transcribe_audio_segments_async(audio_path, language))
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import logging
+from collections import Counter
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional
+)
+import numpy as np
+from web.utils.fingerprint import (
+    best_alignment,
+    frame_seconds
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ai_detector_transcript_cache.sqlite3"))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+TRANSCRIPT_CACHE_MAX_BIT_ERROR = float(os.getenv("TRANSCRIPT_CACHE_MAX_BIT_ERROR", "0.30"))
+INDEX_KEY_SHIFT = 12
+INDEX_STRIDE = 2
+MIN_VOTES = 3
+MIN_COVERAGE = 0.8
+CANDIDATES_TO_VERIFY = 5
+
+class TranscriptCache:
+    def __init__(
+        self,
+        path: str = TRANSCRIPT_CACHE_PATH,
+        max_entries: int = TRANSCRIPT_CACHE_MAX_ENTRIES,
+        max_bit_error: float = TRANSCRIPT_CACHE_MAX_BIT_ERROR
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bit_error = max_bit_error
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint BLOB NOT NULL,
+                sample_rate INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                language TEXT,
+                segments TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                key INTEGER NOT NULL,
+                entry_id INTEGER NOT NULL,
+                position INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_key ON postings (key);
+            CREATE INDEX IF NOT EXISTS postings_entry ON postings (entry_id);
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+        """)
+        self._connection.commit()
+
+    def lookup(
+        self,
+        fingerprint: np.ndarray,
+        sample_rate: int,
+        duration: float,
+        language: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        if len(fingerprint) == 0:
+            return None
+        keys = sorted({int(value) >> INDEX_KEY_SHIFT for value in fingerprint})
+        positions_by_key: Dict[int, List[int]] = {}
+        for position, value in enumerate(fingerprint):
+            positions_by_key.setdefault(int(value) >> INDEX_KEY_SHIFT, []).append(position)
+        with self._lock:
+            votes: Counter = Counter()
+            for batch_start in range(0, len(keys), 500):
+                batch = keys[batch_start:batch_start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, entry_id, position FROM postings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, entry_id, position in rows:
+                    for query_position in positions_by_key[key]:
+                        votes[(entry_id, position - query_position)] += 1
+            for (entry_id, offset), count in votes.most_common(CANDIDATES_TO_VERIFY):
+                if count < MIN_VOTES:
+                    break
+                row = self._connection.execute(
+                    "SELECT fingerprint, sample_rate, duration, language, segments FROM entries WHERE id = ?",
+                    (entry_id,)
+                ).fetchone()
+                if row is None or row[1] != sample_rate or row[3] != language:
+                    continue
+                stored = np.frombuffer(row[0], dtype=np.uint32)
+                alignment = best_alignment(fingerprint, stored, range(offset - 2, offset + 3))
+                if alignment is None:
+                    continue
+                best_offset, error_rate, overlap = alignment
+                if error_rate > self.max_bit_error or overlap < MIN_COVERAGE * len(fingerprint):
+                    continue
+                segments = self._slice_segments(json.loads(row[4]), best_offset * frame_seconds(sample_rate), duration, row[2])
+                if segments is None:
+                    continue
+                self._connection.execute("UPDATE entries SET last_used = ? WHERE id = ?", (time.time(), entry_id))
+                self._connection.commit()
+                self.hits += 1
+                logger.info(f"Transcript cache hit: entry {entry_id}, offset {best_offset}, bit error rate {error_rate:.3f}")
+                return segments
+            self.misses += 1
+            return None
+
+    def _slice_segments(
+        self,
+        segments: List[Dict[str, Any]],
+        offset_seconds: float,
+        duration: float,
+        stored_duration: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        if any(segment.get("end") is None for segment in segments):
+            if abs(offset_seconds) > 1.0 or abs(duration - stored_duration) > 0.05 * stored_duration:
+                return None
+            return segments
+        window_end = offset_seconds + duration
+        sliced = []
+        for segment in segments:
+            midpoint = (segment["start"] + segment["end"]) / 2
+            if midpoint < offset_seconds or midpoint > window_end:
+                continue
+            sliced.append({
+                "start": round(max(0.0, segment["start"] - offset_seconds), 2),
+                "end": round(min(duration, segment["end"] - offset_seconds), 2),
+                "text": segment["text"],
+            })
+        return sliced or None
+
+    def store(
+        self,
+        fingerprint: np.ndarray,
+        sample_rate: int,
+        duration: float,
+        segments: List[Dict[str, Any]],
+        language: Optional[str] = None
+    ) -> None:
+        if len(fingerprint) == 0 or not segments:
+            return
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO entries (fingerprint, sample_rate, duration, language, segments, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint.astype(np.uint32).tobytes(), sample_rate, duration, language, json.dumps(segments), now, now)
+            )
+            entry_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO postings (key, entry_id, position) VALUES (?, ?, ?)",
+                [(int(fingerprint[i]) >> INDEX_KEY_SHIFT, entry_id, i) for i in range(0, len(fingerprint), INDEX_STRIDE)]
+            )
+            self.stores += 1
+            count = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > self.max_entries:
+                expired = [row[0] for row in self._connection.execute(
+                    "SELECT id FROM entries ORDER BY last_used ASC LIMIT ?",
+                    (count - self.max_entries,)
+                ).fetchall()]
+                self._connection.executemany("DELETE FROM postings WHERE entry_id = ?", [(i,) for i in expired])
+                self._connection.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in expired])
+                self.evictions += len(expired)
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+_transcript_cache: Optional[TranscriptCache] = None
+_transcript_cache_lock = threading.Lock()
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    global _transcript_cache
+    if TRANSCRIPT_CACHE_MAX_ENTRIES <= 0:
+        return None
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            try:
+                _transcript_cache = TranscriptCache()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open transcript cache at {TRANSCRIPT_CACHE_PATH}: {str(e)}")
+                return None
+        return _transcript_cache
@@ -0,0 +1,33 @@
+import os
+from typing import (
+    Any,
+    Dict,
+    Optional
+)
+
+def torch_threads_per_worker(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    pid = pid or os.getpid()
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+    except OSError:
+        try:
+            import psutil
+            info = psutil.Process(pid).memory_full_info()
+            fields = {"Rss": info.rss, "Pss": getattr(info, "pss", None), "Private_Clean": info.uss, "Private_Dirty": 0}
+        except (ImportError, Exception):
+            return {"pid": pid, "rssMb": None, "pssMb": None, "ussMb": None}
+    to_mb = lambda value: round(value / (1024 * 1024), 1) if value is not None else None
+    return {
+        "pid": pid,
+        "rssMb": to_mb(fields.get("Rss")),
+        "pssMb": to_mb(fields.get("Pss")),
+        "ussMb": to_mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+    }